@@ -1,5 +1,8 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,6 +10,8 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
+from database import run_db
+import crud
 
 load_dotenv()
 
@@ -38,6 +43,75 @@ class UserCreate(BaseModel):
     password: str
     full_name: Optional[str] = None
 
+class UserCache:
+    """
+    인증된 사용자 TTL + LRU 캐시 (프로세스 로컬)
+
+    get_current_user가 매 요청마다 DB를 조회하지 않도록 JWT subject(email)별로
+    User를 보관합니다. 역할 변경/회원가입 시 invalidate()로 즉시 무효화하고,
+    다른 프로세스(워커, CLI 스크립트)에서 바뀐 내용은 최대 TTL 동안만 지연됩니다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # email -> (만료 시각, User)
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional["User"]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, user: "User"):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, user)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None):
+        """key 하나 또는 (None이면) 전체 무효화"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+user_cache = UserCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
 def verify_password(plain_password, hashed_password):
     # bcrypt has 72 byte limit, truncate if necessary
     if len(plain_password.encode('utf-8')) > 72:
@@ -61,6 +135,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    return await authenticate_token(token)
+
+async def authenticate_token(token: str) -> User:
+    """JWT를 검증하고 해당 사용자 반환 (실패 시 401 HTTPException, WebSocket 인증에도 사용)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -75,33 +153,24 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     except JWTError:
         raise credentials_exception
 
-    # DB에서 사용자 조회
-    from contextlib import contextmanager
-    import sqlite3
+    # 캐시 확인 후 없을 때만 DB에서 사용자 조회 (DB 스레드에서 실행)
+    cached = user_cache.get(token_data.email)
+    if cached is not None:
+        return cached
 
-    @contextmanager
-    def get_db():
-        conn = sqlite3.connect("maintenance.db")
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = ?", (token_data.email,))
-        user = cursor.fetchone()
+    user = await run_db(crud.get_user_by_email, token_data.email)
 
     if user is None:
         raise credentials_exception
 
-    return User(
+    current_user = User(
         id=user["id"],
         email=user["email"],
         full_name=user["full_name"],
         role=user["role"]
     )
+    user_cache.set(token_data.email, current_user)
+    return current_user
 
 async def get_current_active_admin(current_user: User = Depends(get_current_user)):
     """관리자 또는 최고 관리자 권한 확인"""
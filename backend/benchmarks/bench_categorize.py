@@ -0,0 +1,87 @@
+"""
+AI 분류 처리량 벤치마크 (개별 호출 vs 마이크로 배치)
+
+가짜 LLM(fake_llm)에 호출당 고정 지연(왕복 + 시스템 프롬프트 처리)과 항목당 지연을 주고,
+분류 대기 요청 N개를 배치 크기별로 처리하는 데 걸린 시간과 LLM 호출 수,
+전송한 프롬프트 크기를 비교합니다. 배치 크기 1은 요청마다 개별 호출하는 기존 방식입니다.
+
+    python benchmarks/bench_categorize.py
+    python benchmarks/bench_categorize.py --requests 200 --latency 0.5 --per-item 0.02 --sizes 1 10 25
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ["CATEGORY_CACHE"] = "memory"
+
+import database
+import fake_llm
+import main
+import tasks
+from categorization_cache import categorization_cache
+from llm import LLMClient
+
+DESCRIPTIONS = [
+    "복도 전등이 깜빡임", "싱크대 배관 누수", "보일러 소음", "벽에 균열", "엘리베이터 버튼 고장",
+    "화장실 변기 막힘", "에어컨에서 물이 샘", "창문이 안 닫힘", "콘센트에서 불꽃", "천장 얼룩",
+]
+
+
+def run(requests: int, batch_size: int) -> tuple:
+    with database.get_db() as conn:
+        conn.execute("DELETE FROM requests")
+        # 캐시 효과를 빼고 측정하도록 설명을 모두 다르게
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, category, priority) VALUES (1, ?, 'processing', 'processing')",
+            [(f"{DESCRIPTIONS[i % len(DESCRIPTIONS)]} #{i}",) for i in range(requests)]
+        )
+        conn.commit()
+    categorization_cache.clear()
+    calls_before, chars_before = fake_llm.app.state.calls, fake_llm.app.state.prompt_chars
+
+    start = time.perf_counter()
+    processed = 0
+    while processed < requests:
+        summary = tasks.run_categorization_batch(limit=batch_size)
+        if not summary["processed"]:
+            break
+        processed += summary["processed"]
+    elapsed = time.perf_counter() - start
+
+    return (processed / elapsed, fake_llm.app.state.calls - calls_before,
+            fake_llm.app.state.prompt_chars - chars_before)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3, help="호출당 고정 지연 (초)")
+    parser.add_argument("--per-item", type=float, default=0.01, help="항목당 추가 지연 (초)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.chdir(workdir)
+    database.configure(os.path.join(workdir, "bench.db"))
+    main.init_db()
+
+    fake_llm.reset()
+    fake_llm.app.state.latency = args.latency
+    fake_llm.app.state.latency_per_item = args.per_item
+    tasks.sync_llm_client = LLMClient(base_url="http://fake-llm", transport=fake_llm.mock_transport())
+    tasks.event_bus.publish_sync = lambda event: None  # 구독자 없음
+
+    print(f"\nrequests: {args.requests}, latency: {args.latency}s/call + {args.per_item}s/item")
+    print(f"{'batch':>6} {'req/s':>8} {'llm calls':>10} {'prompt KB':>10}")
+    for size in args.sizes:
+        rate, calls, chars = run(args.requests, size)
+        print(f"{size:>6} {rate:>8.1f} {calls:>10} {chars / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,139 @@
+"""
+이벤트 루프 블로킹 벤치마크
+
+무거운 전체 목록 조회(GET /api/requests를 limit=500으로 X-Next-Cursor가 없을 때까지 순회)가
+반복 실행되는 동안
+동시에 들어오는 단건 조회(GET /api/requests/{id})의 지연 시간을 측정합니다.
+
+    python benchmarks/bench_event_loop.py                # run_db (스레드 오프로딩)
+    python benchmarks/bench_event_loop.py --blocking     # 이전 방식 (루프에서 직접 sqlite3 호출)
+
+옵션:
+    --rows N          시드 데이터 행 수 (기본값: 200000)
+    --readers N       동시 단건 조회 클라이언트 수 (기본값: 20)
+    --duration S      측정 시간, 초 (기본값: 10)
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+
+import auth
+import database
+import main
+from auth import User
+
+
+def seed(rows: int):
+    with database.get_db() as conn:
+        conn.executemany(
+            """
+            INSERT INTO requests (user_id, description, category, priority, status, location)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    i % 500,
+                    f"Synthetic maintenance request #{i} - 화장실 변기 막힘, 물이 계속 샘",
+                    random.choice(["electrical", "plumbing", "hvac", "structural", "other"]),
+                    random.choice(["high", "medium", "low"]),
+                    random.choice(["pending", "in_progress", "completed"]),
+                    f"{i % 30}층",
+                )
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(args):
+    admin = User(id=0, email="bench@example.com", role="admin")
+    main.app.dependency_overrides[auth.get_current_user] = lambda: admin
+    main.app.dependency_overrides[auth.get_current_active_admin] = lambda: admin
+
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    heavy_runs = 0
+    deadline = time.perf_counter() + args.duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def heavy():
+            nonlocal heavy_runs
+            while time.perf_counter() < deadline:
+                # 목록은 커서 페이지라 마지막 페이지까지 따라가야 전체 조회
+                params = {"limit": 500}
+                while True:
+                    response = await client.get("/api/requests", params=params)
+                    response.raise_for_status()
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+                    params["cursor"] = cursor
+                heavy_runs += 1
+
+        async def reader():
+            while time.perf_counter() < deadline:
+                request_id = random.randint(1, args.rows)
+                start = time.perf_counter()
+                response = await client.get(f"/api/requests/{request_id}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        await asyncio.gather(heavy(), *(reader() for _ in range(args.readers)))
+
+    return latencies, heavy_runs
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--blocking", action="store_true", help="이벤트 루프에서 직접 DB 호출 (이전 동작)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.chdir(workdir)
+    database.configure(os.path.join(workdir, "bench.db"))
+    main.init_db()
+    seed(args.rows)
+
+    if args.blocking:
+        async def run_db_inline(fn, *fn_args, **fn_kwargs):
+            with database.get_db() as conn:
+                return fn(conn, *fn_args, **fn_kwargs)
+
+        main.run_db = run_db_inline
+        auth.run_db = run_db_inline
+
+    latencies, heavy_runs = asyncio.run(run(args))
+
+    mode = "blocking (inline sqlite3)" if args.blocking else "run_db (thread offload)"
+    print(f"\nmode: {mode}")
+    print(f"rows: {args.rows}, readers: {args.readers}, duration: {args.duration}s")
+    print(f"heavy listings completed: {heavy_runs}")
+    print(f"point reads completed:    {len(latencies)} ({len(latencies) / args.duration:.1f} req/s)")
+    print(f"p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"p95: {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"p99: {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
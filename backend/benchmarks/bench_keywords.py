@@ -0,0 +1,92 @@
+"""
+키워드 분류 마이크로 벤치마크
+
+합성 설명 코퍼스에서 기존 방식(카테고리/우선순위마다 any(word in text ...) 반복)과
+컴파일된 KeywordMatcher의 설명당 처리 시간을 비교하고, 두 방식의 분류 결과가 같은지 확인합니다.
+
+    python benchmarks/bench_keywords.py
+    python benchmarks/bench_keywords.py --size 500000 --words 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import CATEGORY_KEYWORDS, PRIORITY_KEYWORDS, categorize_with_keywords
+
+FILLER = ["우리", "집", "아파트", "동", "호", "에서", "어제부터", "계속", "소리가", "나요", "확인", "부탁드립니다",
+          "관리실", "층", "입구", "쪽", "조금", "많이", "주말", "오후", "같아요", "방", "거실", "주방"]
+
+
+def legacy_categorize(description: str) -> dict:
+    """이전 구현 (목록을 매번 만들고 카테고리/우선순위마다 따로 훑음)"""
+    desc_lower = description.lower()
+
+    category = "other"
+    if any(word in desc_lower for word in ["전기", "전등", "조명", "콘센트", "스위치", "누전", "정전", "전선"]):
+        category = "electrical"
+    elif any(word in desc_lower for word in ["수도", "배관", "물", "수도꼭지", "변기", "싱크대", "하수", "누수", "화장실", "세면대"]):
+        category = "plumbing"
+    elif any(word in desc_lower for word in ["냉방", "난방", "에어컨", "보일러", "환기", "온도"]):
+        category = "hvac"
+    elif any(word in desc_lower for word in ["벽", "바닥", "천장", "문", "창문", "계단", "균열", "파손"]):
+        category = "structural"
+
+    priority = "medium"
+    if any(word in desc_lower for word in ["긴급", "위험", "사고", "고장", "멈춤", "안됨", "불가능", "즉시"]):
+        priority = "high"
+    elif any(word in desc_lower for word in ["샘", "새", "누수", "넘침", "뜨거움", "계속"]):
+        priority = "high"
+    elif any(word in desc_lower for word in ["나중", "여유", "천천히"]):
+        priority = "low"
+
+    return {"category": category, "priority": priority}
+
+
+def make_corpus(size: int, words: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    keywords = [w for table in (CATEGORY_KEYWORDS, PRIORITY_KEYWORDS) for ws in table.values() for w in ws]
+    corpus = []
+    for _ in range(size):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(rng.randint(0, 3)):
+            tokens[rng.randrange(words)] = rng.choice(keywords)
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def measure(fn, corpus) -> float:
+    start = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    return (time.perf_counter() - start) / len(corpus)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="설명 개수")
+    parser.add_argument("--words", type=int, default=20, help="설명당 단어 수")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size, args.words)
+
+    mismatches = 0
+    for text in corpus:
+        new = categorize_with_keywords(text)
+        if legacy_categorize(text) != {"category": new["category"], "priority": new["priority"]}:
+            mismatches += 1
+
+    legacy = measure(legacy_categorize, corpus)
+    compiled = measure(categorize_with_keywords, corpus)
+
+    print(f"\ncorpus: {args.size} descriptions x {args.words} words, result mismatches: {mismatches}")
+    print(f"{'legacy any() chain':<22} {legacy * 1e6:>8.2f} us/desc")
+    print(f"{'compiled matcher':<22} {compiled * 1e6:>8.2f} us/desc  ({legacy / compiled:.2f}x)")
+
+
+if __name__ == "__main__":
+    main_cli()
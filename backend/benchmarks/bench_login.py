@@ -0,0 +1,98 @@
+"""
+로그인(bcrypt) 처리량 벤치마크
+
+해싱 풀 워커 수를 1부터 코어 수까지 늘려가며 초당 로그인 수와
+동시에 호출한 /health 응답 지연(이벤트 루프가 막히지 않는지)을 측정합니다.
+
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --mode process --clients 32 --duration 5
+
+thread 모드는 bcrypt가 해싱 중 GIL을 놓는 경우에만 코어 수만큼 확장됩니다.
+확장되지 않으면 --mode process 결과와 비교해 HASHING_POOL_MODE를 정하세요.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+
+import database
+import main
+from auth import get_password_hash
+from hashing import HashingPool
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def measure(clients: int, duration: float):
+    transport = httpx.ASGITransport(app=main.app)
+    logins = 0
+    health_latencies = []
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def login_loop():
+            nonlocal logins
+            while time.perf_counter() < deadline:
+                response = await client.post("/api/auth/login", data={"username": EMAIL, "password": PASSWORD})
+                response.raise_for_status()
+                logins += 1
+
+        async def health_loop():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(health_loop(), *(login_loop() for _ in range(clients)))
+
+    return logins / duration, health_latencies
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.chdir(workdir)
+    database.configure(os.path.join(workdir, "bench.db"))
+    main.init_db()
+    with database.get_db() as conn:
+        conn.execute("INSERT INTO users (email, hashed_password) VALUES (?, ?)", (EMAIL, get_password_hash(PASSWORD)))
+        conn.commit()
+
+    # 처리량 측정이 목적이므로 로그인 rate limit 해제
+    main.limiter.enabled = False
+
+    print(f"\nmode: {args.mode}, clients: {args.clients}, duration: {args.duration}s, cpus: {os.cpu_count()}")
+    print(f"{'workers':>8} {'logins/s':>10} {'health p50':>12} {'health p99':>12}")
+
+    workers = 1
+    while workers <= args.max_workers:
+        main.hashing_pool = HashingPool(workers=workers, max_queue=args.clients, mode=args.mode)
+        rate, latencies = asyncio.run(measure(args.clients, args.duration))
+        main.hashing_pool.shutdown()
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{workers:>8} {rate:>10.1f} {statistics.median(latencies) * 1000:>10.1f}ms {p99 * 1000:>10.1f}ms")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main_cli()
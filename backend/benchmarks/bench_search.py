@@ -0,0 +1,165 @@
+"""
+요청 전문 검색 벤치마크
+
+임시 SQLite 파일에 합성 요청을 넣고 (FTS5 트리거 포함 삽입 시간, 인덱스 크기)
+crud.search_requests와 인덱스 없는 LIKE '%단어%' 전체 스캔의 첫 페이지 응답 시간을 비교합니다.
+설명은 흔한 방/증상 문구에 롱테일(Zipf) 분포의 합성 단어를 섞어 드문 검색어가 실제로 드물게 만듭니다.
+
+    python benchmarks/bench_search.py                 # 100만 건
+    python benchmarks/bench_search.py --size 100000 --repeat 20
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crud
+from migrations import migrate
+from search import parse_query
+
+ROOMS = ["화장실", "주방", "거실", "안방", "베란다", "현관", "복도", "계단", "다용도실", "세탁실"]
+PROBLEMS = ["누수가 심해요", "전등이 깜빡여요", "콘센트가 안 돼요", "보일러 온수가 안 나와요", "창문이 안 닫혀요",
+            "벽에 균열이 생겼어요", "배관에서 소리가 나요", "에어컨 물이 떨어져요", "문이 고장났어요", "곰팡이가 피었어요"]
+SYLLABLES = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후기니디리미비시이지치"
+VOCABULARY_SIZE = 20_000
+
+# (이름, 검색어) - 흔한 단어 / 드문 단어 / 위치+단어 / 짧은 단어(LIKE) / 짧은+긴 단어
+# {rare}는 합성 어휘에서 빈도 순위가 낮은 단어로 바뀜
+QUERIES = [
+    ("common trigram", "누수가"),
+    ("rare trigram", "{rare}"),
+    ("location + term", "1203호 보일러"),
+    ("short term (LIKE)", "누수"),
+    ("short + long", "누수 {rare}"),
+]
+
+
+def make_vocabulary(rng) -> list:
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4))))
+    return sorted(words)
+
+
+def make_rows(size: int, seed: int = 42):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    # 순위 r 단어의 빈도 ∝ 1/r
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    for i in range(size):
+        words = [rng.choice(ROOMS), rng.choice(PROBLEMS)]
+        words += rng.choices(vocabulary, cum_weights=weights, k=rng.randint(2, 5))
+        location = f"{rng.randint(101, 130)}동 {rng.randint(1, 25)}{rng.randint(1, 4):02d}호"
+        yield (i % 5000 + 1, " ".join(words), location, "other", "medium")
+
+
+def build(path: str, size: int, target: int = None) -> float:
+    """target 버전까지 마이그레이션한 DB에 size건 삽입 (삽입 시간 반환)"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn, target=target)
+    start = time.perf_counter()
+    rows = make_rows(size)
+    while True:
+        chunk = [row for _, row in zip(range(10_000), rows)]
+        if not chunk:
+            break
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, location, category, priority) VALUES (?, ?, ?, ?, ?)", chunk
+        )
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    if target is None:
+        conn.execute("INSERT INTO requests_fts (requests_fts) VALUES ('optimize')")
+        conn.commit()
+    conn.close()
+    return elapsed
+
+
+def fts_size(conn) -> int:
+    try:
+        return conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'requests_fts%'"
+        ).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0  # dbstat 없이 빌드된 SQLite
+
+
+def timed(fn, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), max(samples), result
+
+
+def naive_like(conn, query: str, limit: int):
+    where = " AND ".join("(description LIKE ? OR location LIKE ?)" for _ in parse_query(query))
+    values = [v for term in parse_query(query) for v in (f"%{term}%", f"%{term}%")]
+    return conn.execute(
+        f"SELECT * FROM requests WHERE {where} ORDER BY created_at DESC, id DESC LIMIT ?", values + [limit]
+    ).fetchall()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000, help="합성 요청 수")
+    parser.add_argument("--repeat", type=int, default=5, help="쿼리당 반복 횟수")
+    parser.add_argument("--limit", type=int, default=20, help="페이지 크기")
+    args = parser.parse_args()
+
+    rare = make_vocabulary(random.Random(42))[VOCABULARY_SIZE // 2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 삽입 비용: FTS 트리거가 없는 스키마(마이그레이션 10)와 비교 (표본 5만 건)
+        sample = min(args.size, 50_000)
+        without_fts = build(os.path.join(directory, "without_fts.db"), sample, target=10)
+        with_fts = build(os.path.join(directory, "with_fts.db"), sample)
+        print(f"\ninsert {sample} rows: {sample / without_fts:,.0f} rows/s without FTS, "
+              f"{sample / with_fts:,.0f} rows/s with FTS triggers "
+              f"(+{(with_fts - without_fts) / sample * 1e6:.0f} us/row)")
+
+        path = os.path.join(directory, "bench_search.db")
+        insert = build(path, args.size)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+
+        db_size = os.path.getsize(path)
+        print(f"rows: {args.size}, insert: {insert:.1f}s, db: {db_size / 1e6:.0f} MB, "
+              f"fts index: {fts_size(conn) / 1e6:.0f} MB")
+        print(f"{'query':<20} {'matches':>8} {'search p50':>11} {'max':>9} {'LIKE scan p50':>14} {'speedup':>8}")
+        for name, query in QUERIES:
+            query = query.format(rare=rare)
+            terms = parse_query(query)
+            search_p50, search_max, (rows, _) = timed(
+                lambda: crud.search_requests(conn, terms, limit=args.limit), args.repeat)
+            like_p50, _, _ = timed(lambda: naive_like(conn, query, args.limit), args.repeat)
+            matches = conn.execute(
+                "SELECT COUNT(*) FROM requests WHERE " + " AND ".join(
+                    "(description LIKE ? OR location LIKE ?)" for _ in terms),
+                [v for term in terms for v in (f"%{term}%", f"%{term}%")]
+            ).fetchone()[0]
+            print(f"{name:<20} {matches:>8} {search_p50 * 1e3:>9.1f}ms {search_max * 1e3:>7.1f}ms "
+                  f"{like_p50 * 1e3:>12.1f}ms {like_p50 / search_p50:>7.1f}x")
+
+            # 관련도순 두 번째 페이지 (커서)
+            _, cursor = crud.search_requests(conn, terms, limit=args.limit)
+            if cursor:
+                page_p50, _, _ = timed(
+                    lambda: crud.search_requests(conn, terms, limit=args.limit, cursor=cursor), args.repeat)
+                print(f"{'  next page':<20} {'':>8} {page_p50 * 1e3:>9.1f}ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main_cli()
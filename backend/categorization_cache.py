@@ -0,0 +1,263 @@
+"""
+AI 분류 결과 캐시 (정규화된 설명의 해시 → {"category", "priority"})
+
+입주민들이 "화장실 변기 막힘"처럼 거의 같은 문장을 반복해서 접수하므로,
+같은 설명은 LLM을 다시 호출하지 않고 이전 분류 결과를 재사용합니다.
+LLM이 성공한 결과 중 허용된 카테고리/우선순위인 것만 저장합니다
+(키워드 폴백 결과나 잘못된 LLM 응답이 TTL 동안 재사용되지 않도록).
+
+- RedisCategorizationCache: 모든 API 워커와 Celery 워커가 공유 (운영)
+  저장 순서를 담은 정렬 집합으로 항목 수를 CATEGORY_CACHE_SIZE로 제한 (넘치면 오래된 항목부터 삭제)
+- InMemoryCategorizationCache: 프로세스 로컬 TTL + LRU (테스트, Redis 없는 개발 환경, Redis 장애 시 폴백)
+
+API 핸들러에서는 get()/set(), Celery 작업처럼 이벤트 루프가 없는 곳에서는 get_sync()/set_sync()를 사용합니다.
+
+환경변수:
+    CATEGORY_CACHE          redis 또는 memory (기본값: REDIS_URL이 설정되어 있으면 redis)
+    CATEGORY_CACHE_SIZE     캐시 최대 항목 수 (기본값: 10000)
+    CATEGORY_CACHE_TTL      캐시 유지 시간, 초 (기본값: 604800 = 7일)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from llm import CATEGORIES, PRIORITIES
+
+load_dotenv()
+
+KEY_PREFIX = "catcache:v1:"
+# Redis 캐시 키를 저장 시각 순으로 담는 정렬 집합 (크기 제한용)
+INDEX_KEY = KEY_PREFIX + "index"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_description(description: str) -> str:
+    """대소문자, 전각/반각, 문장부호, 공백 차이를 무시하도록 정규화"""
+    text = unicodedata.normalize("NFKC", description).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(description: str) -> str:
+    digest = hashlib.sha256(normalize_description(description).encode("utf-8")).hexdigest()
+    return KEY_PREFIX + digest
+
+
+def _valid(result) -> bool:
+    """허용된 카테고리/우선순위를 가진 LLM 결과인지 (키워드 폴백 결과는 matched_terms가 있음)"""
+    return (
+        isinstance(result, dict)
+        and result.get("category") in CATEGORIES
+        and result.get("priority") in PRIORITIES
+        and "matched_terms" not in result
+    )
+
+
+# 값을 저장하고 인덱스에 추가한 뒤 maxsize를 넘은 만큼 오래된 키 삭제
+_SET_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local old = redis.call('ZPOPMIN', KEYS[2], excess)
+    for i = 1, #old, 2 do
+        redis.call('DEL', old[i])
+    end
+    return excess
+end
+return 0
+"""
+
+
+class InMemoryCategorizationCache:
+    """프로세스 로컬 TTL + LRU 캐시"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 604800.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # 키 -> (만료 시각, 결과)
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get_sync(self, description: str) -> Optional[dict]:
+        key = cache_key(description)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set_sync(self, description: str, result: dict):
+        if not _valid(result):
+            self.rejected += 1
+            return
+        key = cache_key(description)
+        value = {"category": result["category"], "priority": result["priority"]}
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    async def get(self, description: str) -> Optional[dict]:
+        return self.get_sync(description)
+
+    async def set(self, description: str, result: dict):
+        self.set_sync(description, result)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+            }
+
+
+class RedisCategorizationCache:
+    """Redis 공유 캐시 (Redis 오류 시 프로세스 로컬 캐시로 대체)"""
+
+    def __init__(self, url: str, maxsize: int = 10000, ttl: float = 604800.0):
+        import redis
+        import redis.asyncio
+
+        self.url = url
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._redis = redis.asyncio.from_url(url)
+        self._sync_redis = redis.Redis.from_url(url)
+        self._fallback = InMemoryCategorizationCache(maxsize=maxsize, ttl=ttl)
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def _decode(self, raw) -> Optional[dict]:
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            result = json.loads(raw)
+        except ValueError:
+            result = None
+        if not _valid(result):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def _encode(self, result: dict) -> str:
+        return json.dumps({"category": result["category"], "priority": result["priority"]}, ensure_ascii=False)
+
+    def _set_args(self, description: str, result: dict) -> tuple:
+        return (_SET_SCRIPT, 2, cache_key(description), INDEX_KEY,
+                self._encode(result), int(self.ttl), time.time(), self.maxsize)
+
+    async def get(self, description: str) -> Optional[dict]:
+        try:
+            raw = await self._redis.get(cache_key(description))
+        except Exception as e:
+            self.errors += 1
+            print(f"[CACHE] Redis get failed: {type(e).__name__}: {str(e)}")
+            return self._fallback.get_sync(description)
+        return self._decode(raw)
+
+    async def set(self, description: str, result: dict):
+        if not _valid(result):
+            self.rejected += 1
+            return
+        try:
+            self.evictions += await self._redis.eval(*self._set_args(description, result))
+        except Exception as e:
+            self.errors += 1
+            print(f"[CACHE] Redis set failed: {type(e).__name__}: {str(e)}")
+            self._fallback.set_sync(description, result)
+
+    def get_sync(self, description: str) -> Optional[dict]:
+        try:
+            raw = self._sync_redis.get(cache_key(description))
+        except Exception as e:
+            self.errors += 1
+            print(f"[CACHE] Redis get failed: {type(e).__name__}: {str(e)}")
+            return self._fallback.get_sync(description)
+        return self._decode(raw)
+
+    def set_sync(self, description: str, result: dict):
+        if not _valid(result):
+            self.rejected += 1
+            return
+        try:
+            self.evictions += self._sync_redis.eval(*self._set_args(description, result))
+        except Exception as e:
+            self.errors += 1
+            print(f"[CACHE] Redis set failed: {type(e).__name__}: {str(e)}")
+            self._fallback.set_sync(description, result)
+
+    def clear(self):
+        """이 캐시의 키만 삭제 (모델/프롬프트 변경 후 등)"""
+        for key in self._sync_redis.scan_iter(match=KEY_PREFIX + "*", count=1000):
+            self._sync_redis.delete(key)
+        self._fallback.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+            "fallback": self._fallback.stats(),
+        }
+
+
+def create_categorization_cache():
+    backend = os.getenv("CATEGORY_CACHE") or ("redis" if os.getenv("REDIS_URL") else "memory")
+    maxsize = int(os.getenv("CATEGORY_CACHE_SIZE", "10000"))
+    ttl = float(os.getenv("CATEGORY_CACHE_TTL", "604800"))
+    if backend == "redis":
+        return RedisCategorizationCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"), maxsize=maxsize, ttl=ttl)
+    return InMemoryCategorizationCache(maxsize=maxsize, ttl=ttl)
+
+
+categorization_cache = create_categorization_cache()
@@ -1,9 +1,26 @@
 from celery import Celery
+from kombu import Queue
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 작업 큐
+# - classification: 사용자가 결과를 기다리는 AI 분류 (전용 워커, prefetch 1)
+# - notifications: 이메일 등 알림
+# - maintenance: 썸네일 생성, 정리 작업 같은 오래 걸리는 백그라운드 작업
+# 큐마다 워커를 따로 띄워 (supervisord.conf / Procfile 참고) 정리 작업이나 알림 폭주가
+# 분류 작업을 기다리게 하지 않습니다.
+CLASSIFICATION_QUEUE = "classification"
+NOTIFICATIONS_QUEUE = "notifications"
+MAINTENANCE_QUEUE = "maintenance"
+
+# 같은 큐 안의 우선순위 (Redis 브로커는 숫자가 작을수록 먼저 처리)
+PRIORITY_URGENT = 0    # 긴급 키워드가 있는 요청의 분류
+PRIORITY_DEFAULT = 3   # 일반 분류
+PRIORITY_BULK = 6      # 일괄 접수 분류
+PRIORITY_LOW = 9
+
 # Celery 앱 초기화
 celery_app = Celery(
     'maintenance',
@@ -22,6 +39,47 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30분
     result_expires=3600,  # 1시간
+
+    # 큐와 라우팅 (작업 이름 기준, outbox 릴레이의 send_task에도 적용)
+    task_queues=(
+        Queue(CLASSIFICATION_QUEUE),
+        Queue(NOTIFICATIONS_QUEUE),
+        Queue(MAINTENANCE_QUEUE),
+    ),
+    task_default_queue=CLASSIFICATION_QUEUE,
+    task_routes={
+        'tasks.categorize_maintenance_request': {'queue': CLASSIFICATION_QUEUE, 'priority': PRIORITY_DEFAULT},
+        'tasks.categorize_batch': {'queue': CLASSIFICATION_QUEUE, 'priority': PRIORITY_DEFAULT},
+        'tasks.categorize_requests': {'queue': CLASSIFICATION_QUEUE, 'priority': PRIORITY_BULK},
+        'tasks.send_notification_email': {'queue': NOTIFICATIONS_QUEUE},
+        'tasks.generate_thumbnail': {'queue': MAINTENANCE_QUEUE, 'priority': PRIORITY_DEFAULT},
+        'tasks.cleanup_old_requests': {'queue': MAINTENANCE_QUEUE, 'priority': PRIORITY_LOW},
+    },
+    task_default_priority=PRIORITY_DEFAULT,
+    broker_transport_options={
+        # 우선순위별 Redis 리스트 (0~9 전부 구분)
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        # 한 워커가 여러 큐를 구독하면 -Q에 적은 순서대로 먼저 비움
+        'queue_order_strategy': 'priority',
+        # acks_late 작업이 이 시간 안에 확인되지 않으면 다른 워커에 다시 전달 (최대 작업 시간보다 길게)
+        'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', '3600')),
+    },
+
+    # 워커가 미리 가져가는 메시지 수 (1: 긴 작업 뒤에 분류 작업이 묶여 기다리지 않고 우선순위가 지켜짐)
+    worker_prefetch_multiplier=int(os.getenv('CELERY_PREFETCH_MULTIPLIER', '1')),
+    # 작업이 끝난 뒤 확인 → 워커가 죽어도 작업이 유실되지 않음 (작업은 다시 실행해도 안전해야 함)
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+
+    # 브로커 발행 재시도
+    task_publish_retry=True,
+    task_publish_retry_policy={
+        'max_retries': 3,
+        'interval_start': 0,
+        'interval_step': 0.5,
+        'interval_max': 2,
+    },
 )
 
 # 작업 자동 검색
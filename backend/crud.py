@@ -0,0 +1,703 @@
+"""
+데이터 접근 함수 모음
+
+모든 함수는 첫 번째 인자로 SQLite 연결을 받는 동기 함수입니다.
+FastAPI 핸들러에서는 database.run_db()로 워커 스레드에서 실행해
+이벤트 루프를 막지 않도록 합니다.
+
+    row = await run_db(crud.get_request, request_id)
+"""
+
+import base64
+import json
+from typing import Optional
+
+
+def _row_to_dict(row) -> Optional[dict]:
+    return dict(row) if row is not None else None
+
+
+def _save_signature(cursor, request_id: int, duplicate: Optional[dict]):
+    """중복 감지 서명 저장 (위치가 없어 비교하지 않는 요청은 저장하지 않음)"""
+    if duplicate and duplicate.get("location_key") and duplicate.get("minhash"):
+        cursor.execute(
+            "INSERT INTO request_signatures (request_id, location_key, minhash) VALUES (?, ?, ?)",
+            (request_id, duplicate["location_key"], duplicate["minhash"])
+        )
+
+
+def _duplicate_of(duplicate: Optional[dict]) -> Optional[int]:
+    match = duplicate.get("match") if duplicate else None
+    return match["duplicate_of"] if match else None
+
+
+# ---------- requests ----------
+
+def insert_request(conn, user_id: int, description: str, category: str, priority: str,
+                   location: Optional[str], contact_info: Optional[str],
+                   category_source: Optional[str] = None, duplicate: Optional[dict] = None) -> dict:
+    """duplicate: duplicates.DuplicateDetector.check 결과 (서명과 연결할 원본 요청)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO requests (user_id, description, category, priority, location, contact_info, category_source,
+                              duplicate_of)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, description, category, priority, location, contact_info, category_source,
+          _duplicate_of(duplicate)))
+    request_id = cursor.lastrowid
+    _save_signature(cursor, request_id, duplicate)
+    conn.commit()
+
+    cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
+    return _row_to_dict(cursor.fetchone())
+
+
+def insert_request_with_task(conn, user_id: int, description: str, category: str, priority: str,
+                             location: Optional[str], contact_info: Optional[str],
+                             task_name: str, task_id: str, task_priority: Optional[int] = None,
+                             duplicate: Optional[dict] = None) -> dict:
+    """
+    요청과 그 요청을 처리할 작업(task_outbox)을 한 트랜잭션으로 저장
+
+    작업 인자는 (요청 ID, 설명)이며, 브로커가 잠시 내려가 있어도 작업이 유실되지 않고
+    outbox 릴레이가 나중에 발행합니다.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO requests (user_id, description, category, priority, location, contact_info, task_id, duplicate_of)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING *
+    """, (user_id, description, category, priority, location, contact_info, task_id, _duplicate_of(duplicate)))
+    row = _row_to_dict(cursor.fetchone())
+    _save_signature(cursor, row["id"], duplicate)
+    cursor.execute("""
+        INSERT INTO task_outbox (task_id, task_name, args, priority)
+        VALUES (?, ?, ?, ?)
+    """, (task_id, task_name, json.dumps([row["id"], description], ensure_ascii=False), task_priority))
+    conn.commit()
+    return row
+
+
+def insert_requests_with_tasks(conn, user_id: int, items: list, category: str, priority: str,
+                               task_name: str, task_ids: list) -> list:
+    """
+    여러 요청과 그 요청들을 처리할 작업을 한 트랜잭션으로 저장 (일괄 접수)
+
+    items를 task_ids 수만큼 순서대로 나눠 묶음마다 작업 하나(인자: 요청 ID 목록)를 기록하고,
+    각 요청의 task_id에는 자신이 속한 묶음의 작업 ID를 저장합니다.
+    """
+    if not items:
+        return []
+    chunk_size = -(-len(items) // len(task_ids))
+    cursor = conn.cursor()
+    # 행마다 RETURNING으로 받아 ID가 연속이거나 다른 삽입이 없다고 가정하지 않음
+    rows = []
+    for index, item in enumerate(items):
+        cursor.execute("""
+            INSERT INTO requests (user_id, description, category, priority, location, contact_info, task_id, bulk)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+            RETURNING *
+        """, (user_id, item["description"], category, priority, item.get("location"), item.get("contact_info"),
+              task_ids[index // chunk_size]))
+        rows.append(dict(cursor.fetchone()))
+
+    cursor.executemany("""
+        INSERT INTO task_outbox (task_id, task_name, args)
+        VALUES (?, ?, ?)
+    """, [
+        (task_id, task_name, json.dumps([[row["id"] for row in rows[start:start + chunk_size]]]))
+        for task_id, start in zip(task_ids, range(0, len(rows), chunk_size))
+    ])
+    conn.commit()
+    return rows
+
+
+def get_request(conn, request_id: int) -> Optional[dict]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
+    return _row_to_dict(cursor.fetchone())
+
+
+# 목록 응답에서 선택할 수 있는 컬럼 (fields= 프로젝션)
+REQUEST_FIELDS = (
+    "id", "user_id", "description", "category", "priority", "status",
+    "location", "contact_info", "image_url", "thumbnail_url", "task_id", "duplicate_of", "created_at", "updated_at",
+)
+
+
+def encode_cursor(created_at: str, request_id: int) -> str:
+    """(created_at, id) 키셋 위치를 불투명한 커서 문자열로 변환"""
+    raw = f"{created_at}|{request_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """encode_cursor의 역변환 (잘못된 커서면 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, request_id = base64.urlsafe_b64decode(padded).decode("utf-8").rsplit("|", 1)
+        return created_at, int(request_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def request_filters(status: Optional[str] = None, user_id: Optional[int] = None,
+                    category: Optional[str] = None, priority: Optional[str] = None,
+                    created_from: Optional[str] = None, created_to: Optional[str] = None) -> tuple:
+    """목록/내보내기 공통 WHERE 조건 (조건 목록, 바인딩 값) 생성"""
+    where = []
+    values = []
+    if user_id is not None:
+        where.append("user_id = ?")
+        values.append(user_id)
+    if status:
+        where.append("status = ?")
+        values.append(status)
+    if category:
+        where.append("category = ?")
+        values.append(category)
+    if priority:
+        where.append("priority = ?")
+        values.append(priority)
+    if created_from:
+        where.append("created_at >= ?")
+        values.append(created_from)
+    if created_to:
+        where.append("created_at < ?")
+        values.append(created_to)
+    return where, values
+
+
+def list_requests(conn, limit: int = 50, cursor: Optional[str] = None,
+                  fields: Optional[list] = None, **filters) -> tuple:
+    """
+    최신순 요청 목록 한 페이지 조회 (키셋 페이지네이션)
+
+    (created_at, id) 기준으로 커서 다음 행부터 읽으므로
+    OFFSET과 달리 몇 번째 페이지든 인덱스 탐색 비용이 같습니다.
+    id, created_at은 커서 생성을 위해 fields와 관계없이 항상 포함됩니다.
+
+    Returns:
+        (행 목록, 다음 페이지 커서 또는 None)
+    """
+    columns = ["id", "created_at"] + [f for f in (fields or REQUEST_FIELDS) if f not in ("id", "created_at")]
+
+    where, values = request_filters(**filters)
+    if cursor:
+        created_at, request_id = decode_cursor(cursor)
+        where.append("(created_at, id) < (?, ?)")
+        values.extend([created_at, request_id])
+
+    sql = f"SELECT {', '.join(columns)} FROM requests"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    values.append(limit + 1)
+
+    rows = conn.execute(sql, values).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    return [dict(row) for row in rows], next_cursor
+
+
+def iter_requests(conn, batch_size: int = 500, **filters):
+    """
+    필터에 맞는 요청을 오래된 순서로 batch_size개씩 내보내는 제너레이터
+
+    fetchall() 대신 커서에서 fetchmany()로 읽으므로 테이블 크기와
+    관계없이 메모리 사용량이 일정합니다.
+    """
+    where, values = request_filters(**filters)
+    sql = f"SELECT {', '.join(REQUEST_FIELDS)} FROM requests"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at, id"
+
+    cursor = conn.execute(sql, values)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def search_requests(conn, terms: list, limit: int = 50, cursor: Optional[str] = None, **filters) -> tuple:
+    """
+    검색어 단어(search.parse_query)가 모두 들어 있는 요청 한 페이지 조회
+
+    세 글자 이상 단어가 있으면 requests_fts(trigram)로 찾아 bm25 순위(관련도 높은 순, score 오름차순),
+    모두 짧으면 LIKE로 최신순 정렬합니다. 짧은 단어는 두 경우 모두 LIKE로 추가로 거릅니다.
+
+    bm25는 일치하는 행마다 계산되므로 흔한 단어(수십만 건 일치)도 응답 시간이 일정하도록
+    필터까지 적용해 일치하는 최근 RANK_WINDOW건 안에서만 순위를 매깁니다 (그보다 오래된 요청은
+    더 구체적인 검색어나 기간 필터로 찾음). 이 경계는 첫 페이지에서 정해 커서에 함께 담습니다.
+
+    커서는 순위 모드에서는 (score, id), 최신순 모드에서는 list_requests와 같은 (created_at, id)
+    키셋이라 페이지가 깊어져도 비용이 같습니다 (bm25는 다른 요청이 추가되면 조금씩 바뀌므로
+    그 사이 새로 들어온 요청 때문에 페이지 경계가 약간 어긋날 수 있음).
+
+    Returns:
+        (행 목록 - REQUEST_FIELDS와 score(순위 모드가 아니면 None), 다음 페이지 커서 또는 None)
+    """
+    from search import BM25_WEIGHTS, RANK_WINDOW, like_terms, match_expression
+
+    match = match_expression(terms)
+    where, values = request_filters(**filters)
+    for pattern in like_terms(terms):
+        where.append("(r.description LIKE ? ESCAPE '\\' OR r.location LIKE ? ESCAPE '\\')")
+        values.extend([pattern, pattern])
+
+    columns = ", ".join(f"r.{field}" for field in REQUEST_FIELDS)
+    if match:
+        source = "FROM requests_fts JOIN requests r ON r.id = requests_fts.rowid WHERE " + " AND ".join(
+            ["requests_fts MATCH ?"] + where)
+        values.insert(0, match)
+        if cursor:
+            position, request_id = decode_cursor(cursor)
+            try:
+                position, floor = position.split("/")
+                position, floor = float(position), int(floor)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+        else:
+            # 순위를 매길 가장 오래된 id (FTS5가 rowid 역순으로 바로 읽으므로 bm25 계산 없이 빠름)
+            row = conn.execute(
+                f"SELECT requests_fts.rowid {source} ORDER BY requests_fts.rowid DESC LIMIT 1 OFFSET ?",
+                values + [RANK_WINDOW - 1]
+            ).fetchone()
+            floor = row[0] if row else 0
+
+        score = f"bm25(requests_fts, {', '.join(map(str, BM25_WEIGHTS))})"
+        sql = f"SELECT {columns}, {score} AS score {source} AND requests_fts.rowid >= ?"
+        values.append(floor)
+        if cursor:
+            sql += f" AND ({score}, r.id) > (?, ?)"
+            values.extend([position, request_id])
+        sql += " ORDER BY score, r.id LIMIT ?"
+    else:
+        if cursor:
+            created_at, request_id = decode_cursor(cursor)
+            where.append("(r.created_at, r.id) < (?, ?)")
+            values.extend([created_at, request_id])
+        sql = f"SELECT {columns}, NULL AS score FROM requests r"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.created_at DESC, r.id DESC LIMIT ?"
+    values.append(limit + 1)
+
+    rows = [dict(row) for row in conn.execute(sql, values).fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        position = f"{last['score']!r}/{floor}" if match else last["created_at"]
+        next_cursor = encode_cursor(position, last["id"])
+
+    return rows, next_cursor
+
+
+def list_duplicate_candidates(conn, location_key: str, window_hours: float, limit: int) -> list:
+    """같은 위치에서 최근 window_hours 안에 접수된 열린 요청과 서명 (중복 감지 후보, 최신순)"""
+    return conn.execute("""
+        SELECT r.id, r.description, r.category, r.priority, r.status, r.duplicate_of, s.minhash
+        FROM request_signatures s JOIN requests r ON r.id = s.request_id
+        WHERE s.location_key = ? AND s.created_at >= datetime('now', ?) AND r.status != 'completed'
+        ORDER BY s.created_at DESC LIMIT ?
+    """, (location_key, f"-{window_hours} hours", limit)).fetchall()
+
+
+def list_duplicate_clusters(conn, limit: int = 50, open_only: bool = False) -> list:
+    """
+    중복으로 연결된 요청이 있는 원본 요청과 그 중복 요청 ID 목록 (가장 최근 중복 신고 순)
+
+    Returns:
+        원본 요청 행 + duplicate_count, duplicate_ids, last_reported_at
+    """
+    rows = conn.execute(f"""
+        SELECT {', '.join(f"o.{field}" for field in REQUEST_FIELDS)},
+               COUNT(d.id) AS duplicate_count, GROUP_CONCAT(d.id) AS duplicate_ids,
+               MAX(d.created_at) AS last_reported_at
+        FROM requests d JOIN requests o ON o.id = d.duplicate_of
+        {"WHERE o.status != 'completed'" if open_only else ""}
+        GROUP BY d.duplicate_of
+        ORDER BY last_reported_at DESC, o.id DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+    clusters = []
+    for row in rows:
+        cluster = dict(row)
+        cluster["duplicate_ids"] = sorted(int(i) for i in cluster["duplicate_ids"].split(","))
+        clusters.append(cluster)
+    return clusters
+
+
+def update_request(conn, request_id: int, fields: dict) -> Optional[dict]:
+    """fields의 값이 있는 컬럼만 갱신하고 갱신된 행을 반환 (없으면 None)"""
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id FROM requests WHERE id = ?", (request_id,))
+    if not cursor.fetchone():
+        return None
+
+    updates = []
+    values = []
+    for column in ("status", "category", "priority"):
+        if fields.get(column):
+            updates.append(f"{column} = ?")
+            values.append(fields[column])
+    # 관리자가 직접 고친 분류는 로컬 분류기 학습 라벨로 사용
+    if fields.get("category") or fields.get("priority"):
+        updates.append("category_source = 'manual'")
+
+    if updates:
+        updates.append("updated_at = CURRENT_TIMESTAMP")
+        values.append(request_id)
+        cursor.execute(
+            f"UPDATE requests SET {', '.join(updates)} WHERE id = ?",
+            values
+        )
+        conn.commit()
+
+    cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
+    return _row_to_dict(cursor.fetchone())
+
+
+# AI 분류를 기다리는 요청 (비동기 접수 시 임시 카테고리 'processing')
+PENDING_CATEGORY = "processing"
+
+
+def count_pending_categorizations(conn, now: float) -> int:
+    """categorize_batch가 가져갈 수 있는 대기 요청 수 (일괄 접수 요청과 다른 작업이 가져간 요청 제외)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(*) FROM requests
+        WHERE category = ? AND bulk = 0 AND IFNULL(claimed_until, 0) <= ?
+    """, (PENDING_CATEGORY, now))
+    return cursor.fetchone()[0]
+
+
+def claim_pending_categorizations(conn, limit: int, now: float, lease: float,
+                                  request_ids: Optional[list] = None) -> list:
+    """
+    분류 대기 요청을 최대 limit개 가져오고 lease초 동안 다른 작업이 가져가지 못하게 함
+
+    request_ids가 없으면 단건 접수 요청만 (categorize_batch), 있으면 그중 대기 요청 (categorize_requests).
+    UPDATE ... RETURNING 한 문장으로 가져가므로 두 작업이 같은 요청을 중복 분류하지 않고,
+    작업이 도중에 죽으면 lease가 끝난 뒤 다시 가져갈 수 있습니다.
+    """
+    if request_ids is None:
+        scope, params = "bulk = 0", []
+    elif request_ids:
+        scope, params = f"id IN ({', '.join('?' * len(request_ids))})", list(request_ids)
+    else:
+        return []
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        UPDATE requests
+        SET claimed_until = ?
+        WHERE id IN (
+            SELECT id FROM requests
+            WHERE category = ? AND IFNULL(claimed_until, 0) <= ? AND {scope}
+            ORDER BY id
+            LIMIT ?
+        )
+        RETURNING id, description
+    """, [now + lease, PENDING_CATEGORY, now, *params, limit])
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.commit()
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def release_categorization_claims(conn, request_ids: list):
+    """분류에 실패한 요청을 재시도한 작업이 바로 다시 가져갈 수 있게 함"""
+    conn.executemany("UPDATE requests SET claimed_until = NULL WHERE id = ?",
+                     [(request_id,) for request_id in request_ids])
+    conn.commit()
+
+
+def save_categorizations(conn, results: dict) -> list:
+    """분류 결과 {id: {"category", "priority", "source"}}를 한 트랜잭션으로 저장하고 갱신된 행 반환"""
+    if not results:
+        return []
+    cursor = conn.cursor()
+    cursor.executemany("""
+        UPDATE requests
+        SET category = ?, priority = ?, category_source = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, [
+        (result.get("category", "other"), result.get("priority", "medium"), result.get("source"), request_id)
+        for request_id, result in results.items()
+    ])
+    conn.commit()
+
+    ids = list(results)
+    placeholders = ", ".join("?" * len(ids))
+    cursor.execute(f"SELECT * FROM requests WHERE id IN ({placeholders}) ORDER BY id", ids)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+# ---------- task outbox ----------
+
+def claim_outbox(conn, limit: int, now: float, lease: float) -> list:
+    """
+    발행할 차례가 된 작업을 최대 limit개 가져오고 lease초 동안 다른 릴레이가 가져가지 못하게 함
+
+    릴레이가 발행 도중 죽으면 lease가 끝난 뒤 다시 발행됩니다 (최소 한 번 전달).
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE task_outbox
+        SET available_at = ?, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM task_outbox
+            WHERE available_at <= ?
+            ORDER BY available_at, id
+            LIMIT ?
+        )
+        RETURNING id, task_id, task_name, args, attempts, priority
+    """, (now + lease, now, limit))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.commit()
+    for row in rows:
+        row["args"] = json.loads(row["args"])
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def delete_outbox(conn, ids: list):
+    """발행을 마친 작업 삭제"""
+    if not ids:
+        return
+    conn.executemany("DELETE FROM task_outbox WHERE id = ?", [(outbox_id,) for outbox_id in ids])
+    conn.commit()
+
+
+def reschedule_outbox(conn, retries: list):
+    """발행에 실패한 작업 [(id, 다시 시도할 시각, 오류)]의 다음 시도 시각 기록"""
+    if not retries:
+        return
+    conn.executemany("""
+        UPDATE task_outbox SET available_at = ?, last_error = ? WHERE id = ?
+    """, [(available_at, error, outbox_id) for outbox_id, available_at, error in retries])
+    conn.commit()
+
+
+def count_outbox(conn) -> int:
+    return conn.execute("SELECT COUNT(*) FROM task_outbox").fetchone()[0]
+
+
+def set_image_url(conn, request_id: int, image_url: str):
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE requests
+        SET image_url = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, (image_url, request_id))
+    conn.commit()
+
+
+# ---------- attachments ----------
+
+def find_thumbnail_key(conn, sha256: str) -> Optional[str]:
+    """같은 내용의 첨부에 이미 만들어 둔 썸네일 키"""
+    row = conn.execute("""
+        SELECT thumbnail_key FROM attachments
+        WHERE sha256 = ? AND thumbnail_key IS NOT NULL
+        LIMIT 1
+    """, (sha256,)).fetchone()
+    return row[0] if row else None
+
+
+def add_attachment(conn, request_id: int, attachment: dict, image_url: str, thumbnail_url: Optional[str],
+                   task_name: Optional[str] = None, task_id: Optional[str] = None,
+                   max_attachments: Optional[int] = None) -> Optional[tuple]:
+    """
+    첨부 행 추가 + 요청의 대표 이미지(image_url/thumbnail_url) 갱신 + 썸네일 작업 기록을 한 트랜잭션으로
+
+    attachment: storage_key, sha256, content_type, size, filename, thumbnail_key
+    같은 요청에 같은 내용이 이미 첨부되어 있으면 기존 첨부 행을 반환합니다.
+    task_name이 있으면 썸네일 작업(인자: 요청 ID, 저장 키)을 task_outbox에 기록합니다.
+    max_attachments: 요청의 첨부가 이미 이만큼이면 새 내용은 추가하지 않음 (동시 업로드도 같은 트랜잭션에서 검사)
+
+    Returns:
+        (요청 행, 첨부 행), 요청이 없으면 None, 첨부 수 제한에 걸리면 (요청 행, None)
+    """
+    cursor = conn.cursor()
+    if max_attachments is not None:
+        # 쓰기 잠금을 먼저 잡아 동시 업로드가 같은 개수를 보고 함께 제한을 넘지 않도록
+        conn.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            SELECT COUNT(*) AS count, IFNULL(MAX(sha256 = ?), 0) AS attached
+            FROM attachments WHERE request_id = ?
+        """, (attachment["sha256"], request_id))
+        existing = cursor.fetchone()
+        if not existing["attached"] and existing["count"] >= max_attachments:
+            row = get_request(conn, request_id)
+            conn.rollback()
+            return (row, None) if row else None
+    cursor.execute("""
+        UPDATE requests
+        SET image_url = ?, thumbnail_url = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        RETURNING *
+    """, (image_url, thumbnail_url, request_id))
+    row = _row_to_dict(cursor.fetchone())
+    if row is None:
+        conn.rollback()
+        return None
+    cursor.execute("""
+        INSERT INTO attachments (request_id, storage_key, sha256, content_type, size, filename, thumbnail_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (request_id, sha256) DO UPDATE SET filename = IFNULL(attachments.filename, excluded.filename)
+        RETURNING *
+    """, (request_id, attachment["storage_key"], attachment["sha256"], attachment["content_type"],
+          attachment["size"], attachment.get("filename"), attachment.get("thumbnail_key")))
+    saved = _row_to_dict(cursor.fetchone())
+    if task_name:
+        cursor.execute("""
+            INSERT INTO task_outbox (task_id, task_name, args)
+            VALUES (?, ?, ?)
+        """, (task_id, task_name, json.dumps([request_id, attachment["storage_key"]])))
+    conn.commit()
+    return row, saved
+
+
+def count_attachments(conn, request_id: int) -> int:
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM attachments WHERE request_id = ?", (request_id,))
+    return cursor.fetchone()[0]
+
+
+def list_attachments(conn, request_id: int) -> list:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM attachments WHERE request_id = ? ORDER BY id", (request_id,))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def set_thumbnail(conn, storage_key: str, thumbnail_key: str, image_url: str, thumbnail_url: str) -> list:
+    """
+    같은 내용(storage_key)의 모든 첨부에 썸네일을 기록하고, 그 이미지를 대표 이미지로 쓰는 요청의
+    thumbnail_url 갱신 (갱신된 요청 행 반환)
+    """
+    cursor = conn.cursor()
+    cursor.execute("UPDATE attachments SET thumbnail_key = ? WHERE storage_key = ?", (thumbnail_key, storage_key))
+    cursor.execute("""
+        UPDATE requests
+        SET thumbnail_url = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT request_id FROM attachments WHERE storage_key = ?)
+          AND image_url = ? AND thumbnail_url IS NOT ?
+        RETURNING *
+    """, (thumbnail_url, storage_key, image_url, thumbnail_url))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.commit()
+    return rows
+
+
+def delete_request(conn, request_id: int) -> int:
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM requests WHERE id = ?", (request_id,))
+    conn.commit()
+    return cursor.rowcount
+
+
+def get_stats(conn) -> dict:
+    """
+    트리거로 증분 갱신되는 request_stats에서 통계 조회
+
+    요청 수와 무관하게 값 종류 수만큼의 행만 읽습니다.
+    """
+    result = {
+        "total": 0,
+        "by_status": {},
+        "by_category": {},
+        "by_priority": {}
+    }
+    for row in conn.execute("SELECT dimension, value, count FROM request_stats WHERE count > 0"):
+        if row["dimension"] == "total":
+            result["total"] = row["count"]
+        else:
+            result[f"by_{row['dimension']}"][row["value"] or None] = row["count"]
+    return result
+
+
+# 시계열 버킷별 기간 시작일 계산식 (week: 월요일 시작)
+STATS_BUCKETS = {
+    "day": "day",
+    "week": "date(day, '-6 days', 'weekday 1')",
+}
+
+
+def get_stats_series(conn, bucket: str = "day", date_from: Optional[str] = None,
+                     date_to: Optional[str] = None) -> list:
+    """request_stats_daily에서 일/주 단위 카테고리·우선순위별 건수 시계열 조회"""
+    where = ["count > 0"]
+    values = []
+    if date_from:
+        where.append("day >= ?")
+        values.append(date_from)
+    if date_to:
+        where.append("day < ?")
+        values.append(date_to)
+
+    rows = conn.execute(f"""
+        SELECT {STATS_BUCKETS[bucket]} AS period, category, priority, SUM(count) AS count
+        FROM request_stats_daily
+        WHERE {' AND '.join(where)}
+        GROUP BY 1, 2, 3
+        ORDER BY 1
+    """, values).fetchall()
+
+    series = {}
+    for row in rows:
+        point = series.setdefault(row["period"], {
+            "period": row["period"], "total": 0, "by_category": {}, "by_priority": {}
+        })
+        category = row["category"] or None
+        priority = row["priority"] or None
+        point["total"] += row["count"]
+        point["by_category"][category] = point["by_category"].get(category, 0) + row["count"]
+        point["by_priority"][priority] = point["by_priority"].get(priority, 0) + row["count"]
+    return list(series.values())
+
+
+# ---------- users ----------
+
+def get_user_by_email(conn, email: str) -> Optional[dict]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+    return _row_to_dict(cursor.fetchone())
+
+
+def get_user_by_id(conn, user_id: int) -> Optional[dict]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return _row_to_dict(cursor.fetchone())
+
+
+def create_user(conn, email: str, hashed_password: str, full_name: Optional[str]) -> dict:
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO users (email, hashed_password, full_name)
+        VALUES (?, ?, ?)
+    """, (email, hashed_password, full_name))
+    conn.commit()
+
+    cursor.execute("SELECT * FROM users WHERE id = ?", (cursor.lastrowid,))
+    return _row_to_dict(cursor.fetchone())
+
+
+def list_users(conn) -> list:
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, email, full_name, role, created_at FROM users ORDER BY created_at DESC")
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def update_user_role(conn, user_id: int, role: str):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET role = ? WHERE id = ?", (role, user_id))
+    conn.commit()
@@ -0,0 +1,235 @@
+"""
+공유 SQLite 연결 계층
+
+main.py, auth.py, tasks.py가 함께 사용하는 연결 풀입니다.
+요청마다 sqlite3.connect()를 새로 호출하지 않고 미리 설정된 연결을 재사용합니다.
+
+- WAL 저널 모드: 읽기와 쓰기가 서로를 막지 않음
+- synchronous/cache_size/mmap_size 튜닝
+- 연결 재사용으로 prepared statement 캐시(cached_statements) 유지
+- 풀 메트릭: checkout 횟수, 대기 횟수, 대기 시간
+- run_db(): async 핸들러에서 DB 작업을 전용 스레드 풀로 넘겨 이벤트 루프를 막지 않음
+
+환경변수:
+    DATABASE_URL      sqlite:///./maintenance.db (기본값)
+    DB_POOL_SIZE      최대 연결 수 (기본값: 5)
+    DB_POOL_TIMEOUT   연결 대기 제한 시간, 초 (기본값: 30)
+    DB_THREADS        run_db() 전용 스레드 수 (기본값: DB_POOL_SIZE)
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 연결마다 적용하는 PRAGMA
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",     # WAL에서는 NORMAL로도 손상 없이 안전
+    "cache_size": -20000,        # 음수 = KiB 단위 (약 20MB)
+    "mmap_size": 268435456,      # 256MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # ms
+}
+
+# 연결당 prepared statement 캐시 크기 (sqlite3 기본값 128)
+CACHED_STATEMENTS = 256
+
+
+class PoolTimeout(Exception):
+    """풀에서 제한 시간 내에 연결을 얻지 못함"""
+
+
+def database_path_from_url(url: str) -> str:
+    """DATABASE_URL에서 SQLite 파일 경로 추출 (SQLite가 아니면 기본 파일 사용)"""
+    if url.startswith("sqlite:///"):
+        return url[len("sqlite:///"):] or "maintenance.db"
+    return "maintenance.db"
+
+
+class ConnectionPool:
+    """크기가 제한된 스레드 안전 SQLite 연결 풀"""
+
+    def __init__(self, path: str, size: int = 5, timeout: float = 30.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        # LIFO: 최근에 쓴(캐시가 따뜻한) 연결을 먼저 재사용
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+        # 메트릭
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,  # 풀이 한 번에 한 스레드에만 빌려줌
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self.checkouts += 1
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # 여유가 있으면 새 연결 생성
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # 풀이 가득 참: 반환될 때까지 대기
+        start = time.perf_counter()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.timeout}s")
+        finally:
+            with self._lock:
+                self.waits += 1
+                self.wait_time += time.perf_counter() - start
+
+    def release(self, conn: sqlite3.Connection):
+        # 커밋되지 않은 트랜잭션이 다음 사용자에게 새지 않도록 정리
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """유휴 연결을 모두 닫음"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "size": self.size,
+                "open_connections": self._created,
+                "idle_connections": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_seconds": round(self.wait_time, 6),
+                "timeouts": self.timeouts,
+            }
+
+
+def open_connection(path: str = None) -> sqlite3.Connection:
+    """
+    풀 밖의 전용 연결 (긴 내보내기 등 오래 붙잡는 작업용)
+
+    호출한 쪽에서 close() 해야 합니다.
+    """
+    return ConnectionPool(path or pool.path)._connect()
+
+
+pool = ConnectionPool(
+    database_path_from_url(os.getenv("DATABASE_URL", "sqlite:///./maintenance.db")),
+    size=int(os.getenv("DB_POOL_SIZE", "5")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+)
+
+
+def configure(path: str, size: int = None, timeout: float = None):
+    """다른 DB 파일로 풀 교체 (테스트, CLI 스크립트용)"""
+    global pool
+    old = pool
+    pool = ConnectionPool(
+        path,
+        size=size if size is not None else old.size,
+        timeout=timeout if timeout is not None else old.timeout,
+    )
+    old.close()
+    return pool
+
+
+# run_db() 전용 스레드 풀 (기본 executor와 분리해 DB 대기가 다른 작업을 굶기지 않도록)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_THREADS", os.getenv("DB_POOL_SIZE", "5"))),
+    thread_name_prefix="db",
+)
+
+
+def _reset_after_fork():
+    # Celery prefork 등으로 fork된 자식은 부모의 SQLite 연결과 스레드를 공유하면 안 됨
+    global pool, _executor
+    pool = ConnectionPool(pool.path, size=pool.size, timeout=pool.timeout)
+    _executor = ThreadPoolExecutor(max_workers=_executor._max_workers, thread_name_prefix="db")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# 데이터베이스 연결 컨텍스트 매니저
+@contextmanager
+def get_db():
+    with pool.connection() as conn:
+        yield conn
+
+
+def _call_with_connection(fn, args, kwargs):
+    with get_db() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    fn(conn, *args, **kwargs)를 DB 스레드에서 실행하고 결과를 반환
+
+    async 핸들러에서 동기 sqlite3 호출이 이벤트 루프(다른 요청, WebSocket)를
+    막지 않도록 합니다.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(_call_with_connection, fn, args, kwargs)
+    )
+
+
+def pool_stats() -> dict:
+    return pool.stats()
@@ -0,0 +1,184 @@
+"""
+접수 시 중복 요청 감지 (MinHash)
+
+같은 누수/정전을 여러 세대가 따로 신고하면 요청마다 LLM 분류 비용이 들고 관리자 작업도 늘어납니다.
+submit_request는 새 요청을 저장하기 전에 같은 위치의 최근 열린 요청(완료되지 않은 요청)과
+설명을 비교하고, 비슷하면 새 요청을 기존 요청에 연결(duplicate_of)한 뒤 분류를 그대로 가져와
+LLM을 호출하지 않습니다.
+
+- 서명: 정규화한 설명(categorization_cache.normalize_description)의 단어 안 2글자 조각 집합에 대한
+  MinHash (NUM_PERM개 최솟값, request_signatures.minhash). 한국어는 어미가 달라도("나갔어요"/"나갔습니다")
+  어간 조각이 겹치므로 3글자보다 2글자 조각이 중복을 더 잘 잡음
+- 유사도: 두 서명에서 같은 자리 값이 같은 비율 (조각 집합 Jaccard 유사도의 추정값)
+- 대상 확인: 짧은 설명은 어미("…가 막혔어요", "…이 안 돼요")만으로도 유사도가 기준을 넘으므로
+  ("변기가 막혔어요"/"세면대가 막혔어요" 0.52, "문이 안 닫혀요"/"창문이 안 닫혀요" 0.83)
+  설명에서 찾은 시설 키워드(keywords.CATEGORY_KEYWORDS) 중 한쪽이 다른 쪽을 모두 포함할 때만 중복
+- 후보: location_key(공백/문장부호를 뺀 위치)가 같고 DUPLICATE_WINDOW_HOURS 안에 접수된 열린 요청
+  (request_signatures의 (location_key, created_at) 인덱스, 최근 DUPLICATE_MAX_CANDIDATES건).
+  위치가 없는 요청은 비교하지도 서명을 저장하지도 않음
+- 연결 대상은 원본 요청 (비슷한 요청이 이미 다른 요청의 중복이면 그 원본)
+
+일괄 접수(/api/requests/bulk)는 대상이 아닙니다.
+
+환경변수:
+    DUPLICATE_DETECTION       0이면 사용 안 함 (기본값: 1)
+    DUPLICATE_THRESHOLD       이 유사도 이상이면 중복 (기본값: 0.3)
+    DUPLICATE_WINDOW_HOURS    비교할 요청의 접수 기간, 시간 (기본값: 72)
+    DUPLICATE_MAX_CANDIDATES  비교할 최대 요청 수 (기본값: 200)
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+import crud
+from categorization_cache import normalize_description
+from keywords import matcher
+
+load_dotenv()
+
+NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def _permutations(count: int) -> list:
+    """(a, b) 쌍 - h → (a*h + b) mod p (고정 시드라 프로세스/재시작과 무관하게 같은 서명)"""
+    params = []
+    for index in range(count):
+        digest = hashlib.blake2b(f"minhash-{index}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _PRIME
+        params.append((a, b))
+    return params
+
+
+PERMUTATIONS = _permutations(NUM_PERM)
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+
+
+def location_key(location: Optional[str]) -> Optional[str]:
+    """비교용 위치 ("101동 302호", "101동302호." → "101동302호"), 없으면 None"""
+    if not location:
+        return None
+    key = normalize_description(location).replace(" ", "")
+    return key[:100] or None
+
+
+def shingles(description: str) -> set:
+    """단어 안의 2글자 조각 (한 글자 단어는 그대로)"""
+    result = set()
+    for word in normalize_description(description).split():
+        if len(word) == 1:
+            result.add(word)
+        result.update(word[i:i + 2] for i in range(len(word) - 1))
+    return result
+
+
+def signature(description: str) -> bytes:
+    """MinHash 서명 (NUM_PERM개의 32비트 값, 조각이 없으면 빈 bytes)"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles(description)]
+    if not hashes:
+        return b""
+    return _SIGNATURE.pack(*(min((a * h + b) % _PRIME for h in hashes) & _MASK for a, b in PERMUTATIONS))
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """두 서명의 Jaccard 유사도 추정값 (0~1)"""
+    if not first or not second or len(first) != len(second):
+        return 0.0
+    return sum(x == y for x, y in zip(_SIGNATURE.unpack(first), _SIGNATURE.unpack(second))) / NUM_PERM
+
+
+def subject_terms(description: str) -> set:
+    """설명에서 일치한 시설 키워드 (다른 키워드 안에 든 것은 제외: "창문이" → {"창문"}, "문" 제외)"""
+    terms = {term for words in matcher.match(description)["category_terms"].values() for term in words}
+    return {term for term in terms if not any(term != other and term in other for other in terms)}
+
+
+def same_subject(first: str, second: str) -> bool:
+    """두 설명이 같은 시설에 대한 것인지 (키워드 집합 한쪽이 다른 쪽을 포함, 키워드가 없으면 True)"""
+    first_terms, second_terms = subject_terms(first), subject_terms(second)
+    return first_terms <= second_terms or second_terms <= first_terms
+
+
+class DuplicateDetector:
+    def __init__(self, threshold: float = 0.3, window_hours: float = 72, max_candidates: int = 200,
+                 enabled: bool = True):
+        self.threshold = threshold
+        self.window_hours = window_hours
+        self.max_candidates = max_candidates
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.candidates = 0
+        self.matches = 0
+        self.subject_mismatches = 0
+
+    def check(self, conn, description: str, location: Optional[str]) -> dict:
+        """
+        새 요청의 서명과 가장 비슷한 열린 요청 (run_db로 호출)
+
+        Returns:
+            {"minhash", "location_key"}: 새 요청에 저장할 값
+            {"match"}: 기준 이상으로 비슷한 요청 행 (없으면 None) - duplicate_of는 원본 요청 ID
+            {"similarity"}: match와의 유사도
+        """
+        result = {"minhash": signature(description), "location_key": location_key(location),
+                  "match": None, "similarity": 0.0}
+        if not self.enabled or not result["location_key"] or not result["minhash"]:
+            return result
+
+        rows = crud.list_duplicate_candidates(conn, result["location_key"], self.window_hours,
+                                              self.max_candidates)
+        scored = [(similarity(result["minhash"], row["minhash"]), row) for row in rows]
+        # 기준을 넘은 후보 중 가장 비슷하면서 같은 시설에 대한 요청 (키워드 비교는 기준을 넘은 후보만)
+        best, best_score, mismatches = None, 0.0, 0
+        for score, row in sorted(scored, key=lambda item: item[0], reverse=True):
+            if score < self.threshold:
+                break
+            if same_subject(description, row["description"]):
+                best, best_score = row, score
+                break
+            mismatches += 1
+
+        with self._lock:
+            self.checks += 1
+            self.candidates += len(rows)
+            self.subject_mismatches += mismatches
+            if best is not None:
+                self.matches += 1
+        if best is not None:
+            best = {key: best[key] for key in best.keys() if key not in ("minhash", "description")}
+            best["duplicate_of"] = best["duplicate_of"] or best["id"]
+            result["match"], result["similarity"] = best, best_score
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "window_hours": self.window_hours,
+                "checks": self.checks,
+                "matches": self.matches,
+                "subject_mismatches": self.subject_mismatches,
+                "avg_candidates": round(self.candidates / self.checks, 1) if self.checks else 0.0,
+            }
+
+
+def create_duplicate_detector() -> DuplicateDetector:
+    return DuplicateDetector(
+        threshold=float(os.getenv("DUPLICATE_THRESHOLD", "0.3")),
+        window_hours=float(os.getenv("DUPLICATE_WINDOW_HOURS", "72")),
+        max_candidates=int(os.getenv("DUPLICATE_MAX_CANDIDATES", "200")),
+        enabled=os.getenv("DUPLICATE_DETECTION", "1") != "0",
+    )
+
+
+duplicate_detector = create_duplicate_detector()
@@ -0,0 +1,174 @@
+"""
+WebSocket 이벤트 브로드캐스트 버스
+
+ConnectionManager의 소켓 목록은 프로세스마다 따로 있으므로, 이벤트를 직접 보내지 않고
+버스에 발행하면 모든 uvicorn 워커(및 컨테이너)가 구독해서 각자의 클라이언트에게 전달합니다.
+Celery 작업처럼 이벤트 루프가 없는 곳에서는 publish_sync()를 사용합니다.
+
+- RedisEventBus: Redis pub/sub (운영, 다중 워커)
+- InMemoryEventBus: 같은 프로세스 안에서만 전달 (테스트, Redis 없는 개발 환경)
+
+환경변수:
+    EVENT_BUS        redis 또는 memory (기본값: REDIS_URL이 설정되어 있으면 redis)
+    REDIS_URL        Redis 주소 (Celery와 공유)
+    EVENT_CHANNEL    pub/sub 채널 이름 (기본값: maintenance:events)
+"""
+
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "maintenance:events")
+
+
+def encode_event(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class InMemoryEventBus:
+    """단일 프로세스 이벤트 버스"""
+
+    def __init__(self):
+        self._handlers = []
+        self._loop = None
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self, handler):
+        self._handlers.append(handler)
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self._handlers.clear()
+        self._loop = None
+
+    async def publish(self, event: dict):
+        self.published += 1
+        for handler in list(self._handlers):
+            await handler(event)
+            self.delivered += 1
+
+    def publish_sync(self, event: dict):
+        """다른 스레드에서 발행 (같은 프로세스의 이벤트 루프가 실행 중일 때만 전달됨)"""
+        if self._loop is None or self._loop.is_closed():
+            self.published += 1
+            return
+        asyncio.run_coroutine_threadsafe(self.publish(event), self._loop).result(timeout=5)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+class RedisEventBus:
+    """Redis pub/sub 이벤트 버스 (워커/프로세스 간 전달)"""
+
+    def __init__(self, url: str, channel: str = EVENT_CHANNEL):
+        import redis
+        import redis.asyncio
+
+        self.url = url
+        self.channel = channel
+        self._redis = redis.asyncio.from_url(url)
+        self._sync_redis = redis.Redis.from_url(url)
+        self._handler = None
+        self._task = None
+
+        # 메트릭
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+        self.reconnects = 0
+
+    async def start(self, handler):
+        self._handler = handler
+        self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        backoff = 0.5
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except ValueError:
+                        continue
+                    self.received += 1
+                    try:
+                        await self._handler(event)
+                    except Exception as e:
+                        print(f"[EVENTS] Handler error: {type(e).__name__}: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.reconnects += 1
+                print(f"[EVENTS] Redis subscriber error: {type(e).__name__}: {str(e)}, retrying in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._redis.aclose()
+
+    async def publish(self, event: dict):
+        try:
+            await self._redis.publish(self.channel, encode_event(event))
+            self.published += 1
+        except Exception as e:
+            # Redis 장애 시 최소한 이 워커의 클라이언트에게는 전달
+            self.publish_errors += 1
+            print(f"[EVENTS] Redis publish failed: {type(e).__name__}: {str(e)}, delivering locally")
+            if self._handler:
+                await self._handler(event)
+
+    def publish_sync(self, event: dict):
+        """Celery 작업 등 동기 코드에서 발행"""
+        try:
+            self._sync_redis.publish(self.channel, encode_event(event))
+            self.published += 1
+        except Exception as e:
+            self.publish_errors += 1
+            print(f"[EVENTS] Redis publish failed: {type(e).__name__}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "channel": self.channel,
+            "subscribed": self._task is not None and not self._task.done(),
+            "published": self.published,
+            "received": self.received,
+            "publish_errors": self.publish_errors,
+            "reconnects": self.reconnects,
+        }
+
+
+def create_event_bus():
+    backend = os.getenv("EVENT_BUS") or ("redis" if os.getenv("REDIS_URL") else "memory")
+    if backend == "redis":
+        return RedisEventBus(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return InMemoryEventBus()
+
+
+event_bus = create_event_bus()
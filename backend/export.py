@@ -0,0 +1,73 @@
+"""
+요청 이력 스트리밍 내보내기 (NDJSON / CSV)
+
+전용 DB 연결의 커서에서 행을 조금씩 읽어 바로 인코딩해 내보내므로
+전체 목록을 메모리에 올리지 않습니다. gzip 옵션은 zlib 스트리밍 압축을 사용합니다.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+import crud
+from database import open_connection
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 한 번에 커서에서 읽어 인코딩하는 행 수
+EXPORT_BATCH_SIZE = 500
+
+
+def _encode_ndjson(batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(row), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+def _encode_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+    buffer.write("\ufeff")
+    writer.writerow(crud.REQUEST_FIELDS)
+    for rows in batches:
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip 헤더
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_requests(format: str, gzip: bool = False, **filters):
+    """
+    요청 이력을 format(ndjson/csv)으로 인코딩한 바이트 청크 제너레이터
+
+    StreamingResponse가 동기 제너레이터를 스레드에서 소비하므로
+    DB 읽기와 인코딩 모두 이벤트 루프 밖에서 실행됩니다.
+    """
+    conn = open_connection()
+    try:
+        batches = crud.iter_requests(conn, batch_size=EXPORT_BATCH_SIZE, **filters)
+        chunks = _encode_ndjson(batches) if format == "ndjson" else _encode_csv(batches)
+        if gzip:
+            chunks = _gzip(chunks)
+        yield from chunks
+    finally:
+        conn.close()
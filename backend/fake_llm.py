@@ -0,0 +1,128 @@
+"""
+로컬 가짜 LLM 서버 (OpenAI 호환 /chat/completions)
+
+실제 Groq API 없이 분류 경로를 테스트/벤치마크하기 위한 서버입니다.
+설명에 포함된 단어로 카테고리를 정하고(배치 프롬프트 포함), 지연 시간과 실패를 흉내낼 수 있습니다.
+
+사용법:
+    uvicorn fake_llm:app --port 9000
+    GROQ_BASE_URL=http://localhost:9000 GROQ_API_KEY=fake uvicorn main:app
+
+    # 테스트에서는 네트워크 없이 직접 연결
+    AsyncLLMClient(transport=httpx.ASGITransport(app=fake_llm.app), base_url="http://fake")
+    LLMClient(transport=fake_llm.mock_transport(), base_url="http://fake")
+
+환경변수:
+    FAKE_LLM_LATENCY   호출당 응답 지연, 초 (기본값: 0)
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from llm import BATCH_SYSTEM_PROMPT
+
+app = FastAPI(title="Fake LLM")
+
+RULES = [
+    ("electrical", ["전기", "전등", "콘센트", "정전"]),
+    ("plumbing", ["물", "배관", "변기", "누수", "싱크대"]),
+    ("hvac", ["에어컨", "난방", "보일러"]),
+    ("structural", ["벽", "천장", "창문", "균열"]),
+]
+
+
+def classify(text: str) -> dict:
+    category = next((name for name, words in RULES if any(w in text for w in words)), "other")
+    priority = "high" if any(w in text for w in ["긴급", "누수", "정전"]) else "medium"
+    return {"category": category, "priority": priority}
+
+
+def reset():
+    """테스트 간 상태 초기화"""
+    app.state.latency = 0.0
+    app.state.latency_per_item = 0.0
+    app.state.fail = False
+    app.state.retry_after = 1
+    app.state.malformed_batch = False
+    app.state.calls = 0
+    app.state.prompt_chars = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+
+def _latency(body: dict) -> float:
+    return app.state.latency + app.state.latency_per_item * len(_batch_items(body) or [None])
+
+
+def _batch_items(body: dict):
+    if body["messages"][0]["content"] != BATCH_SYSTEM_PROMPT:
+        return None
+    return json.loads(body["messages"][-1]["content"])
+
+
+def completion(body: dict):
+    """(상태 코드, 응답 JSON, 헤더) 생성"""
+    app.state.calls += 1
+    app.state.prompt_chars += sum(len(message["content"]) for message in body["messages"])
+    if app.state.fail:
+        return 429, {"error": {"message": "rate limit exceeded"}}, {"retry-after": str(app.state.retry_after)}
+
+    items = _batch_items(body)
+    if items is None:
+        content = json.dumps(classify(body["messages"][-1]["content"]), ensure_ascii=False)
+    elif app.state.malformed_batch:
+        content = '{"results": [{"id": '
+    else:
+        content = json.dumps({
+            "results": [{"id": item["id"], **classify(item["description"])} for item in items]
+        }, ensure_ascii=False)
+
+    return 200, {
+        "id": f"fake-{app.state.calls}",
+        "object": "chat.completion",
+        "model": body.get("model"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_chars": app.state.prompt_chars, "completion_chars": len(content)},
+    }, {}
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.in_flight += 1
+    app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+    try:
+        latency = _latency(body)
+        if latency:
+            await asyncio.sleep(latency)
+        status_code, content, headers = completion(body)
+        return JSONResponse(status_code=status_code, content=content, headers=headers)
+    finally:
+        app.state.in_flight -= 1
+
+
+def mock_transport() -> httpx.MockTransport:
+    """동기 LLMClient(Celery 워커)용 전송 계층 - 같은 상태와 응답을 사용"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        latency = _latency(body)
+        if latency:
+            time.sleep(latency)
+        status_code, content, headers = completion(body)
+        return httpx.Response(status_code, json=content, headers=headers)
+
+    return httpx.MockTransport(handler)
+
+
+reset()
+app.state.latency = float(os.getenv("FAKE_LLM_LATENCY", "0"))
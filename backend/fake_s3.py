@@ -0,0 +1,122 @@
+"""
+파일 시스템 기반 가짜 S3 클라이언트
+
+실제 버킷 없이 업로드/썸네일 경로를 테스트하기 위한 boto3 S3 클라이언트 대역입니다.
+storage.S3Storage와 uploads.S3MultipartWriter가 쓰는 메서드만 같은 인자/응답 형식으로 구현하며,
+S3처럼 마지막이 아닌 파트가 min_part_size보다 작으면 complete_multipart_upload가 실패합니다.
+
+사용법:
+    s3 = FakeS3(tmp_path)
+    storage = S3Storage(s3, "bucket")
+    monkeypatch.setattr(main, "storage", storage)
+    monkeypatch.setattr(tasks, "storage", storage)
+"""
+
+import hashlib
+import io
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class FakeS3:
+    def __init__(self, root, min_part_size: int = 5 * 1024 * 1024):
+        self.root = Path(root)
+        self.min_part_size = min_part_size
+        self.content_types = {}
+        self.uploads = {}
+        self.calls = Counter()
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _store(self, bucket: str, key: str, body: bytes, content_type):
+        path = self._path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        self.content_types[(bucket, key)] = content_type
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
+        self.calls["put_object"] += 1
+        body = Body if isinstance(Body, bytes) else Body.read()
+        self._store(Bucket, Key, body, ContentType)
+        return {"ETag": f'"{hashlib.md5(body).hexdigest()}"'}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.calls["get_object"] += 1
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise _error("NoSuchKey", "GetObject")
+        body = path.read_bytes()
+        return {"Body": io.BytesIO(body), "ContentLength": len(body),
+                "ContentType": self.content_types.get((Bucket, Key))}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.calls["head_object"] += 1
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise _error("404", "HeadObject")
+        return {"ContentLength": path.stat().st_size, "ContentType": self.content_types.get((Bucket, Key))}
+
+    def copy_object(self, Bucket, Key, CopySource, ContentType=None, **kwargs):
+        self.calls["copy_object"] += 1
+        source = self._path(CopySource["Bucket"], CopySource["Key"])
+        if not source.exists():
+            raise _error("NoSuchKey", "CopyObject")
+        self._store(Bucket, Key, source.read_bytes(), ContentType)
+        return {}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self.calls["delete_object"] += 1
+        self._path(Bucket, Key).unlink(missing_ok=True)
+        self.content_types.pop((Bucket, Key), None)
+        return {}
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, **kwargs):
+        self.calls["create_multipart_upload"] += 1
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"bucket": Bucket, "key": Key, "content_type": ContentType, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self.calls["upload_part"] += 1
+        if UploadId not in self.uploads:
+            raise _error("NoSuchUpload", "UploadPart")
+        body = Body if isinstance(Body, bytes) else Body.read()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.uploads[UploadId]["parts"][PartNumber] = (etag, body)
+        return {"ETag": etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.calls["complete_multipart_upload"] += 1
+        upload = self.uploads.pop(UploadId, None)
+        if upload is None:
+            raise _error("NoSuchUpload", "CompleteMultipartUpload")
+        parts = MultipartUpload["Parts"]
+        bodies = []
+        for index, part in enumerate(parts):
+            etag, body = upload["parts"][part["PartNumber"]]
+            if etag != part["ETag"]:
+                raise _error("InvalidPart", "CompleteMultipartUpload")
+            if index < len(parts) - 1 and len(body) < self.min_part_size:
+                raise _error("EntityTooSmall", "CompleteMultipartUpload")
+            bodies.append(body)
+        self._store(Bucket, Key, b"".join(bodies), upload["content_type"])
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self.calls["abort_multipart_upload"] += 1
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def exists(self, bucket: str, key: str) -> bool:
+        return self._path(bucket, key).exists()
+
+    def read(self, bucket: str, key: str) -> bytes:
+        return self._path(bucket, key).read_bytes()
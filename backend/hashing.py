@@ -0,0 +1,118 @@
+"""
+bcrypt 해싱 전용 워커 풀
+
+bcrypt 한 번에 수십~수백 ms의 CPU를 쓰므로 async 핸들러에서 직접 호출하면
+그동안 워커 전체(다른 요청, WebSocket)가 멈춥니다.
+해싱을 크기가 제한된 스레드(또는 프로세스) 풀로 넘기고,
+대기열이 가득 차면 바로 HashingPoolSaturated를 발생시켜 503으로 응답합니다.
+
+환경변수:
+    HASHING_WORKERS     동시에 실행할 해싱 수 (기본값: CPU 코어 수)
+    HASHING_QUEUE       실행 대기 가능한 추가 요청 수 (기본값: workers * 4)
+    HASHING_POOL_MODE   thread (기본값) 또는 process
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import auth
+
+
+class HashingPoolSaturated(Exception):
+    """실행 중 + 대기 중인 해싱 작업이 한도에 도달함"""
+
+
+def _timed_call(fn, args):
+    # 프로세스 간에도 비교 가능한 monotonic 시계로 시작/종료 시각 기록
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic()
+
+
+class HashingPool:
+    def __init__(self, workers: int = None, max_queue: int = None, mode: str = "thread"):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.mode = mode
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # 메트릭
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_in_flight = 0
+        self.queue_wait_time = 0.0
+        self.run_time = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args):
+        """fn(*args)를 해싱 풀에서 실행 (한도 초과 시 HashingPoolSaturated)"""
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingPoolSaturated()
+            self._in_flight += 1
+            self.submitted += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+        enqueued = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, args
+            )
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_time += max(0.0, started - enqueued)
+            self.run_time += finished - started
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(auth.get_password_hash, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(auth.verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "max_in_flight": self.max_in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.queue_wait_time / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self.run_time / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+hashing_pool = HashingPool(
+    workers=int(os.getenv("HASHING_WORKERS", "0")) or None,
+    max_queue=int(os.environ["HASHING_QUEUE"]) if os.getenv("HASHING_QUEUE") else None,
+    mode=os.getenv("HASHING_POOL_MODE", "thread"),
+)
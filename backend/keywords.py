@@ -0,0 +1,147 @@
+"""
+키워드 기반 분류 (LLM 실패/폴백용)
+
+카테고리/우선순위 키워드 표 하나로 정규식을 한 번만 컴파일해 두고,
+설명을 한 번 훑으면서 모든 카테고리와 우선순위의 일치 키워드를 함께 찾습니다.
+
+- 정규식은 같은 위치에서 가장 긴 후보 하나에만 일치하므로, 그 안에 포함된 다른 키워드
+  ("수도꼭지" → "수도", "창문" → "문")의 라벨을 미리 합쳐 둠
+- 서로 겹치는 키워드("정전기" 안의 "정전"과 "전기")는 연결형을 후보로 미리 추가해 두어
+  전방 탐색(lookahead) 없이 findall 한 번으로 찾음
+- 선택 규칙은 기존과 같음: 카테고리는 CATEGORY_KEYWORDS 순서상 먼저 일치한 것,
+  우선순위는 high > low > medium(기본값)
+
+긴급 여부(is_urgent, 분류 작업 우선순위/배치 생략)는 부분 문자열로 일치하는 PRIORITY_KEYWORDS["high"]
+("새" → "냄새", "새벽")가 아니라 좁은 URGENT_KEYWORDS를 단어 단위로 찾습니다.
+"""
+
+import re
+from typing import Dict, List
+
+# 순서가 선택 우선순위 (앞선 카테고리가 먼저 선택됨)
+CATEGORY_KEYWORDS = {
+    "electrical": ["전기", "전등", "조명", "콘센트", "스위치", "누전", "정전", "전선"],
+    "plumbing": ["수도", "배관", "물", "수도꼭지", "변기", "싱크대", "하수", "누수", "화장실", "세면대"],
+    "hvac": ["냉방", "난방", "에어컨", "보일러", "환기", "온도"],
+    "structural": ["벽", "바닥", "천장", "문", "창문", "계단", "균열", "파손"],
+}
+
+PRIORITY_KEYWORDS = {
+    "high": [
+        # 긴급/고장
+        "긴급", "위험", "사고", "고장", "멈춤", "안됨", "불가능", "즉시",
+        # 누수/지속
+        "샘", "새", "누수", "넘침", "뜨거움", "계속",
+    ],
+    "low": ["나중", "여유", "천천히"],
+}
+
+# 긴급 요청 키워드 - 단어의 시작에서만 일치 ("누수가", "갇혔어요"는 일치, "정전기"는 URGENT_EXCLUDED)
+URGENT_KEYWORDS = ["누수", "침수", "정전", "감전", "화재", "불났", "연기", "가스", "갇힘", "갇혔", "갇혀", "긴급"]
+
+# URGENT_KEYWORDS로 시작하지만 긴급하지 않은 단어
+URGENT_EXCLUDED = ["정전기", "가스레인지", "가스비", "가스요금", "가스검침", "연기됐", "연기해", "연기할", "연기가능"]
+
+DEFAULT_CATEGORY = "other"
+DEFAULT_PRIORITY = "medium"
+
+
+class KeywordMatcher:
+    def __init__(self, category_keywords: Dict[str, List[str]], priority_keywords: Dict[str, List[str]]):
+        self.category_order = list(category_keywords)
+        self.priority_order = list(priority_keywords)
+
+        # 키워드 -> [(종류, 라벨)]
+        labels = {}
+        for kind, table in (("category", category_keywords), ("priority", priority_keywords)):
+            for label, words in table.items():
+                for word in words:
+                    labels.setdefault(word.lower(), []).append((kind, label))
+
+        # 겹치는 키워드 연결형 ("정전" + "전기" → "정전기")도 정규식 후보로 추가
+        # 연결형이 더 길어서 먼저 일치하므로 정규식 한 번(findall)으로 겹친 키워드까지 모두 찾음
+        alternatives = set(labels)
+        frontier = set(labels)
+        while frontier:
+            joined = set()
+            for word in frontier:
+                for offset in range(1, len(word)):
+                    suffix = word[offset:]
+                    for other in labels:
+                        if len(other) > len(suffix) and other.startswith(suffix):
+                            joined.add(word[:offset] + other)
+            frontier = joined - alternatives
+            alternatives |= frontier
+
+        # 정규식 후보 -> 그 안에 포함된 모든 키워드의 (키워드, 종류, 라벨) 목록 ("창문" → "문", "창문")
+        self._implied = {
+            alternative: [
+                (word, kind, label)
+                for word in sorted((w for w in labels if w in alternative),
+                                   key=lambda w: (alternative.index(w), len(w)))
+                for kind, label in labels[word]
+            ]
+            for alternative in alternatives
+        }
+
+        # 같은 위치에서는 가장 긴 후보가 일치하도록 길이 역순으로 나열
+        self._pattern = re.compile("|".join(re.escape(a) for a in sorted(alternatives, key=len, reverse=True)))
+
+    def find(self, text: str) -> list:
+        """text에서 일치한 정규식 후보 목록"""
+        return self._pattern.findall(text.lower())
+
+    def match(self, text: str) -> dict:
+        """카테고리/우선순위와 라벨별 일치 키워드"""
+        category_terms = {}
+        priority_terms = {}
+        terms = {"category": category_terms, "priority": priority_terms}
+        for alternative in self.find(text):
+            for word, kind, label in self._implied[alternative]:
+                matched = terms[kind].get(label)
+                if matched is None:
+                    terms[kind][label] = [word]
+                elif word not in matched:
+                    matched.append(word)
+
+        category = DEFAULT_CATEGORY
+        for candidate in self.category_order:
+            if candidate in category_terms:
+                category = candidate
+                break
+        priority = DEFAULT_PRIORITY
+        for candidate in self.priority_order:
+            if candidate in priority_terms:
+                priority = candidate
+                break
+        return {
+            "category": category,
+            "priority": priority,
+            "category_terms": category_terms,
+            "priority_terms": priority_terms,
+        }
+
+
+matcher = KeywordMatcher(CATEGORY_KEYWORDS, PRIORITY_KEYWORDS)
+
+
+def categorize_with_keywords(description: str) -> dict:
+    """키워드 기반 분류 (matched_terms: 결정에 쓰인 키워드)"""
+    result = matcher.match(description)
+    category, priority = result["category"], result["priority"]
+    matched_terms = list(result["category_terms"].get(category, ()))
+    for term in result["priority_terms"].get(priority, ()):
+        if term not in matched_terms:
+            matched_terms.append(term)
+    return {"category": category, "priority": priority, "matched_terms": matched_terms}
+
+
+_URGENT_PATTERN = re.compile(
+    r"(?<!\w)(?!" + "|".join(map(re.escape, URGENT_EXCLUDED)) + ")(?:"
+    + "|".join(map(re.escape, URGENT_KEYWORDS)) + ")"
+)
+
+
+def is_urgent(description: str) -> bool:
+    """긴급 키워드(URGENT_KEYWORDS)로 시작하는 단어가 있는 요청인지 (분류 작업 우선순위 결정용)"""
+    return _URGENT_PATTERN.search(description.lower()) is not None
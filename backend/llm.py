@@ -0,0 +1,389 @@
+"""
+Groq(OpenAI 호환) Chat Completions 비동기 클라이언트
+
+API 서버는 동기 groq SDK 대신 httpx.AsyncClient(AsyncLLMClient)를 사용해 분류 요청이 이벤트 루프를 막지 않고,
+Celery 워커는 같은 프롬프트와 배치 분류를 지원하는 동기 LLMClient를 사용합니다.
+- keep-alive 연결 풀 재사용 (요청마다 TLS 핸드셰이크 없음)
+- 호출별 제한 시간
+- 동시 호출 수 제한 (세마포어)
+
+로컬 개발/테스트에서는 fake_llm.py 서버를 GROQ_BASE_URL로 지정할 수 있습니다.
+
+환경변수:
+    GROQ_API_KEY          API 키
+    GROQ_BASE_URL         기본값: https://api.groq.com/openai/v1
+    GROQ_MODEL            기본값: llama-3.3-70b-versatile
+    LLM_TIMEOUT           호출당 제한 시간, 초 (기본값: 10)
+    LLM_MAX_CONCURRENCY   동시 호출 수 (기본값: 8)
+    LLM_BATCH_TIMEOUT     Celery 워커(동기/배치) 호출 제한 시간, 초 (기본값: 30)
+    LLM_RATE_WAIT         Celery 워커가 속도 제한 토큰을 기다릴 최대 시간, 초 (기본값: 10)
+
+서킷 브레이커/속도 제한 설정은 resilience.py를 참고하세요. API 요청 경로는 토큰을 기다리지 않고
+서킷이 열렸거나 토큰이 없으면 즉시 CircuitOpenError/RateLimitedError를 발생시킵니다.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from resilience import (
+    CircuitBreaker, CircuitOpenError, RateLimitedError, backoff_from_response, create_rate_limiter
+)
+
+load_dotenv()
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+CATEGORIES = ("electrical", "plumbing", "hvac", "structural", "other")
+PRIORITIES = ("high", "medium", "low")
+
+_GUIDE = """
+                    - electrical: 전기 관련 문제
+                    - plumbing: 배관, 수도 관련 문제
+                    - hvac: 난방, 환기, 에어컨 관련 문제
+                    - structural: 건물 구조, 벽, 바닥 관련 문제
+                    - other: 기타
+
+                    Also assess the priority as:
+                    - high: 빠른 대응 필요
+                    - medium: 일반적인 유지보수
+                    - low: 긴급하지 않음
+"""
+
+SYSTEM_PROMPT = """You are a building maintenance expert. Categorize the maintenance request into one of these categories:""" + _GUIDE + """
+                    Respond in JSON format: {"category": "...", "priority": "..."}"""
+
+# 여러 요청을 한 번에 분류 (시스템 프롬프트를 요청마다 반복해서 보내지 않음)
+BATCH_SYSTEM_PROMPT = """You are a building maintenance expert. You will receive a JSON array of maintenance requests, each {"id": <number>, "description": "..."}.
+                    Categorize every request into one of these categories:""" + _GUIDE + """
+                    Respond in JSON format with exactly one result per id:
+                    {"results": [{"id": <number>, "category": "...", "priority": "..."}, ...]}"""
+
+
+def build_messages(description: str) -> list:
+    """단건 분류 요청 메시지 (main.py, tasks.py 공용)"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Maintenance request: {description}"},
+    ]
+
+
+def build_batch_messages(items: list) -> list:
+    """배치 분류 요청 메시지 (items: [(id, description), ...])"""
+    payload = [{"id": request_id, "description": description} for request_id, description in items]
+    return [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+
+
+def parse_batch_response(content: str, ids: list) -> dict:
+    """
+    배치 응답에서 {id: {"category", "priority"}}를 추출
+
+    JSON 자체가 깨졌으면 ValueError, 일부 항목만 빠졌거나 잘못됐으면 그 항목만 결과에서 제외합니다.
+    """
+    data = json.loads(content)
+    items = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Batch response has no results array")
+
+    wanted = set(ids)
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            request_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if request_id in wanted and item.get("category") in CATEGORIES and item.get("priority") in PRIORITIES:
+            results[request_id] = {"category": item["category"], "priority": item["priority"]}
+    return results
+
+
+def batch_max_tokens(count: int) -> int:
+    return 50 + 40 * count
+
+
+def _provider_failure(exc: Exception) -> bool:
+    """서킷 브레이커 실패로 셀 오류인지 (요청 자체가 잘못된 4xx는 제외)"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status in (401, 403, 408, 429) or status >= 500
+    return True
+
+
+def _request_body(model: str, messages: list, temperature: float, max_tokens: int, json_mode: bool) -> dict:
+    body = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if json_mode:
+        body["response_format"] = {"type": "json_object"}
+    return body
+
+
+class LLMClient:
+    """
+    동기 클라이언트 (Celery 워커용)
+
+    httpx.Client는 스레드 안전하며 keep-alive 연결을 재사용합니다.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = GROQ_BASE_URL,
+                 model: str = GROQ_MODEL, timeout: float = 30.0, max_connections: int = 4,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 breaker: Optional[CircuitBreaker] = None, rate_limiter=None, rate_wait: float = 0.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._transport = transport  # 테스트용 (예: fake_llm.mock_transport())
+        self.breaker = breaker
+        self.rate_limiter = rate_limiter
+        self.rate_wait = rate_wait  # 토큰을 기다릴 최대 시간 (Celery 워커는 잠시 기다려도 됨)
+        self._client = None
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    base_url=self.base_url,
+                    headers={"Authorization": f"Bearer {self.api_key or ''}"},
+                    timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=60,
+                    ),
+                    transport=self._transport,
+                )
+            return self._client
+
+    def chat(self, messages: list, temperature: float = 0.3, max_tokens: int = 100,
+             json_mode: bool = False) -> str:
+        if not self.api_key and self._transport is None:
+            raise RuntimeError("GROQ_API_KEY is not configured")
+
+        try:
+            if self.breaker:
+                self.breaker.before_call()
+            if self.rate_limiter and not self.rate_limiter.acquire_sync(self.rate_wait):
+                raise RateLimitedError("LLM rate limit reached")
+        except (CircuitOpenError, RateLimitedError):
+            with self._lock:
+                self.rejected += 1
+            raise
+
+        start = time.perf_counter()
+        try:
+            response = self._get_client().post(
+                "/chat/completions",
+                json=_request_body(self.model, messages, temperature, max_tokens, json_mode),
+            )
+            backoff = backoff_from_response(response.status_code, response.headers)
+            if backoff is not None and self.rate_limiter:
+                self.rate_limiter.penalize_sync(backoff)
+            response.raise_for_status()
+            content = response.json()["choices"][0]["message"]["content"]
+            if self.breaker:
+                self.breaker.record_success()
+            return content
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            if self.breaker and _provider_failure(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.total_latency += time.perf_counter() - start
+
+    def categorize(self, description: str) -> dict:
+        return json.loads(self.chat(build_messages(description)))
+
+    def categorize_batch(self, items: list) -> dict:
+        """items: [(id, description), ...] → {id: 결과} (빠진 항목은 호출한 쪽에서 개별 처리)"""
+        content = self.chat(
+            build_batch_messages(items),
+            temperature=0.0,
+            max_tokens=batch_max_tokens(len(items)),
+            json_mode=True,
+        )
+        return parse_batch_response(content, [request_id for request_id, _ in items])
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                "calls": self.calls,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "avg_latency_ms": round(self.total_latency / self.calls * 1000, 1) if self.calls else 0.0,
+            }
+
+
+class AsyncLLMClient:
+    def __init__(self, api_key: Optional[str] = None, base_url: str = GROQ_BASE_URL,
+                 model: str = GROQ_MODEL, timeout: float = 10.0, max_concurrency: int = 8,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 breaker: Optional[CircuitBreaker] = None, rate_limiter=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._transport = transport  # 테스트용 (예: httpx.ASGITransport(fake_llm.app))
+        self.breaker = breaker
+        self.rate_limiter = rate_limiter
+
+        # httpx 클라이언트와 세마포어는 이벤트 루프에 묶이므로 루프별로 생성
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+        # 메트릭
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key or ''}"},
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def chat(self, messages: list, temperature: float = 0.3, max_tokens: int = 100) -> str:
+        """Chat Completions 호출 후 응답 메시지 본문 반환"""
+        if not self.api_key and self._transport is None:
+            raise RuntimeError("GROQ_API_KEY is not configured")
+
+        # 서킷이 열렸거나 할당량이 없으면 기다리지 않고 바로 실패 (호출한 쪽이 폴백)
+        try:
+            if self.breaker:
+                self.breaker.before_call()
+            if self.rate_limiter and not await self.rate_limiter.try_acquire():
+                raise RateLimitedError("LLM rate limit reached")
+        except (CircuitOpenError, RateLimitedError):
+            self.rejected += 1
+            raise
+
+        client = self._ensure_client()
+        async with self._semaphore:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                # 전송 계층과 무관하게 전체 호출 시간을 제한
+                response = await asyncio.wait_for(
+                    client.post(
+                        "/chat/completions",
+                        json=_request_body(self.model, messages, temperature, max_tokens, json_mode=False),
+                    ),
+                    timeout=self.timeout,
+                )
+                backoff = backoff_from_response(response.status_code, response.headers)
+                if backoff is not None and self.rate_limiter:
+                    await self.rate_limiter.penalize(backoff)
+                response.raise_for_status()
+                content = response.json()["choices"][0]["message"]["content"]
+                if self.breaker:
+                    self.breaker.record_success()
+                return content
+            except Exception as e:
+                if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+                    self.timeouts += 1
+                self.errors += 1
+                if self.breaker and _provider_failure(e):
+                    self.breaker.record_failure()
+                raise
+            finally:
+                self.in_flight -= 1
+                self.calls += 1
+                self.total_latency += time.perf_counter() - start
+
+    async def categorize(self, description: str) -> dict:
+        content = await self.chat(build_messages(description))
+        return json.loads(content)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.total_latency / self.calls * 1000, 1) if self.calls else 0.0,
+        }
+
+
+# 두 클라이언트가 공유하는 Groq 서킷 브레이커와 속도 제한 (resilience.py)
+groq_breaker = CircuitBreaker(
+    "groq",
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    recovery_timeout=float(os.getenv("LLM_BREAKER_RECOVERY", "30")),
+)
+groq_rate_limiter = create_rate_limiter()
+
+# Celery 워커용 동기 클라이언트
+sync_llm_client = LLMClient(
+    api_key=os.getenv("GROQ_API_KEY"),
+    timeout=float(os.getenv("LLM_BATCH_TIMEOUT", "30")),
+    breaker=groq_breaker,
+    rate_limiter=groq_rate_limiter,
+    rate_wait=float(os.getenv("LLM_RATE_WAIT", "10")),
+)
+
+llm_client = AsyncLLMClient(
+    api_key=os.getenv("GROQ_API_KEY"),
+    timeout=float(os.getenv("LLM_TIMEOUT", "10")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    breaker=groq_breaker,
+    rate_limiter=groq_rate_limiter,
+)
@@ -0,0 +1,345 @@
+"""
+로컬(오프라인) 분류기 - LLM 앞 단계
+
+requests 테이블에서 LLM 또는 관리자가 분류한 행(category_source가 llm/manual)으로 학습한 문자 n-gram 해싱 + 선형(softmax) 모델입니다.
+API/Celery 워커가 시작할 때 한 번 읽어 두고 설명 하나를 수십 µs 안에 분류하며,
+신뢰도가 임계값보다 낮을 때만 LLM으로 넘깁니다.
+
+- 특징: 정규화한 설명의 문자 1~3-gram을 2^bits 차원으로 해싱 (NumPy 벡터화, 프로세스와 무관하게 같은 해시)
+- 모델: 카테고리/우선순위 softmax 회귀 두 개 (가중치 행렬 하나를 공유해 한 번에 계산)
+- 신뢰도: 두 예측 확률 중 작은 값
+
+학습/평가 (DATABASE_URL의 DB 사용):
+    python local_classifier.py train                    # 80/20 분할로 평가한 뒤 전체 데이터로 다시 학습해 저장
+    python local_classifier.py train --epochs 200 --bits 18
+    python local_classifier.py report                   # 학습 이후 라벨이 붙은 요청으로 정확도/지연 시간 평가
+
+학습 후 API/Celery 워커를 재시작하면 새 모델을 사용합니다.
+
+환경변수:
+    LOCAL_MODEL_PATH             모델 파일 (기본값: models/local_classifier.npz)
+    LOCAL_CLASSIFIER_THRESHOLD   이 신뢰도 이상이면 LLM 호출 생략 (기본값: 0.85)
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from categorization_cache import normalize_description
+from llm import CATEGORIES, PRIORITIES
+
+load_dotenv()
+
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "models/local_classifier.npz")
+
+NGRAM_SIZES = (1, 2, 3)
+_MULTIPLIER = np.uint64(1_000_003)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_ngrams(description: str, bits: int) -> np.ndarray:
+    """정규화한 설명의 문자 n-gram 해시 (1 ~ 2^bits-1, 중복 포함 - 등장 횟수만큼 더해짐)"""
+    text = " " + normalize_description(description) + " "
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    hashes = []
+    rolling = np.zeros(len(codes), dtype=np.uint64)
+    for n in NGRAM_SIZES:
+        if len(codes) < n:
+            break
+        rolling = rolling[:len(codes) - n + 1] * _MULTIPLIER + codes[n - 1:]
+        hashes.append(rolling + np.uint64(n))
+    # 인덱스 0은 항상 켜지는 편향(bias) 특징용으로 비워 둠
+    return np.maximum((np.concatenate(hashes) * _GOLDEN) >> np.uint64(64 - bits), np.uint64(1)).astype(np.intp)
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def _softmax_list(scores) -> list:
+    top = max(scores)
+    exp = [math.exp(score - top) for score in scores]
+    total = sum(exp)
+    return [value / total for value in exp]
+
+
+class LocalClassifier:
+    def __init__(self, weights: np.ndarray, bits: int, meta: Optional[dict] = None):
+        self.weights = weights  # (2^bits, 카테고리 수 + 우선순위 수)
+        self.bits = bits
+        self.meta = meta or {}
+
+    def predict_proba(self, description: str) -> tuple:
+        """(카테고리 확률, 우선순위 확률) - 특징 값은 모두 1/sqrt(n-gram 수), 편향은 1"""
+        indices = hash_ngrams(description, self.bits)
+        scores = (self.weights[indices].sum(axis=0) / math.sqrt(len(indices)) + self.weights[0]).tolist()
+        return _softmax_list(scores[:len(CATEGORIES)]), _softmax_list(scores[len(CATEGORIES):])
+
+    def predict(self, description: str) -> dict:
+        category_proba, priority_proba = self.predict_proba(description)
+        category = max(range(len(CATEGORIES)), key=category_proba.__getitem__)
+        priority = max(range(len(PRIORITIES)), key=priority_proba.__getitem__)
+        return {
+            "category": CATEGORIES[category],
+            "priority": PRIORITIES[priority],
+            "confidence": min(category_proba[category], priority_proba[priority]),
+        }
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 학습하지 않은(0인) 행은 저장하지 않음
+        rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, rows=rows, values=self.weights[rows].astype(np.float32),
+                bits=self.bits, meta=json.dumps(self.meta, ensure_ascii=False),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        with np.load(path) as data:
+            bits = int(data["bits"])
+            weights = np.zeros((1 << bits, len(CATEGORIES) + len(PRIORITIES)), dtype=np.float32)
+            weights[data["rows"]] = data["values"]
+            return cls(weights, bits, json.loads(str(data["meta"])))
+
+
+def train(samples: list, bits: int = 18, epochs: int = 100, learning_rate: float = 0.5,
+          l2: float = 1e-5) -> LocalClassifier:
+    """samples: [(설명, 카테고리, 우선순위)] → 전체 배치 AdaGrad로 학습한 LocalClassifier"""
+    n_categories = len(CATEGORIES)
+    hashed = [hash_ngrams(description, bits) for description, _, _ in samples]
+
+    # 편향 특징(0)을 붙여 CSR 형태로 펼치고, 가중치 갱신용으로 특징 인덱스 순서 정렬을 미리 계산
+    lengths = np.array([len(h) + 1 for h in hashed])
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    indices = np.concatenate([np.concatenate(([0], h)) for h in hashed])
+    values = np.concatenate([np.concatenate(([1.0], np.full(len(h), 1 / math.sqrt(len(h))))) for h in hashed])
+    rows = np.repeat(np.arange(len(samples)), lengths)
+    order = np.argsort(indices, kind="stable")
+    touched, starts = np.unique(indices[order], return_index=True)
+
+    targets = np.zeros((len(samples), n_categories + len(PRIORITIES)))
+    for i, (_, category, priority) in enumerate(samples):
+        targets[i, CATEGORIES.index(category)] = 1
+        targets[i, n_categories + PRIORITIES.index(priority)] = 1
+
+    weights = np.zeros((1 << bits, targets.shape[1]))
+    squared = np.zeros((len(touched), targets.shape[1]))
+    for _ in range(epochs):
+        scores = np.add.reduceat(weights[indices] * values[:, None], indptr[:-1])
+        proba = np.hstack((_softmax(scores[:, :n_categories]), _softmax(scores[:, n_categories:])))
+        error = (proba - targets) / len(samples)
+
+        gradient = np.add.reduceat((error[rows] * values[:, None])[order], starts) + l2 * weights[touched]
+        squared += gradient ** 2
+        weights[touched] -= learning_rate * gradient / (np.sqrt(squared) + 1e-8)
+
+    return LocalClassifier(weights.astype(np.float32), bits, {
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "samples": len(samples),
+        "epochs": epochs,
+    })
+
+
+# 학습에 쓰는 라벨 출처 (키워드 폴백이나 이 분류기 자신의 예측으로 학습하면 오류가 강화됨)
+TRAINING_SOURCES = ("llm", "manual")
+
+
+def load_training_data(conn, after_id: int = 0) -> list:
+    """LLM 또는 관리자가 정한 라벨만 (대기 중/알 수 없는 라벨 제외), after_id보다 나중 요청만"""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT description, category, priority FROM requests
+        WHERE id > ?
+        AND category_source IN ({", ".join("?" * len(TRAINING_SOURCES))})
+        AND category IN ({", ".join("?" * len(CATEGORIES))})
+        AND priority IN ({", ".join("?" * len(PRIORITIES))})
+        ORDER BY id
+    """, (after_id, *TRAINING_SOURCES, *CATEGORIES, *PRIORITIES))
+    return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
+
+
+def latest_request_id(conn) -> int:
+    return conn.execute("SELECT IFNULL(MAX(id), 0) FROM requests").fetchone()[0]
+
+
+def evaluate(model: LocalClassifier, samples: list, threshold: float) -> dict:
+    """정확도, 임계값 적용 시 LLM 생략 비율/정확도, 예측 지연 시간"""
+    correct_category = correct_priority = confident = confident_correct = 0
+    latencies = []
+    for description, category, priority in samples:
+        start = time.perf_counter()
+        result = model.predict(description)
+        latencies.append(time.perf_counter() - start)
+
+        both = result["category"] == category and result["priority"] == priority
+        correct_category += result["category"] == category
+        correct_priority += result["priority"] == priority
+        if result["confidence"] >= threshold:
+            confident += 1
+            confident_correct += both
+
+    total = len(samples) or 1
+    latencies.sort()
+    return {
+        "samples": len(samples),
+        "category_accuracy": round(correct_category / total, 4),
+        "priority_accuracy": round(correct_priority / total, 4),
+        "threshold": threshold,
+        "coverage": round(confident / total, 4),
+        "confident_accuracy": round(confident_correct / confident, 4) if confident else 0.0,
+        "latency_p50_us": round(latencies[len(latencies) // 2] * 1e6, 1) if latencies else 0.0,
+        "latency_p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1) if latencies else 0.0,
+    }
+
+
+def train_with_holdout(samples: list, holdout: float, threshold: float, seed: int = 42, **kwargs) -> LocalClassifier:
+    """holdout 비율을 떼어 평가한 뒤, 저장할 모델은 전체 샘플로 다시 학습 (평가 결과는 meta["holdout"])"""
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    split = int(len(shuffled) * (1 - holdout))
+    train_set, test_set = shuffled[:split], shuffled[split:]
+
+    metrics = None
+    if train_set and test_set:
+        metrics = evaluate(train(train_set, **kwargs), test_set, threshold)
+    model = train(samples, **kwargs)
+    if metrics:
+        model.meta["holdout"] = metrics
+    return model
+
+
+class LocalClassifierTier:
+    """
+    LLM 앞에서 사용하는 로컬 분류 단계
+
+    모델 파일이 없으면 아무것도 하지 않고(None) 모든 요청을 LLM으로 넘깁니다.
+    """
+
+    def __init__(self, path: str = LOCAL_MODEL_PATH, threshold: float = 0.85):
+        self.path = path
+        self.threshold = threshold
+        self.model: Optional[LocalClassifier] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.predictions = 0
+        self.confident = 0
+        self.escalated = 0
+        self.total_latency = 0.0
+
+    def load(self) -> Optional[LocalClassifier]:
+        with self._lock:
+            self._loaded = True
+            if os.path.exists(self.path):
+                self.model = LocalClassifier.load(self.path)
+                print(f"[LOCAL] Loaded classifier {self.path} ({self.model.meta})")
+            else:
+                self.model = None
+            return self.model
+
+    def set_model(self, model: Optional[LocalClassifier]):
+        """모델 교체 (None이면 로컬 단계 비활성화)"""
+        with self._lock:
+            self.model = model
+            self._loaded = True
+
+    def classify(self, description: str) -> Optional[dict]:
+        """신뢰도가 임계값 이상이면 {"category", "priority", "confidence"}, 아니면 None (LLM으로)"""
+        if not self._loaded:
+            self.load()
+        if self.model is None:
+            return None
+
+        start = time.perf_counter()
+        result = self.model.predict(description)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.predictions += 1
+            self.total_latency += elapsed
+            if result["confidence"] >= self.threshold:
+                self.confident += 1
+                return result
+            self.escalated += 1
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.model is not None,
+                "model": self.model.meta if self.model else None,
+                "threshold": self.threshold,
+                "predictions": self.predictions,
+                "confident": self.confident,
+                "escalated": self.escalated,
+                "avg_latency_us": round(self.total_latency / self.predictions * 1e6, 1) if self.predictions else 0.0,
+            }
+
+
+local_classifier = LocalClassifierTier(
+    path=LOCAL_MODEL_PATH,
+    threshold=float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.85")),
+)
+
+
+def main():
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description="로컬 분류기 학습/평가")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = sub.add_parser("train", help="requests 테이블로 학습 후 저장")
+    train_parser.add_argument("--out", default=LOCAL_MODEL_PATH)
+    train_parser.add_argument("--bits", type=int, default=18)
+    train_parser.add_argument("--epochs", type=int, default=100)
+    train_parser.add_argument("--holdout", type=float, default=0.2, help="평가용으로 떼어 둘 비율")
+
+    report_parser = sub.add_parser("report", help="저장된 모델을 학습 이후 라벨로 평가")
+    report_parser.add_argument("--model", default=LOCAL_MODEL_PATH)
+
+    args = parser.parse_args()
+    threshold = local_classifier.threshold
+
+    if args.command == "train":
+        with get_db() as conn:
+            trained_through = latest_request_id(conn)
+            samples = load_training_data(conn)
+        if not samples:
+            print("No LLM- or admin-labeled requests to train on")
+            return
+        model = train_with_holdout(samples, args.holdout, bits=args.bits, epochs=args.epochs,
+                                   threshold=threshold)
+        model.meta["trained_through_id"] = trained_through
+        if "holdout" in model.meta:
+            print(json.dumps(model.meta["holdout"], indent=2))
+        model.save(args.out)
+        print(f"Trained on {len(samples)} requests, saved {args.out}")
+    else:
+        model = LocalClassifier.load(args.model)
+        # 모델이 학습하지 않은 (학습 이후에 라벨이 붙은) 요청으로만 평가
+        with get_db() as conn:
+            fresh = load_training_data(conn, after_id=model.meta.get("trained_through_id", 0))
+        if fresh:
+            print(json.dumps(evaluate(model, fresh, threshold), indent=2))
+        else:
+            print("No requests labeled since training; holdout evaluation at training time:")
+            print(json.dumps(model.meta.get("holdout"), indent=2))
+
+
+if __name__ == "__main__":
+    main()
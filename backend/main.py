@@ -1,23 +1,34 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, WebSocket, WebSocketDisconnect, Depends, Request
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request, Query
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from typing import Optional, List
-from datetime import datetime, timedelta
-import sqlite3
+from datetime import date, datetime, timedelta, timezone
 import os
-from contextlib import contextmanager
+import json
+import sqlite3
 from dotenv import load_dotenv
-import boto3
 import uuid
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from tasks import categorize_maintenance_request
+from tasks import categorize_maintenance_request, categorize_requests, generate_thumbnail
+from outbox import outbox_relay, INLINE_RELAY
+from celery_app import PRIORITY_URGENT
+from database import get_db, run_db, pool_stats
+import crud
+from migrations import migrate
+from export import stream_requests, EXPORT_FORMATS
+from hashing import hashing_pool, HashingPoolSaturated
+from events import event_bus
+from realtime import manager
 from auth import (
     Token, User, UserCreate, UserInDB,
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, get_current_active_admin, get_current_super_admin, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_access_token,
+    get_current_user, get_current_active_admin, get_current_super_admin, ACCESS_TOKEN_EXPIRE_MINUTES,
+    user_cache
 )
 
 # .env 파일 로드
@@ -26,70 +37,29 @@ load_dotenv()
 # Rate Limiter 초기화
 limiter = Limiter(key_func=get_remote_address)
 
-# Groq 클라이언트 초기화 (OpenAI 대신 사용)
-from groq import Groq
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Groq 비동기 클라이언트 (keep-alive 연결 재사용, 이벤트 루프를 막지 않음)
+from llm import llm_client, groq_breaker, groq_rate_limiter
+from categorization_cache import categorization_cache
+from local_classifier import local_classifier
+# 키워드 기반 분류 (Groq API 실패 시 대체)
+from keywords import categorize_with_keywords, is_urgent
+from search import highlight, parse_query
+from duplicates import duplicate_detector
 
 # OpenAI 클라이언트 (백업용, 현재 비활성화)
 # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# S3 클라이언트 초기화
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name=os.getenv('AWS_REGION', 'ap-northeast-2')
-) if os.getenv('AWS_ACCESS_KEY_ID') else None
-
-S3_BUCKET = os.getenv('S3_BUCKET_NAME', 'maintenance-files')
-
-# 데이터베이스 연결 컨텍스트 매니저
-@contextmanager
-def get_db():
-    conn = sqlite3.connect("maintenance.db")
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+# 첨부 파일 저장소 (로컬 디스크 또는 S3) 및 스트리밍 업로드
+from uploads import UPLOAD_MAX_ATTACHMENTS, UPLOAD_MAX_BYTES, UploadError, stream_image_upload
+from storage import (
+    storage, FilesystemStorage, HashingWriter, RangeNotSatisfiable,
+    content_key, guess_content_type, iter_file, parse_range, temp_key
+)
 
-# 데이터베이스 초기화
+# 데이터베이스 초기화 (적용되지 않은 마이그레이션만 실행)
 def init_db():
     with get_db() as conn:
-        cursor = conn.cursor()
-
-        # requests 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                description TEXT NOT NULL,
-                category VARCHAR(50),
-                priority VARCHAR(20),
-                status VARCHAR(20) DEFAULT 'pending',
-                location VARCHAR(100),
-                contact_info VARCHAR(100),
-                image_url VARCHAR(500),
-                task_id VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-
-        # users 테이블 (인증용)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                hashed_password VARCHAR(255) NOT NULL,
-                full_name VARCHAR(100),
-                role VARCHAR(20) DEFAULT 'user',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        conn.commit()
+        migrate(conn)
 
     # 최고 관리자 계정 자동 생성
     from init_super_admin import init_super_admin
@@ -119,7 +89,9 @@ class RequestResponse(BaseModel):
     location: Optional[str]
     contact_info: Optional[str]
     image_url: Optional[str]
+    thumbnail_url: Optional[str] = None
     task_id: Optional[str]
+    duplicate_of: Optional[int] = None  # 같은 문제로 먼저 접수된 원본 요청 (중복 감지)
     created_at: str
     updated_at: str
 
@@ -128,107 +100,70 @@ class TaskStatusResponse(BaseModel):
     status: str
     result: Optional[dict] = None
 
-# WebSocket 연결 관리
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+class AttachmentResponse(BaseModel):
+    id: int
+    request_id: int
+    url: str
+    thumbnail_url: Optional[str]
+    content_type: str
+    size: int
+    sha256: str
+    filename: Optional[str]
+    created_at: str
+
+class SearchHighlight(BaseModel):
+    description: str
+    location: Optional[str]
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+class SearchResult(RequestResponse):
+    score: Optional[float]  # bm25 (작을수록 관련도 높음), 짧은 검색어만 있으면 None (최신순)
+    highlight: SearchHighlight
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+class DuplicateCluster(RequestResponse):
+    duplicate_count: int
+    duplicate_ids: List[int]
+    last_reported_at: str
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-
-manager = ConnectionManager()
-
-# 키워드 기반 분류 (OpenAI API 대체)
-def categorize_with_keywords(description: str) -> dict:
-    """간단한 키워드 기반 분류 (OpenAI API quota 초과 시 대체)"""
-    desc_lower = description.lower()
-
-    print(f"[KEYWORD] Input description: {description[:100]}")
-    print(f"[KEYWORD] Lowercase: {desc_lower[:100]}")
-
-    # 카테고리 분류
-    category = "other"
-    if any(word in desc_lower for word in ["전기", "전등", "조명", "콘센트", "스위치", "누전", "정전", "전선"]):
-        category = "electrical"
-        print(f"[KEYWORD] Matched electrical")
-    elif any(word in desc_lower for word in ["수도", "배관", "물", "수도꼭지", "변기", "싱크대", "하수", "누수", "화장실", "세면대"]):
-        category = "plumbing"
-        print(f"[KEYWORD] Matched plumbing")
-    elif any(word in desc_lower for word in ["냉방", "난방", "에어컨", "보일러", "환기", "온도"]):
-        category = "hvac"
-        print(f"[KEYWORD] Matched hvac")
-    elif any(word in desc_lower for word in ["벽", "바닥", "천장", "문", "창문", "계단", "균열", "파손"]):
-        category = "structural"
-        print(f"[KEYWORD] Matched structural")
-
-    # 우선순위 판단
-    priority = "medium"
-    if any(word in desc_lower for word in ["긴급", "위험", "사고", "고장", "멈춤", "안됨", "불가능", "즉시"]):
-        priority = "high"
-        print(f"[KEYWORD] High priority (urgent words)")
-    elif any(word in desc_lower for word in ["샘", "새", "누수", "넘침", "뜨거움", "계속"]):
-        priority = "high"
-        print(f"[KEYWORD] High priority (leak/continuous)")
-    elif any(word in desc_lower for word in ["나중", "여유", "천천히"]):
-        priority = "low"
-        print(f"[KEYWORD] Low priority")
-
-    print(f"[KEYWORD] Result: category={category}, priority={priority}")
-    return {"category": category, "priority": priority}
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # created 또는 error
+    id: Optional[int] = None
+    task_id: Optional[str] = None
+    detail: Optional[list] = None
+
+class BulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+# 일괄 접수: 한 번에 받을 최대 요청 수, 분류 작업 하나가 맡을 요청 수
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+BULK_TASK_SIZE = int(os.getenv("BULK_TASK_SIZE", "100"))
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
 
 # AI 카테고리화 함수 (동기 - 빠른 응답용)
 async def categorize_with_ai_sync(description: str) -> dict:
+    """분류 결과 (source: 라벨을 정한 곳 - llm / local / keyword)"""
+    # 같은 설명은 이전 분류 결과 재사용 (LLM 호출/Groq 할당량 절약, LLM 결과만 캐시됨)
+    cached = await categorization_cache.get(description)
+    if cached:
+        return {**cached, "source": "llm"}
+
+    # 로컬 분류기가 충분히 확신하면 LLM 호출 생략 (수십 µs)
+    local = local_classifier.classify(description)
+    if local:
+        return {"category": local["category"], "priority": local["priority"], "source": "local"}
+
     # Groq API 사용 (무료, 빠름)
     try:
-        print(f"[DEBUG] Starting Groq AI categorization for: {description[:50]}...")
-
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # 무료 모델
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a building maintenance expert. Categorize the maintenance request into one of these categories:
-                    - electrical: 전기 관련 문제
-                    - plumbing: 배관, 수도 관련 문제
-                    - hvac: 난방, 환기, 에어컨 관련 문제
-                    - structural: 건물 구조, 벽, 바닥 관련 문제
-                    - other: 기타
-
-                    Also assess the priority as:
-                    - high: 빠른 대응 필요
-                    - medium: 일반적인 유지보수
-                    - low: 긴급하지 않음
-
-                    Respond in JSON format: {"category": "...", "priority": "..."}"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Maintenance request: {description}"
-                }
-            ],
-            temperature=0.3,
-            max_tokens=100
-        )
-
-        import json
-        result = json.loads(response.choices[0].message.content)
+        result = await llm_client.categorize(description)
         print(f"[DEBUG] Groq AI categorization successful: {result}")
-        return result
+        await categorization_cache.set(description, result)
+        return {**result, "source": "llm"}
     except Exception as e:
         print(f"[ERROR] Groq AI categorization error: {type(e).__name__}: {str(e)}")
         print("[INFO] Falling back to keyword-based categorization")
-        return categorize_with_keywords(description)
+        return {**categorize_with_keywords(description), "source": "keyword"}
 
 # Lifespan 이벤트 (Deprecation 경고 해결)
 from contextlib import asynccontextmanager
@@ -238,9 +173,19 @@ async def lifespan(app: FastAPI):
     # Startup
     init_db()
     print("Database initialized")
+    local_classifier.load()
+    # 모든 워커/Celery가 발행한 이벤트를 이 워커의 WebSocket 클라이언트에게 전달
+    await event_bus.start(manager.broadcast)
+    # 접수된 Celery 작업을 브로커로 발행 (OUTBOX_RELAY=off면 별도 프로세스 python outbox.py)
+    if INLINE_RELAY:
+        await outbox_relay.start()
     yield
     # Shutdown
     print("Shutting down...")
+    await outbox_relay.stop()
+    await event_bus.stop()
+    await llm_client.aclose()
+    hashing_pool.shutdown()
 
 # 프로덕션 환경에서는 Swagger UI 비활성화
 is_production = os.getenv("RAILWAY_ENVIRONMENT") == "production"
@@ -297,6 +242,16 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# 해싱 풀 포화 시 대기열에 쌓지 않고 바로 503 반환
+async def _hashing_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+app.add_exception_handler(HashingPoolSaturated, _hashing_saturated_handler)
+
 # CORS 재설정 (lifespan 후)
 app.add_middleware(
     CORSMiddleware,
@@ -304,6 +259,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # API 엔드포인트
@@ -337,81 +293,183 @@ async def submit_request(
     유지보수 요청 생성
     - use_async=True: Celery로 비동기 AI 처리 (빠른 응답)
     - use_async=False: 동기 AI 처리 (즉시 분류)
+    - 같은 위치의 최근 열린 요청과 설명이 비슷하면 그 요청에 연결(duplicate_of)하고
+      분류를 그대로 사용 (AI 호출 없음, 원본이 아직 분류 중이면 연결만 하고 평소대로 분류)
     """
+    duplicate = await run_db(duplicate_detector.check, request.description, request.location)
+    original = duplicate["match"]
+
+    if original and original["category"] != "processing":
+        # 원본과 같은 분류 (새 신고에 긴급 키워드가 있으면 우선순위만 높임)
+        row = await run_db(
+            crud.insert_request,
+            current_user.id,
+            request.description,
+            original["category"],
+            "high" if is_urgent(request.description) else original["priority"],
+            request.location,
+            request.contact_info,
+            "duplicate",
+            duplicate
+        )
+        await event_bus.publish({
+            "type": "new_request",
+            "data": row
+        })
+        return row
 
     if request.use_async:
-        # 비동기 처리: 먼저 저장 후 백그라운드에서 AI 처리
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO requests (user_id, description, category, priority, location, contact_info)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                current_user.id,
-                request.description,
-                "processing",  # 임시 카테고리
-                "processing",  # 임시 우선순위
-                request.location,
-                request.contact_info
-            ))
-            conn.commit()
-            request_id = cursor.lastrowid
-
-            # Celery 작업 시작
-            task = categorize_maintenance_request.delay(request_id, request.description)
-
-            # 작업 ID 저장
-            cursor.execute("UPDATE requests SET task_id = ? WHERE id = ?", (task.id, request_id))
-            conn.commit()
-
-            cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-            row = cursor.fetchone()
+        # 비동기 처리: 요청과 Celery 작업(outbox)을 한 번에 커밋하고 백그라운드에서 AI 처리
+        # 작업 ID를 미리 만들어 두므로 브로커가 내려가 있어도 접수는 성공하고 릴레이가 나중에 발행
+        row = await run_db(
+            crud.insert_request_with_task,
+            current_user.id,
+            request.description,
+            "processing",  # 임시 카테고리
+            "processing",  # 임시 우선순위
+            request.location,
+            request.contact_info,
+            categorize_maintenance_request.name,
+            str(uuid.uuid4()),
+            classification_priority(request.description),
+            duplicate
+        )
+        outbox_relay.notify()
 
         # WebSocket으로 실시간 알림
-        await manager.broadcast({
+        await event_bus.publish({
             "type": "new_request",
-            "data": dict(row)
+            "data": row
         })
 
-        return dict(row)
+        return row
 
     else:
         # 동기 처리: 즉시 AI 분류
         ai_result = await categorize_with_ai_sync(request.description)
 
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO requests (user_id, description, category, priority, location, contact_info)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                current_user.id,
-                request.description,
-                ai_result.get("category", "other"),
-                ai_result.get("priority", "medium"),
-                request.location,
-                request.contact_info
-            ))
-            conn.commit()
-            request_id = cursor.lastrowid
-
-            cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-            row = cursor.fetchone()
-
-        await manager.broadcast({
+        row = await run_db(
+            crud.insert_request,
+            current_user.id,
+            request.description,
+            ai_result.get("category", "other"),
+            ai_result.get("priority", "medium"),
+            request.location,
+            request.contact_info,
+            ai_result.get("source"),
+            duplicate
+        )
+
+        await event_bus.publish({
             "type": "new_request",
-            "data": dict(row)
+            "data": row
+        })
+
+        return row
+
+def classification_priority(description: str) -> Optional[int]:
+    """긴급 키워드가 있는 요청은 분류 큐에서 먼저 처리 (없으면 라우팅 기본 우선순위)"""
+    if is_urgent(description):
+        return PRIORITY_URGENT
+    return None
+
+async def read_bulk_items(request: Request) -> list:
+    """
+    JSON 배열 또는 NDJSON(한 줄에 요청 하나) 본문을 항목 목록으로 변환
+
+    NDJSON은 스트림을 줄 단위로 읽으며, JSON이 아닌 줄은 해당 항목의 오류로 남깁니다.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    def check_size(count: int):
+        if count > BULK_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} requests per bulk upload")
+
+    if content_type not in NDJSON_CONTENT_TYPES:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        check_size(len(items))
+        return items
+
+    items = []
+    buffer = b""
+
+    def add_lines(lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError("Invalid JSON line"))
+            check_size(len(items))
+
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        add_lines(lines)
+    add_lines([buffer])
+    return items
+
+@app.post("/api/requests/bulk", response_model=BulkResponse)
+async def submit_requests_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    유지보수 요청 일괄 접수 (JSON 배열 또는 application/x-ndjson)
+
+    - 유효한 항목을 한 트랜잭션으로 저장하고, BULK_TASK_SIZE개씩 묶은 분류 작업을 outbox에 기록
+    - WebSocket에는 개별 new_request 대신 requests_created 이벤트 하나만 발행
+    - 항목별 결과(created/error)를 입력 순서대로 반환 (use_async는 무시하고 항상 비동기 분류)
+    """
+    items = await read_bulk_items(request)
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            parsed = MaintenanceRequest.model_validate(item)
+            valid.append((index, parsed.model_dump(include={"description", "location", "contact_info"})))
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "error",
+                              "detail": [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]}
+        except ValueError as e:
+            results[index] = {"index": index, "status": "error", "detail": [{"loc": [], "msg": str(e)}]}
+
+    rows = []
+    if valid:
+        task_count = -(-len(valid) // max(BULK_TASK_SIZE, 1))
+        rows = await run_db(
+            crud.insert_requests_with_tasks,
+            current_user.id,
+            [item for _, item in valid],
+            "processing",
+            "processing",
+            categorize_requests.name,
+            [str(uuid.uuid4()) for _ in range(task_count)]
+        )
+        outbox_relay.notify()
+
+        await event_bus.publish({
+            "type": "requests_created",
+            "data": {"user_id": current_user.id, "count": len(rows), "requests": rows}
         })
 
-        return dict(row)
+    for (index, _), row in zip(valid, rows):
+        results[index] = {"index": index, "status": "created", "id": row["id"], "task_id": row["task_id"]}
+
+    return {"created": len(rows), "failed": len(items) - len(rows), "results": results}
 
 @app.get("/api/requests/{request_id}/task-status", response_model=TaskStatusResponse)
 async def get_task_status(request_id: int):
     """비동기 작업 상태 확인"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT task_id FROM requests WHERE id = ?", (request_id,))
-        row = cursor.fetchone()
+    row = await run_db(crud.get_request, request_id)
 
     if not row or not row["task_id"]:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -419,92 +477,285 @@ async def get_task_status(request_id: int):
     from celery.result import AsyncResult
     task = AsyncResult(row["task_id"])
 
+    def read_task():
+        ready = task.ready()
+        return task.state, (task.result if ready else None)
+
+    state, result = await run_in_threadpool(read_task)
+
     return {
         "task_id": row["task_id"],
-        "status": task.state,
-        "result": task.result if task.ready() else None
+        "status": state,
+        "result": result
     }
 
-@app.post("/api/requests/{request_id}/upload")
-async def upload_image(request_id: int, file: UploadFile = File(...)):
-    """이미지 업로드 (S3)"""
+# multipart 본문을 직접 스트리밍으로 파싱하므로 OpenAPI 문서용 요청 본문은 따로 명시
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"],
+        }}},
+    }
+}
 
-    if not s3_client:
-        raise HTTPException(status_code=501, detail="S3 not configured")
+def attachment_response(row: dict) -> dict:
+    return {
+        **row,
+        "url": storage.url(row["storage_key"]),
+        "thumbnail_url": storage.url(row["thumbnail_key"]) if row["thumbnail_key"] else None,
+    }
 
-    # 파일 확장자 검증
-    allowed_extensions = ['jpg', 'jpeg', 'png', 'gif', 'webp']
-    file_ext = file.filename.split('.')[-1].lower()
-    if file_ext not in allowed_extensions:
-        raise HTTPException(status_code=400, detail="Invalid file type")
+@app.post("/api/requests/{request_id}/upload", openapi_extra=UPLOAD_OPENAPI)
+async def upload_image(
+    request_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    이미지 첨부 (multipart 'file' 필드, 본인 요청 또는 관리자만, 요청당 UPLOAD_MAX_ATTACHMENTS개까지)
 
-    # S3 키 생성
-    s3_key = f"requests/{request_id}/{uuid.uuid4()}.{file_ext}"
+    본문을 받는 대로 저장소(로컬 디스크/S3 multipart)에 쓰고 (UPLOAD_MAX_BYTES 초과 시 413),
+    JPEG/PNG/GIF/WebP는 매직 바이트로 확인합니다. 키는 내용의 SHA-256이라 같은 사진은 한 번만 저장되고,
+    썸네일은 새로 저장된 내용에 대해서만 백그라운드 작업이 만듭니다.
+    """
+    row = await run_db(crud.get_request, request_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if row["user_id"] != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to modify this request")
+    # 본문을 받기 전에 거부 (동시 업로드는 저장할 때 같은 트랜잭션에서 다시 검사)
+    if await run_db(crud.count_attachments, request_id) >= UPLOAD_MAX_ATTACHMENTS:
+        raise HTTPException(status_code=409, detail=f"At most {UPLOAD_MAX_ATTACHMENTS} attachments per request")
+
+    # 해시를 알기 전이므로 임시 키에 쓰고, 끝나면 내용 해시 키로 옮김 (확장자는 판별한 형식)
+    def open_writer(extension: str, content_type: str) -> HashingWriter:
+        return HashingWriter(storage.open_writer(temp_key(extension), content_type))
 
     try:
-        # S3 업로드
-        s3_client.upload_fileobj(
-            file.file,
-            S3_BUCKET,
-            s3_key,
-            ExtraArgs={'ContentType': file.content_type}
-        )
+        upload, filename = await stream_image_upload(request, "file", open_writer, UPLOAD_MAX_BYTES)
+        key = content_key(upload.sha256, upload.key.rsplit(".", 1)[1])
+        created = await run_in_threadpool(storage.commit, upload.key, key, upload.content_type)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-        # URL 생성
-        image_url = f"https://{S3_BUCKET}.s3.{os.getenv('AWS_REGION', 'ap-northeast-2')}.amazonaws.com/{s3_key}"
+    # 같은 내용의 썸네일이 이미 있으면 재사용, 없으면 썸네일 작업을 같은 트랜잭션으로 기록
+    thumb = None if created else await run_db(crud.find_thumbnail_key, upload.sha256)
+    attachment = {
+        "storage_key": key, "sha256": upload.sha256, "content_type": upload.content_type,
+        "size": upload.size, "filename": filename, "thumbnail_key": thumb,
+    }
+    saved = await run_db(
+        crud.add_attachment, request_id, attachment, storage.url(key), storage.url(thumb) if thumb else None,
+        None if thumb else generate_thumbnail.name, str(uuid.uuid4()), UPLOAD_MAX_ATTACHMENTS
+    )
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    row, attachment_row = saved
+    if attachment_row is None:
+        raise HTTPException(status_code=409, detail=f"At most {UPLOAD_MAX_ATTACHMENTS} attachments per request")
+    if not thumb:
+        outbox_relay.notify()
+    await event_bus.publish({"type": "request_updated", "data": row})
 
-        # DB 업데이트
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE requests
-                SET image_url = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (image_url, request_id))
-            conn.commit()
+    return {
+        "image_url": row["image_url"],
+        "attachment": attachment_response(attachment_row),
+        "deduplicated": not created,
+        "content_type": upload.content_type,
+        "size": upload.size,
+        "message": "Image uploaded successfully"
+    }
 
-        return {"image_url": image_url, "message": "Image uploaded successfully"}
+@app.get("/api/requests/{request_id}/attachments", response_model=List[AttachmentResponse])
+async def list_request_attachments(
+    request_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """요청의 첨부 파일 목록 (본인 요청 또는 관리자만)"""
+    row = await run_db(crud.get_request, request_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if row["user_id"] != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to view this request")
+    return [attachment_response(attachment) for attachment in await run_db(crud.list_attachments, request_id)]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+@app.get("/api/files/{key:path}")
+async def get_file(key: str, request: Request):
+    """
+    로컬 저장소 파일 제공 (Range 요청 지원)
+
+    키가 내용 해시라 같은 키의 내용은 바뀌지 않으므로 ETag와 immutable 캐시를 붙입니다.
+    S3 저장소면 S3 주소로 리다이렉트합니다.
+    """
+    if not isinstance(storage, FilesystemStorage):
+        return RedirectResponse(storage.url(key))
+    try:
+        # 업로드 중인 임시 파일은 제공하지 않음
+        if key.startswith("tmp/"):
+            raise FileNotFoundError(key)
+        path = storage.path(key)
+        size = (await run_in_threadpool(path.stat)).st_size
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{path.name}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        iter_file(path, start, end), status_code=206 if byte_range else 200,
+        headers=headers, media_type=guess_content_type(key)
+    )
+
+def request_list_params(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> dict:
+    """목록 조회 공통 필터 (created_from 이상, created_to 미만)"""
+    def to_db_timestamp(value: Optional[datetime]) -> Optional[str]:
+        # CURRENT_TIMESTAMP와 같은 UTC 'YYYY-MM-DD HH:MM:SS' 형식으로 비교
+        if value is None:
+            return None
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    return {
+        "status": status,
+        "category": category,
+        "priority": priority,
+        "created_from": to_db_timestamp(created_from),
+        "created_to": to_db_timestamp(created_to),
+    }
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """fields=id,status,... 파라미터 검증 (없으면 RequestResponse 전체 필드)"""
+    if not fields:
+        return list(RequestResponse.model_fields)
+
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in crud.REQUEST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+async def list_requests_page(filters: dict, limit: int, cursor: Optional[str], fields: Optional[str]):
+    selected = parse_fields(fields)
+    try:
+        rows, next_cursor = await run_db(
+            crud.list_requests, limit=limit, cursor=cursor, fields=selected, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 행은 이미 DB에서 필요한 컬럼만 골라왔으므로 모델 검증 없이 바로 직렬화
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return JSONResponse(content=rows, headers=headers)
 
 @app.get("/api/requests", response_model=List[RequestResponse])
 async def get_all_requests(
-    status: Optional[str] = None,
+    filters: dict = Depends(request_list_params),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_active_admin)
 ):
-    """관리자 전용: 모든 요청 조회"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        if status:
-            cursor.execute("SELECT * FROM requests WHERE status = ? ORDER BY created_at DESC", (status,))
-        else:
-            cursor.execute("SELECT * FROM requests ORDER BY created_at DESC")
-        rows = cursor.fetchall()
+    """
+    관리자 전용: 모든 요청 조회 (최신순)
 
-    return [dict(row) for row in rows]
+    - limit: 페이지 크기 (기본 50, 최대 500)
+    - cursor: 이전 응답의 X-Next-Cursor 헤더 값 (마지막 페이지면 헤더 없음)
+    - fields: 반환할 필드 (예: fields=id,status,category)
+    - status, category, priority, created_from, created_to: 필터
+    """
+    return await list_requests_page(filters, limit, cursor, fields)
 
 @app.get("/api/my-requests", response_model=List[RequestResponse])
 async def get_my_requests(
-    status: Optional[str] = None,
+    filters: dict = Depends(request_list_params),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """사용자 본인의 요청만 조회"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        if status:
-            cursor.execute(
-                "SELECT * FROM requests WHERE user_id = ? AND status = ? ORDER BY created_at DESC",
-                (current_user.id, status)
-            )
-        else:
-            cursor.execute(
-                "SELECT * FROM requests WHERE user_id = ? ORDER BY created_at DESC",
-                (current_user.id,)
-            )
-        rows = cursor.fetchall()
-
-    return [dict(row) for row in rows]
+    """사용자 본인의 요청만 조회 (파라미터는 /api/requests와 동일)"""
+    return await list_requests_page({**filters, "user_id": current_user.id}, limit, cursor, fields)
+
+@app.get("/api/requests/search", response_model=List[SearchResult])
+async def search_requests(
+    q: str = Query(..., min_length=1, max_length=200),
+    filters: dict = Depends(request_list_params),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    요청 전문 검색 (설명/위치, 관리자는 전체, 사용자는 본인 요청만)
+
+    - q: 검색어 (공백으로 나눈 모든 단어 포함, 세 글자 이상 단어가 있으면 관련도순, 아니면 최신순)
+    - limit, cursor: /api/requests와 같은 방식 (X-Next-Cursor 헤더)
+    - status, category, priority, created_from, created_to: 필터
+    - highlight: 일치한 부분을 <mark>로 감싼 HTML (나머지는 이스케이프)
+    """
+    terms = parse_query(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Empty search query")
+    if current_user.role not in ["admin", "super_admin"]:
+        filters = {**filters, "user_id": current_user.id}
+
+    try:
+        rows, next_cursor = await run_db(crud.search_requests, terms, limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    for row in rows:
+        row["highlight"] = {
+            "description": highlight(row["description"], terms),
+            "location": highlight(row["location"], terms),
+        }
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return JSONResponse(content=rows, headers=headers)
+
+@app.get("/api/requests/export")
+async def export_requests(
+    filters: dict = Depends(request_list_params),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    관리자 전용: 요청 이력 전체 스트리밍 내보내기
+
+    - format: ndjson (기본) 또는 csv
+    - gzip: true면 .gz 파일로 압축 전송
+    - 필터는 /api/requests와 동일 (status, category, priority, created_from, created_to)
+    """
+    filename = f"requests.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_requests(format, gzip=gzip, **filters),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @app.get("/api/requests/{request_id}", response_model=RequestResponse)
 async def get_request(
@@ -512,10 +763,7 @@ async def get_request(
     current_user: User = Depends(get_current_user)
 ):
     """요청 상세 조회 (본인 요청 또는 관리자만)"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-        row = cursor.fetchone()
+    row = await run_db(crud.get_request, request_id)
 
     if not row:
         raise HTTPException(status_code=404, detail="Request not found")
@@ -524,7 +772,7 @@ async def get_request(
     if row["user_id"] != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to view this request")
 
-    return dict(row)
+    return row
 
 @app.patch("/api/requests/{request_id}", response_model=RequestResponse)
 async def update_request(
@@ -537,44 +785,17 @@ async def update_request(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can update requests")
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Request not found")
-
-        updates = []
-        values = []
-        if update.status:
-            updates.append("status = ?")
-            values.append(update.status)
-        if update.category:
-            updates.append("category = ?")
-            values.append(update.category)
-        if update.priority:
-            updates.append("priority = ?")
-            values.append(update.priority)
-
-        if updates:
-            updates.append("updated_at = CURRENT_TIMESTAMP")
-            values.append(request_id)
-            cursor.execute(
-                f"UPDATE requests SET {', '.join(updates)} WHERE id = ?",
-                values
-            )
-            conn.commit()
-
-        cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-        row = cursor.fetchone()
+    row = await run_db(crud.update_request, request_id, update.model_dump())
+    if not row:
+        raise HTTPException(status_code=404, detail="Request not found")
 
     # WebSocket으로 실시간 알림
-    await manager.broadcast({
+    await event_bus.publish({
         "type": "request_updated",
-        "data": dict(row)
+        "data": row
     })
 
-    return dict(row)
+    return row
 
 @app.delete("/api/requests/{request_id}")
 async def delete_request(
@@ -582,78 +803,67 @@ async def delete_request(
     current_user: User = Depends(get_current_user)
 ):
     """요청 삭제 (본인 요청 또는 관리자만)"""
-    with get_db() as conn:
-        cursor = conn.cursor()
+    # 요청 존재 여부 및 소유권 확인
+    row = await run_db(crud.get_request, request_id)
 
-        # 요청 존재 여부 및 소유권 확인
-        cursor.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-        row = cursor.fetchone()
-
-        if not row:
-            raise HTTPException(status_code=404, detail="Request not found")
-
-        # 본인 요청이 아니고 관리자도 아니면 거부
-        if row["user_id"] != current_user.id and current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Not authorized to delete this request")
+    if not row:
+        raise HTTPException(status_code=404, detail="Request not found")
 
-        cursor.execute("DELETE FROM requests WHERE id = ?", (request_id,))
-        conn.commit()
+    # 본인 요청이 아니고 관리자도 아니면 거부
+    if row["user_id"] != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to delete this request")
 
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Request not found")
+    deleted = await run_db(crud.delete_request, request_id)
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Request not found")
 
     return {"message": "Request deleted successfully"}
 
 @app.get("/api/stats")
 async def get_stats(current_user: User = Depends(get_current_active_admin)):
     """통계 조회 (관리자 전용)"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) as total FROM requests")
-        total = cursor.fetchone()["total"]
-
-        cursor.execute("SELECT status, COUNT(*) as count FROM requests GROUP BY status")
-        status_counts = {row["status"]: row["count"] for row in cursor.fetchall()}
+    return await run_db(crud.get_stats)
 
-        cursor.execute("SELECT category, COUNT(*) as count FROM requests GROUP BY category")
-        category_counts = {row["category"]: row["count"] for row in cursor.fetchall()}
-
-        cursor.execute("SELECT priority, COUNT(*) as count FROM requests GROUP BY priority")
-        priority_counts = {row["priority"]: row["count"] for row in cursor.fetchall()}
+@app.get("/api/stats/series")
+async def get_stats_series(
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    기간별 통계 (관리자 전용)
 
-    return {
-        "total": total,
-        "by_status": status_counts,
-        "by_category": category_counts,
-        "by_priority": priority_counts
-    }
+    - bucket: day 또는 week (월요일 시작)
+    - date_from 이상, date_to 미만 (YYYY-MM-DD)
+    """
+    return await run_db(
+        crud.get_stats_series,
+        bucket,
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None
+    )
 
 # 인증 엔드포인트
 @app.post("/api/auth/register", response_model=User)
 @limiter.limit("5/minute")  # 1분에 5번까지만 회원가입 시도 가능
 async def register(request: Request, user: UserCreate):
     """회원가입 - Rate Limited: 5 requests/minute"""
-    with get_db() as conn:
-        cursor = conn.cursor()
+    # 이메일 중복 확인
+    if await run_db(crud.get_user_by_email, user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-        # 이메일 중복 확인
-        cursor.execute("SELECT * FROM users WHERE email = ?", (user.email,))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
+    # 비밀번호 해시화 (해싱 풀에서 실행)
+    hashed_password = await hashing_pool.hash_password(user.password)
 
-        # 비밀번호 해시화
-        hashed_password = get_password_hash(user.password)
-
-        # 사용자 생성
-        cursor.execute("""
-            INSERT INTO users (email, hashed_password, full_name)
-            VALUES (?, ?, ?)
-        """, (user.email, hashed_password, user.full_name))
-        conn.commit()
+    # 사용자 생성
+    try:
+        new_user = await run_db(crud.create_user, user.email, hashed_password, user.full_name)
+    except sqlite3.IntegrityError:
+        # 동시에 같은 이메일로 가입한 경우
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-        cursor.execute("SELECT * FROM users WHERE email = ?", (user.email,))
-        new_user = cursor.fetchone()
+    user_cache.invalidate(new_user["email"])
 
     return User(
         id=new_user["id"],
@@ -666,12 +876,9 @@ async def register(request: Request, user: UserCreate):
 @limiter.limit("10/minute")  # 1분에 10번까지만 로그인 시도 가능 (brute force 방지)
 async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """로그인 - Rate Limited: 10 requests/minute"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = ?", (form_data.username,))
-        user = cursor.fetchone()
+    user = await run_db(crud.get_user_by_email, form_data.username)
 
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await hashing_pool.verify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password",
@@ -695,10 +902,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
 @app.get("/api/admin/users", response_model=List[User])
 async def get_all_users(current_user: User = Depends(get_current_super_admin)):
     """최고 관리자 전용: 모든 사용자 목록 조회"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, email, full_name, role, created_at FROM users ORDER BY created_at DESC")
-        users = cursor.fetchall()
+    users = await run_db(crud.list_users)
 
     return [
         User(
@@ -728,19 +932,15 @@ async def update_user_role(
     if user_id == current_user.id:
         raise HTTPException(status_code=403, detail="Cannot modify your own role")
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 사용자 존재 확인
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        target_user = cursor.fetchone()
+    # 사용자 존재 확인
+    target_user = await run_db(crud.get_user_by_id, user_id)
 
-        if not target_user:
-            raise HTTPException(status_code=404, detail="User not found")
+    if not target_user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        # 역할 업데이트
-        cursor.execute("UPDATE users SET role = ? WHERE id = ?", (new_role, user_id))
-        conn.commit()
+    # 역할 업데이트 (캐시된 이전 역할이 쓰이지 않도록 무효화)
+    await run_db(crud.update_user_role, user_id, new_role)
+    user_cache.invalidate(target_user["email"])
 
     return {
         "message": f"User role updated successfully",
@@ -749,16 +949,67 @@ async def update_user_role(
         "new_role": new_role
     }
 
+@app.get("/api/admin/duplicates", response_model=List[DuplicateCluster])
+async def get_duplicate_clusters(
+    limit: int = Query(50, ge=1, le=500),
+    open_only: bool = False,
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    관리자 전용: 중복 신고 묶음 (원본 요청과 연결된 중복 요청 ID, 가장 최근 중복 신고 순)
+
+    - open_only: true면 완료되지 않은 원본만
+    """
+    return await run_db(crud.list_duplicate_clusters, limit=limit, open_only=open_only)
+
+@app.get("/api/admin/metrics")
+async def get_metrics(current_user: User = Depends(get_current_active_admin)):
+    """관리자 전용: 내부 성능 메트릭 (DB 연결 풀, 사용자 캐시 등)"""
+    return {
+        "db_pool": pool_stats(),
+        "user_cache": user_cache.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "event_bus": event_bus.stats(),
+        "websockets": manager.stats(),
+        "llm": llm_client.stats(),
+        "llm_circuit_breaker": groq_breaker.stats(),
+        "llm_rate_limiter": groq_rate_limiter.stats(),
+        "categorization_cache": categorization_cache.stats(),
+        "local_classifier": local_classifier.stats(),
+        "duplicate_detector": duplicate_detector.stats(),
+        "outbox": {**outbox_relay.stats(), "pending": await run_db(crud.count_outbox)}
+    }
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """실시간 알림용 WebSocket"""
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    """
+    실시간 알림용 WebSocket
+
+    1. 인증: {"type": "auth", "token": "<JWT>"} 전송 (또는 /ws?token=<JWT>)
+    2. 구독: {"type": "subscribe", "topics": ["own"]}
+       - own: 본인 요청 / category:<카테고리>, all: 관리자 전용
+    구독한 토픽의 이벤트만 전달됩니다 (프로토콜 상세는 realtime.py 참고).
+    """
     await manager.connect(websocket)
     try:
-        while True:
-            # 클라이언트로부터 메시지 수신 (연결 유지용)
-            await websocket.receive_text()
+        if token:
+            await manager.handle_message(websocket, {"type": "auth", "token": token})
+        # 느린 소비자로 끊기면 manager가 종료 프레임을 보내므로 더 읽지 않고 끝냄
+        while manager.is_connected(websocket):
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                # JSON이 아닌 메시지는 연결 유지용(ping)으로 간주
+                continue
+            if isinstance(message, dict):
+                await manager.handle_message(websocket, message)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+    except RuntimeError:
+        # 읽는 중에 manager가 연결을 닫음 (Starlette는 닫힌 소켓의 receive에서 RuntimeError)
+        if manager.is_connected(websocket):
+            raise
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,358 @@
+"""
+버전 관리되는 스키마 마이그레이션
+
+MIGRATIONS에 (버전, 이름, SQL 목록)을 순서대로 추가합니다.
+적용된 버전은 schema_migrations 테이블에 기록되므로
+서버 시작 시에는 아직 적용되지 않은 마이그레이션만 실행됩니다.
+
+사용법:
+    from migrations import migrate
+    with get_db() as conn:
+        migrate(conn)
+
+    python init_db.py   # CLI
+"""
+
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            hashed_password VARCHAR(255) NOT NULL,
+            full_name VARCHAR(100),
+            role VARCHAR(20) DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            description TEXT NOT NULL,
+            category VARCHAR(50),
+            priority VARCHAR(20),
+            status VARCHAR(20) DEFAULT 'pending',
+            location VARCHAR(100),
+            contact_info VARCHAR(100),
+            image_url VARCHAR(500),
+            task_id VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+    ]),
+    (2, "request indexes", [
+        # 목록 조회: 본인 요청 / 상태 필터 / 전체를 최신순 정렬
+        "CREATE INDEX IF NOT EXISTS idx_requests_user_created ON requests (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_requests_status_created ON requests (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_requests_created ON requests (created_at)",
+        # 통계 GROUP BY용 커버링 인덱스 (테이블 본문을 읽지 않음)
+        "CREATE INDEX IF NOT EXISTS idx_requests_category_priority ON requests (category, priority)",
+        "CREATE INDEX IF NOT EXISTS idx_requests_priority ON requests (priority)",
+        # cleanup_old_requests: status = 'completed' AND updated_at < ?
+        "CREATE INDEX IF NOT EXISTS idx_requests_status_updated ON requests (status, updated_at)",
+        "ANALYZE",
+    ]),
+    (3, "listing filter indexes", [
+        # 카테고리/우선순위 필터 + 최신순 정렬 (키셋 페이지네이션)
+        "CREATE INDEX IF NOT EXISTS idx_requests_category_created ON requests (category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_requests_priority_created ON requests (priority, created_at)",
+    ]),
+    (4, "incremental request stats", [
+        """
+        CREATE TABLE IF NOT EXISTS request_stats (
+            dimension VARCHAR(20) NOT NULL,
+            value VARCHAR(50) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS request_stats_daily (
+            day DATE NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            priority VARCHAR(20) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category, priority)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_stats_insert AFTER INSERT ON requests
+        BEGIN
+            INSERT INTO request_stats (dimension, value, count) VALUES
+                ('total', '', 1),
+                ('status', IFNULL(NEW.status, ''), 1),
+                ('category', IFNULL(NEW.category, ''), 1),
+                ('priority', IFNULL(NEW.priority, ''), 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+
+            INSERT INTO request_stats_daily (day, category, priority, count)
+            VALUES (IFNULL(date(NEW.created_at), date('now')), IFNULL(NEW.category, ''), IFNULL(NEW.priority, ''), 1)
+            ON CONFLICT (day, category, priority) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_stats_delete AFTER DELETE ON requests
+        BEGIN
+            UPDATE request_stats SET count = count - 1
+            WHERE (dimension, value) IN (VALUES
+                ('total', ''),
+                ('status', IFNULL(OLD.status, '')),
+                ('category', IFNULL(OLD.category, '')),
+                ('priority', IFNULL(OLD.priority, ''))
+            );
+
+            UPDATE request_stats_daily SET count = count - 1
+            WHERE day = IFNULL(date(OLD.created_at), date('now'))
+              AND category = IFNULL(OLD.category, '')
+              AND priority = IFNULL(OLD.priority, '');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_stats_update
+        AFTER UPDATE OF status, category, priority, created_at ON requests
+        BEGIN
+            UPDATE request_stats SET count = count - 1
+            WHERE (dimension = 'status' AND value = IFNULL(OLD.status, '') AND OLD.status IS NOT NEW.status)
+               OR (dimension = 'category' AND value = IFNULL(OLD.category, '') AND OLD.category IS NOT NEW.category)
+               OR (dimension = 'priority' AND value = IFNULL(OLD.priority, '') AND OLD.priority IS NOT NEW.priority);
+
+            INSERT INTO request_stats (dimension, value, count)
+            SELECT 'status', IFNULL(NEW.status, ''), 1 WHERE OLD.status IS NOT NEW.status
+            UNION ALL
+            SELECT 'category', IFNULL(NEW.category, ''), 1 WHERE OLD.category IS NOT NEW.category
+            UNION ALL
+            SELECT 'priority', IFNULL(NEW.priority, ''), 1 WHERE OLD.priority IS NOT NEW.priority
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+
+            UPDATE request_stats_daily SET count = count - 1
+            WHERE day = IFNULL(date(OLD.created_at), date('now'))
+              AND category = IFNULL(OLD.category, '')
+              AND priority = IFNULL(OLD.priority, '')
+              AND (OLD.category IS NOT NEW.category OR OLD.priority IS NOT NEW.priority
+                   OR date(OLD.created_at) IS NOT date(NEW.created_at));
+
+            INSERT INTO request_stats_daily (day, category, priority, count)
+            SELECT IFNULL(date(NEW.created_at), date('now')), IFNULL(NEW.category, ''), IFNULL(NEW.priority, ''), 1
+            WHERE OLD.category IS NOT NEW.category OR OLD.priority IS NOT NEW.priority
+               OR date(OLD.created_at) IS NOT date(NEW.created_at)
+            ON CONFLICT (day, category, priority) DO UPDATE SET count = count + 1;
+        END
+        """,
+        # 기존 데이터로 초기 적재 (이 시점 스키마 기준으로 고정 - stats.REBUILD_SQL이 바뀌어도 그대로 둘 것)
+        "DELETE FROM request_stats",
+        "DELETE FROM request_stats_daily",
+        "INSERT INTO request_stats (dimension, value, count) SELECT 'total', '', COUNT(*) FROM requests",
+        """
+        INSERT INTO request_stats (dimension, value, count)
+        SELECT 'status', IFNULL(status, ''), COUNT(*) FROM requests GROUP BY 2
+        """,
+        """
+        INSERT INTO request_stats (dimension, value, count)
+        SELECT 'category', IFNULL(category, ''), COUNT(*) FROM requests GROUP BY 2
+        """,
+        """
+        INSERT INTO request_stats (dimension, value, count)
+        SELECT 'priority', IFNULL(priority, ''), COUNT(*) FROM requests GROUP BY 2
+        """,
+        """
+        INSERT INTO request_stats_daily (day, category, priority, count)
+        SELECT IFNULL(date(created_at), date('now')), IFNULL(category, ''), IFNULL(priority, ''), COUNT(*)
+        FROM requests GROUP BY 1, 2, 3
+        """,
+    ]),
+    (5, "task outbox", [
+        # 요청과 같은 트랜잭션으로 기록하고 릴레이(outbox.py)가 Celery로 발행한 뒤 삭제
+        """
+        CREATE TABLE IF NOT EXISTS task_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id VARCHAR(100) UNIQUE NOT NULL,
+            task_name VARCHAR(100) NOT NULL,
+            args TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # 발행할 차례가 된 작업 조회 (available_at <= now)
+        "CREATE INDEX IF NOT EXISTS idx_task_outbox_available ON task_outbox (available_at, id)",
+    ]),
+    (6, "task outbox priority", [
+        # Celery 메시지 우선순위 (NULL이면 celery_app.task_routes의 기본값)
+        "ALTER TABLE task_outbox ADD COLUMN priority INTEGER",
+    ]),
+    (7, "category label source", [
+        # 분류 결과를 누가 정했는지: llm / local / keyword / manual (NULL: 대기 중이거나 기록 이전 행)
+        # 로컬 분류기는 llm/manual 라벨로만 학습 (local_classifier.load_training_data)
+        "ALTER TABLE requests ADD COLUMN category_source VARCHAR(20)",
+    ]),
+    (8, "categorization claims", [
+        # 분류 작업이 가져간 요청 (이 시각 전에는 다른 작업이 가져가지 않음, crud.claim_pending_categorizations)
+        "ALTER TABLE requests ADD COLUMN claimed_until REAL",
+        # 일괄 접수 요청 (categorize_requests만 분류하고 대기 요청 배치(categorize_batch)는 건너뜀)
+        "ALTER TABLE requests ADD COLUMN bulk INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (9, "image thumbnails", [
+        # 업로드 후 tasks.generate_thumbnail이 만든 WebP 썸네일 (목록/상세 화면은 원본 대신 사용)
+        "ALTER TABLE requests ADD COLUMN thumbnail_url VARCHAR(500)",
+    ]),
+    (10, "attachments", [
+        # 요청당 여러 첨부 파일 (requests.image_url/thumbnail_url은 가장 최근 첨부를 가리킴)
+        # storage_key는 내용의 SHA-256이라 같은 파일은 저장소에 한 번만 저장되고 여러 행이 공유
+        # (기존 image_url은 내용 해시를 알 수 없어 옮기지 않음)
+        """
+        CREATE TABLE IF NOT EXISTS attachments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            storage_key VARCHAR(200) NOT NULL,
+            sha256 CHAR(64) NOT NULL,
+            content_type VARCHAR(50) NOT NULL,
+            size INTEGER NOT NULL,
+            filename VARCHAR(255),
+            thumbnail_key VARCHAR(200),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (request_id, sha256)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments (sha256)",
+        "CREATE INDEX IF NOT EXISTS idx_attachments_storage_key ON attachments (storage_key)",
+        # 요청이 삭제되면 (API 또는 cleanup_old_requests) 첨부 행도 삭제 (파일은 다른 요청이 공유할 수 있어 유지)
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_delete_attachments AFTER DELETE ON requests
+        BEGIN
+            DELETE FROM attachments WHERE request_id = OLD.id;
+        END
+        """,
+    ]),
+    (11, "request full-text search", [
+        # description/location 전문 검색 인덱스 (search.py, crud.search_requests)
+        # external content 테이블이라 본문은 requests에만 저장하고 인덱스만 따로 가짐
+        # trigram 토크나이저: 형태소 분석 없이 한국어 부분 문자열 검색 (세 글자 이상)
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(
+            description, location,
+            content='requests', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        # 요청 추가/삭제/수정과 같은 트랜잭션에서 인덱스 갱신 (일괄 접수, cleanup_old_requests 포함)
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_fts_insert AFTER INSERT ON requests
+        BEGIN
+            INSERT INTO requests_fts (rowid, description, location) VALUES (NEW.id, NEW.description, NEW.location);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_fts_delete AFTER DELETE ON requests
+        BEGIN
+            INSERT INTO requests_fts (requests_fts, rowid, description, location)
+            VALUES ('delete', OLD.id, OLD.description, OLD.location);
+        END
+        """,
+        # 상태/분류 갱신은 인덱스를 건드리지 않도록 검색 대상 컬럼이 바뀔 때만
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_fts_update AFTER UPDATE OF description, location ON requests
+        BEGIN
+            INSERT INTO requests_fts (requests_fts, rowid, description, location)
+            VALUES ('delete', OLD.id, OLD.description, OLD.location);
+            INSERT INTO requests_fts (rowid, description, location) VALUES (NEW.id, NEW.description, NEW.location);
+        END
+        """,
+        # 기존 행 색인
+        "INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')",
+    ]),
+    (12, "duplicate request detection", [
+        # 접수 시 중복 감지 (duplicates.py): 연결된 원본 요청
+        # 원본의 분류를 가져온 중복 요청은 category_source = 'duplicate' (로컬 분류기 학습에서 제외)
+        "ALTER TABLE requests ADD COLUMN duplicate_of INTEGER",
+        "CREATE INDEX IF NOT EXISTS idx_requests_duplicate_of ON requests (duplicate_of)",
+        # 위치가 있는 요청의 설명 MinHash 서명 (requests 행/이벤트에 바이너리가 섞이지 않도록 별도 테이블)
+        # 기존 요청은 서명이 없어 비교 대상이 아님 - 이후 접수된 요청부터
+        """
+        CREATE TABLE IF NOT EXISTS request_signatures (
+            request_id INTEGER PRIMARY KEY,
+            location_key VARCHAR(100) NOT NULL,
+            minhash BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # 같은 위치의 최근 요청 후보 조회
+        "CREATE INDEX IF NOT EXISTS idx_request_signatures_location ON request_signatures (location_key, created_at)",
+        # 요청이 삭제되면 서명도 삭제하고, 원본이었다면 연결만 끊음 (중복 요청은 그대로 남음)
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_requests_delete_duplicates AFTER DELETE ON requests
+        BEGIN
+            DELETE FROM request_signatures WHERE request_id = OLD.id;
+            UPDATE requests SET duplicate_of = NULL WHERE duplicate_of = OLD.id;
+        END
+        """,
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def current_version(conn) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, target: int = None) -> list:
+    """
+    적용되지 않은 마이그레이션을 버전 순서대로 실행
+
+    각 마이그레이션은 하나의 트랜잭션으로 적용됩니다.
+    여러 워커가 동시에 시작해도 BEGIN IMMEDIATE로 쓰기 잠금을 잡은 뒤
+    버전을 다시 확인하므로 같은 마이그레이션이 두 번 실행되지 않습니다.
+
+    Returns:
+        이번에 적용된 버전 목록
+    """
+    latest = MIGRATIONS[-1][0]
+    target = latest if target is None else target
+
+    # 빠른 경로: 이미 최신이면 아무것도 하지 않음
+    if current_version(conn) >= target:
+        return []
+
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if version > target:
+            break
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            already = conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+            ).fetchone()
+            if already:
+                conn.rollback()
+                continue
+
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                (version, name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        print(f"Applied migration {version}: {name}")
+        applied.append(version)
+
+    return applied
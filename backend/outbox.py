@@ -0,0 +1,202 @@
+"""
+트랜잭션 아웃박스 릴레이
+
+요청 접수 시 Celery 작업을 바로 발행하지 않고 요청과 같은 트랜잭션으로 task_outbox에 기록합니다
+(crud.insert_request_with_task). 릴레이가 기록된 작업을 묶음으로 가져와 브로커 연결 하나로 발행하고,
+발행에 성공한 작업만 삭제하므로 Redis가 잠시 내려가 있어도 작업이 유실되지 않습니다.
+
+- 작업 ID는 접수 시 미리 만들어 요청 행에 저장 → task-status 조회가 바로 가능
+- 발행 실패 시 attempts에 따라 지수 백오프 (최대 OUTBOX_MAX_BACKOFF초) 후 재시도
+- 여러 릴레이가 동시에 실행되어도 claim 시 lease를 걸어 같은 작업을 중복 발행하지 않음
+  (발행 도중 릴레이가 죽으면 lease가 끝난 뒤 다시 발행되므로 작업은 최소 한 번 전달)
+
+실행:
+    API 프로세스 안 (OUTBOX_RELAY=inline, 기본값): 접수 직후 깨어나 바로 발행
+    별도 프로세스: python outbox.py
+
+환경변수:
+    OUTBOX_RELAY           inline 또는 off (off면 API 프로세스에서는 릴레이를 실행하지 않음)
+    OUTBOX_BATCH_SIZE      한 번에 발행할 최대 작업 수 (기본값: 100)
+    OUTBOX_POLL_INTERVAL   새 작업 확인 주기, 초 (기본값: 1)
+    OUTBOX_LEASE           발행 중인 작업을 다른 릴레이가 가져가지 못하는 시간, 초 (기본값: 30)
+    OUTBOX_MAX_BACKOFF     발행 실패 시 최대 재시도 간격, 초 (기본값: 60)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+import crud
+from database import get_db
+
+load_dotenv()
+
+
+class DispatchError(Exception):
+    """묶음 발행 중 실패 (sent: 실패 전까지 발행된 작업 수)"""
+
+    def __init__(self, sent: int, error: Exception):
+        super().__init__(f"{type(error).__name__}: {error}")
+        self.sent = sent
+
+
+def celery_sender():
+    """브로커 연결 하나로 여러 작업을 발행하는 send(jobs) 함수"""
+    from celery_app import celery_app
+
+    def send(jobs: list):
+        # 한 작업씩 발행하다 실패하면 예외와 함께 그때까지 발행한 수를 알려줌
+        sent = 0
+        with celery_app.producer_or_acquire() as producer:
+            for job in jobs:
+                try:
+                    # kombu 내부 재시도 대신 릴레이의 백오프로 재시도
+                    options = {} if job.get("priority") is None else {"priority": job["priority"]}
+                    celery_app.send_task(job["task_name"], args=job["args"], task_id=job["task_id"],
+                                         producer=producer, retry=False, **options)
+                except Exception as e:
+                    raise DispatchError(sent, e) from e
+                sent += 1
+        return sent
+
+    return send
+
+
+class OutboxRelay:
+    def __init__(self, send=None, batch_size: int = 100, poll_interval: float = 1.0,
+                 lease: float = 30.0, max_backoff: float = 60.0):
+        self._send = send
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_backoff = max_backoff
+        self._task = None
+        self._wake = None
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.batches = 0
+        self.dispatched = 0
+        self.failures = 0
+        self.last_error = None
+
+    def _sender(self):
+        if self._send is None:
+            self._send = celery_sender()
+        return self._send
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.max_backoff, 2.0 ** (attempts - 1))
+
+    def dispatch_batch(self) -> int:
+        """발행할 차례가 된 작업을 최대 batch_size개 발행하고 발행한 수를 반환"""
+        now = time.time()
+        with get_db() as conn:
+            jobs = crud.claim_outbox(conn, self.batch_size, now, self.lease)
+        if not jobs:
+            return 0
+
+        try:
+            sent = self._sender()(jobs)
+            error = None
+        except DispatchError as e:
+            sent, error = e.sent, str(e)
+        except Exception as e:
+            sent, error = 0, f"{type(e).__name__}: {e}"
+
+        with get_db() as conn:
+            crud.delete_outbox(conn, [job["id"] for job in jobs[:sent]])
+            if error:
+                # 실패한 작업과 아직 발행하지 못한 작업은 백오프 후 다시 시도
+                crud.reschedule_outbox(conn, [
+                    (job["id"], now + self.backoff(job["attempts"]), error) for job in jobs[sent:]
+                ])
+
+        with self._lock:
+            self.batches += 1
+            self.dispatched += sent
+            if error:
+                self.failures += 1
+                self.last_error = error
+        if error:
+            print(f"[OUTBOX] Dispatch failed after {sent}/{len(jobs)} tasks: {error}")
+        return sent
+
+    def drain(self) -> int:
+        """발행할 작업이 없거나 발행이 실패할 때까지 반복"""
+        total = 0
+        while True:
+            sent = self.dispatch_batch()
+            total += sent
+            if sent < self.batch_size:
+                return total
+
+    def notify(self):
+        """새 작업이 기록되었음을 알려 다음 주기를 기다리지 않고 발행"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # DB/브로커 호출은 이벤트 루프 밖에서
+                await loop.run_in_executor(None, self.drain)
+            except Exception as e:
+                print(f"[OUTBOX] Relay error: {type(e).__name__}: {e}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+
+    def run_forever(self):
+        """별도 릴레이 프로세스용 (python outbox.py)"""
+        print(f"[OUTBOX] Relay started (batch {self.batch_size}, poll {self.poll_interval}s)")
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"[OUTBOX] Relay error: {type(e).__name__}: {e}")
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None and not self._task.done(),
+                "batch_size": self.batch_size,
+                "batches": self.batches,
+                "dispatched": self.dispatched,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+
+INLINE_RELAY = os.getenv("OUTBOX_RELAY", "inline") == "inline"
+
+outbox_relay = OutboxRelay(
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", "1")),
+    lease=float(os.getenv("OUTBOX_LEASE", "30")),
+    max_backoff=float(os.getenv("OUTBOX_MAX_BACKOFF", "60")),
+)
+
+
+if __name__ == "__main__":
+    outbox_relay.run_forever()
@@ -0,0 +1,282 @@
+"""
+WebSocket 연결 관리
+
+클라이언트마다 크기가 제한된 송신 큐와 전용 writer 태스크를 둡니다.
+broadcast()는 이벤트를 한 번만 JSON으로 인코딩해 각 큐에 넣기만 하고 바로 반환하므로
+느린 클라이언트 하나가 다른 클라이언트나 이벤트를 발생시킨 HTTP 요청을 지연시키지 않습니다.
+
+- 큐가 가득 찬 클라이언트(느린 소비자)는 연결을 끊음
+- 전송 실패/시간 초과한 연결은 자동으로 정리
+
+구독 프로토콜 (클라이언트 → 서버, JSON 텍스트):
+    {"type": "auth", "token": "<JWT>"}                 → {"type": "auth_ok", ...}
+    {"type": "subscribe", "topics": ["own"]}           → {"type": "subscribed", "topics": [...]}
+    {"type": "unsubscribe", "topics": ["own"]}
+
+토픽:
+    own                 본인 요청 이벤트 (모든 로그인 사용자)
+    category:<카테고리>  해당 카테고리 이벤트 (관리자 전용)
+    all                 모든 이벤트 (관리자 전용)
+
+이벤트는 토픽별 소켓 인덱스로 라우팅되어 관심 있는 소켓에만 전달되고,
+인증/구독하지 않은 소켓은 이벤트를 받지 않습니다.
+
+환경변수:
+    WS_QUEUE_SIZE      클라이언트별 최대 대기 메시지 수 (기본값: 100)
+    WS_SEND_TIMEOUT    메시지 하나 전송 제한 시간, 초 (기본값: 5)
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional, Set, Union
+
+from fastapi import HTTPException, WebSocket
+
+from auth import User, authenticate_token
+from events import encode_event
+
+# 느린 소비자 연결 종료 코드 (1013: Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+ADMIN_ROLES = ("admin", "super_admin")
+
+# 클라이언트 하나가 구독할 수 있는 최대 토픽 수
+MAX_TOPICS_PER_CLIENT = 20
+
+
+class SubscriptionError(Exception):
+    """잘못된 토픽이거나 권한이 없는 토픽"""
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.writer = None
+        self.user: Optional[User] = None
+        self.topics: Set[str] = set()
+
+
+class ConnectionManager:
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, _Client] = {}
+        # 라우팅 인덱스: 내부 토픽 키 -> 구독 중인 클라이언트
+        self.subscriptions: Dict[str, Set[_Client]] = {}
+        self._closing = set()
+
+        # 메트릭
+        self.broadcasts = 0
+        self.deliveries = 0
+        self.messages_sent = 0
+        self.slow_consumers_evicted = 0
+        self.send_failures = 0
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
+
+    def is_connected(self, websocket: WebSocket) -> bool:
+        """관리 중인 연결인지 (느린 소비자로 끊겼거나 정리된 연결이면 False)"""
+        return websocket in self.clients
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = _Client(websocket, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.clients[websocket] = client
+
+    def disconnect(self, websocket: WebSocket):
+        """연결 정리 (여러 번 호출해도 안전)"""
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        self._remove_topics(client, set(client.topics))
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def _close(self, client: _Client, code: int):
+        self.disconnect(client.websocket)
+        try:
+            await asyncio.wait_for(client.websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def _writer(self, client: _Client):
+        while True:
+            text = await client.queue.get()
+            try:
+                await asyncio.wait_for(client.websocket.send_text(text), timeout=self.send_timeout)
+                self.messages_sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 끊긴 연결이거나 전송이 제한 시간을 넘김
+                self.send_failures += 1
+                await self._close(client, code=1011)
+                return
+
+    def _enqueue(self, client: _Client, text: str):
+        try:
+            client.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # 종료 프레임 전송도 느릴 수 있으므로 별도 태스크에서 닫음
+            self.slow_consumers_evicted += 1
+            self.disconnect(client.websocket)
+            task = asyncio.create_task(self._close(client, code=SLOW_CONSUMER_CLOSE_CODE))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def send_personal(self, websocket: WebSocket, message: dict):
+        """특정 클라이언트에게만 전송 (프로토콜 응답 등)"""
+        client = self.clients.get(websocket)
+        if client:
+            self._enqueue(client, encode_event(message))
+
+    # ---------- 구독 ----------
+
+    def _resolve_topic(self, client: _Client, topic: str) -> str:
+        """클라이언트 토픽 이름을 내부 라우팅 키로 변환 (권한 검사 포함)"""
+        if client.user is None:
+            raise SubscriptionError("Authenticate first")
+        is_admin = client.user.role in ADMIN_ROLES
+
+        if topic == "own":
+            return f"user:{client.user.id}"
+        if topic == "all" and is_admin:
+            return "all"
+        if topic.startswith("category:") and len(topic) > len("category:") and is_admin:
+            return topic
+        raise SubscriptionError(f"Topic not allowed: {topic}")
+
+    def _remove_topics(self, client: _Client, keys: Set[str]):
+        for key in keys:
+            subscribers = self.subscriptions.get(key)
+            if subscribers:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.subscriptions[key]
+        client.topics -= keys
+
+    async def authenticate(self, websocket: WebSocket, token: str) -> Optional[User]:
+        """인증 (이미 끊긴 연결이면 None)"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return None
+        user = await authenticate_token(token)
+        if client.user is not None and client.user.id != user.id:
+            # 다른 사용자로 재인증하면 이전 구독은 모두 해제
+            self._remove_topics(client, set(client.topics))
+        client.user = user
+        return user
+
+    def subscribe(self, websocket: WebSocket, topics: list) -> Optional[list]:
+        """구독 후 전체 구독 토픽 목록 (이미 끊긴 연결이면 None - 라우팅 인덱스에 다시 넣지 않음)"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return None
+        keys = {self._resolve_topic(client, topic) for topic in topics}
+        if len(client.topics | keys) > MAX_TOPICS_PER_CLIENT:
+            raise SubscriptionError(f"At most {MAX_TOPICS_PER_CLIENT} topics per connection")
+        for key in keys:
+            self.subscriptions.setdefault(key, set()).add(client)
+        client.topics |= keys
+        return sorted(client.topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: list) -> Optional[list]:
+        """구독 해제 후 남은 토픽 목록 (이미 끊긴 연결이면 None)"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return None
+        keys = set()
+        for topic in topics:
+            try:
+                keys.add(self._resolve_topic(client, topic))
+            except SubscriptionError:
+                continue
+        self._remove_topics(client, keys)
+        return sorted(client.topics)
+
+    async def handle_message(self, websocket: WebSocket, message: dict):
+        """
+        클라이언트 프로토콜 메시지 처리
+
+        느린 소비자로 끊긴 직후 도착한 메시지처럼 이미 정리된 연결의 메시지는 무시합니다.
+        """
+        kind = message.get("type")
+        try:
+            if kind == "auth":
+                user = await self.authenticate(websocket, str(message.get("token", "")))
+                if user is None:
+                    return
+                await self.send_personal(websocket, {
+                    "type": "auth_ok",
+                    "user": {"id": user.id, "email": user.email, "role": user.role}
+                })
+            elif kind == "subscribe":
+                topics = self.subscribe(websocket, list(message.get("topics", [])))
+                if topics is None:
+                    return
+                await self.send_personal(websocket, {"type": "subscribed", "topics": topics})
+            elif kind == "unsubscribe":
+                topics = self.unsubscribe(websocket, list(message.get("topics", [])))
+                if topics is None:
+                    return
+                await self.send_personal(websocket, {"type": "subscribed", "topics": topics})
+        except HTTPException as e:
+            await self.send_personal(websocket, {"type": "error", "detail": e.detail})
+        except SubscriptionError as e:
+            await self.send_personal(websocket, {"type": "error", "detail": str(e)})
+
+    # ---------- 이벤트 전달 ----------
+
+    @staticmethod
+    def event_topics(message: dict) -> list:
+        """이벤트가 전달될 내부 토픽 키 목록"""
+        data = message.get("data") or {}
+        topics = ["all"]
+        if data.get("user_id") is not None:
+            topics.append(f"user:{data['user_id']}")
+        if data.get("category"):
+            topics.append(f"category:{data['category']}")
+        return topics
+
+    async def broadcast(self, message: Union[dict, str]):
+        """
+        이벤트를 구독 중인 클라이언트 큐에만 추가 (전송을 기다리지 않음)
+
+        이미 인코딩된 문자열을 받으면 라우팅 정보가 없으므로 "all" 구독자에게만 전달합니다.
+        """
+        if isinstance(message, str):
+            text, topics = message, ["all"]
+        else:
+            text, topics = encode_event(message), self.event_topics(message)
+        self.broadcasts += 1
+
+        recipients = set()
+        for topic in topics:
+            recipients |= self.subscriptions.get(topic, set())
+
+        for client in recipients:
+            self.deliveries += 1
+            self._enqueue(client, text)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.clients),
+            "queued_messages": sum(client.queue.qsize() for client in self.clients.values()),
+            "authenticated": sum(1 for client in self.clients.values() if client.user is not None),
+            "topics": len(self.subscriptions),
+            "broadcasts": self.broadcasts,
+            "deliveries": self.deliveries,
+            "messages_sent": self.messages_sent,
+            "slow_consumers_evicted": self.slow_consumers_evicted,
+            "send_failures": self.send_failures,
+        }
+
+
+manager = ConnectionManager(
+    queue_size=int(os.getenv("WS_QUEUE_SIZE", "100")),
+    send_timeout=float(os.getenv("WS_SEND_TIMEOUT", "5")),
+)
@@ -0,0 +1,358 @@
+"""
+외부 API(Groq) 보호: 서킷 브레이커 + 토큰 버킷 속도 제한
+
+Groq가 느리거나 할당량이 바닥나면 호출마다 제한 시간까지 기다린 뒤에야 폴백하게 되어
+부하가 가장 클 때 응답 시간이 무너집니다.
+
+- CircuitBreaker: 연속 실패가 failure_threshold번이면 열림(open) → recovery_timeout 동안
+  호출하지 않고 즉시 CircuitOpenError (호출한 쪽은 바로 폴백 분류기 사용)
+  → 시간이 지나면 반열림(half-open)으로 시험 호출 몇 개만 허용 → 성공하면 닫힘(closed)
+- TokenBucket / RedisTokenBucket: 제공자 할당량(분당 요청 수)에 맞춰 호출을 제한.
+  429 응답이나 남은 요청 수 0 헤더를 받으면 안내된 시간 동안 버킷을 비워 둠(적응형)
+
+RedisTokenBucket은 모든 API/Celery 워커가 할당량 하나를 나눠 쓰도록 Redis에 상태를 두고,
+Redis 오류 시에는 프로세스 로컬 버킷으로 대체합니다. 서킷 브레이커 상태는 프로세스별입니다.
+
+환경변수:
+    LLM_RATE_LIMITER         redis 또는 memory (기본값: REDIS_URL이 설정되어 있으면 redis)
+    LLM_RATE_LIMIT_RPM       분당 요청 수 (기본값: 30, Groq 무료 등급)
+    LLM_RATE_LIMIT_BURST     한 번에 몰아 쓸 수 있는 요청 수 (기본값: 10)
+    LLM_BREAKER_FAILURES     서킷을 여는 연속 실패 수 (기본값: 5)
+    LLM_BREAKER_RECOVERY     열린 서킷을 유지하는 시간, 초 (기본값: 30)
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않음"""
+
+
+class RateLimitedError(Exception):
+    """속도 제한으로 호출하지 않음"""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_started = 0.0
+
+        # 메트릭
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self):
+        """호출 전에 확인 (허용하지 않으면 CircuitOpenError)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN:
+                now = time.monotonic()
+                # 결과를 알리지 못한 시험 호출(속도 제한, 취소 등)이 반열림 상태를 막지 않도록
+                if now - self._probe_started >= self.recovery_timeout:
+                    self._probes = 0
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    self._probe_started = now
+                    return
+            self.short_circuited += 1
+        raise CircuitOpenError(f"{self.name} circuit is {state}")
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                print(f"[RESILIENCE] {self.name} circuit opened after {self._failures} consecutive failures")
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "retry_in_seconds": round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 1)
+                if state == self.OPEN else 0.0,
+                "successes": self.successes,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "opened": self.opened,
+            }
+
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Retry-After("7") 또는 x-ratelimit-reset-*("2m59.56s", "450ms") 헤더를 초로 변환"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def backoff_from_response(status_code: int, headers) -> Optional[float]:
+    """제공자 응답에서 버킷을 비워 둘 시간 (필요 없으면 None)"""
+    if status_code == 429:
+        for header in ("retry-after", "x-ratelimit-reset-requests"):
+            seconds = parse_reset_duration(headers.get(header))
+            if seconds is not None:
+                return seconds
+        return 1.0
+    if headers.get("x-ratelimit-remaining-requests") == "0":
+        return parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+    return None
+
+
+class TokenBucket:
+    """프로세스 로컬 토큰 버킷 (초당 rate개씩 채워지고 최대 capacity개)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.allowed = 0
+        self.limited = 0
+        self.penalties = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire_sync(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= 1:
+                self._tokens -= 1
+                self.allowed += 1
+                return True
+            self.limited += 1
+            return False
+
+    def penalize_sync(self, seconds: float):
+        """제공자가 알려준 시간 동안 호출하지 않음"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = 0
+            self._updated = now
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self.penalties += 1
+
+    async def try_acquire(self) -> bool:
+        return self.try_acquire_sync()
+
+    async def penalize(self, seconds: float):
+        self.penalize_sync(seconds)
+
+    def acquire_sync(self, timeout: float) -> bool:
+        """토큰을 얻을 때까지 최대 timeout초 대기 (Celery 워커용)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.try_acquire_sync():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, max(0.05, 1 / self.rate)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "backend": "memory",
+                "rate_per_minute": round(self.rate * 60, 2),
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 2),
+                "blocked_seconds": round(max(0.0, self._blocked_until - now), 1),
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "penalties": self.penalties,
+            }
+
+
+# 원자적으로 채우고 꺼내는 스크립트 (시각은 Redis 서버 시계 사용)
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'blocked_until')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if now >= blocked_until and tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 3600)
+return allowed
+"""
+
+_PENALIZE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local blocked_until = math.max(tonumber(redis.call('HGET', KEYS[1], 'blocked_until')) or 0, now + tonumber(ARGV[1]))
+redis.call('HSET', KEYS[1], 'tokens', 0, 'updated', now, 'blocked_until', blocked_until)
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[1])) + 3600)
+return 1
+"""
+
+
+class RedisTokenBucket:
+    """모든 워커가 공유하는 토큰 버킷 (Redis 오류 시 프로세스 로컬 버킷으로 대체)"""
+
+    def __init__(self, url: str, rate: float, capacity: float, key: str = "ratelimit:groq"):
+        import redis
+        import redis.asyncio
+
+        self.rate = rate
+        self.capacity = capacity
+        self.key = key
+        self._redis = redis.asyncio.from_url(url)
+        self._sync_redis = redis.Redis.from_url(url)
+        self._fallback = TokenBucket(rate, capacity)
+
+        # 메트릭
+        self.allowed = 0
+        self.limited = 0
+        self.penalties = 0
+        self.errors = 0
+
+    def _count(self, allowed) -> bool:
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return bool(allowed)
+
+    def _redis_error(self, e: Exception):
+        self.errors += 1
+        print(f"[RESILIENCE] Redis rate limiter failed: {type(e).__name__}: {str(e)}, using local bucket")
+
+    async def try_acquire(self) -> bool:
+        try:
+            allowed = await self._redis.eval(_ACQUIRE_SCRIPT, 1, self.key, self.rate, self.capacity)
+        except Exception as e:
+            self._redis_error(e)
+            return self._fallback.try_acquire_sync()
+        return self._count(allowed)
+
+    def try_acquire_sync(self) -> bool:
+        try:
+            allowed = self._sync_redis.eval(_ACQUIRE_SCRIPT, 1, self.key, self.rate, self.capacity)
+        except Exception as e:
+            self._redis_error(e)
+            return self._fallback.try_acquire_sync()
+        return self._count(allowed)
+
+    def acquire_sync(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.try_acquire_sync():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, max(0.05, 1 / self.rate)))
+
+    async def penalize(self, seconds: float):
+        self.penalties += 1
+        try:
+            await self._redis.eval(_PENALIZE_SCRIPT, 1, self.key, seconds)
+        except Exception as e:
+            self._redis_error(e)
+            self._fallback.penalize_sync(seconds)
+
+    def penalize_sync(self, seconds: float):
+        self.penalties += 1
+        try:
+            self._sync_redis.eval(_PENALIZE_SCRIPT, 1, self.key, seconds)
+        except Exception as e:
+            self._redis_error(e)
+            self._fallback.penalize_sync(seconds)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "key": self.key,
+            "rate_per_minute": round(self.rate * 60, 2),
+            "capacity": self.capacity,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "penalties": self.penalties,
+            "errors": self.errors,
+        }
+
+
+def create_rate_limiter():
+    backend = os.getenv("LLM_RATE_LIMITER") or ("redis" if os.getenv("REDIS_URL") else "memory")
+    rate = float(os.getenv("LLM_RATE_LIMIT_RPM", "30")) / 60
+    capacity = float(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+    if backend == "redis":
+        return RedisTokenBucket(os.getenv("REDIS_URL", "redis://localhost:6379/0"), rate, capacity)
+    return TokenBucket(rate, capacity)
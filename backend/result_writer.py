@@ -0,0 +1,173 @@
+"""
+분류 결과 쓰기 합치기 (Celery 워커용)
+
+작업마다 연결을 열어 한 행씩 UPDATE/커밋하면 결과가 몰릴 때 워커들이 SQLite 쓰기 잠금을
+두고 다투다 "database is locked"로 실패합니다. ResultWriter는 같은 프로세스의 작업들이
+보낸 결과를 모아 flush_interval마다(또는 max_batch개가 모이면 바로) 한 트랜잭션으로 저장합니다.
+
+- write()는 결과가 커밋될 때까지 기다림 → acks_late 작업이 저장 전에 확인되지 않음
+- 같은 요청의 결과가 한 묶음에 여러 번 들어오면 마지막 결과만 저장
+- BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡고(busy_timeout만큼 대기), 그래도 잠겨 있으면 지수 백오프로 재시도
+- 메트릭: 묶음 크기, 잠금 대기 시간, 재시도/실패 수
+
+분류 워커를 스레드 풀(--pool threads)로 실행하면 여러 작업의 결과가 한 묶음으로 합쳐집니다.
+
+환경변수:
+    RESULT_WRITER_INTERVAL    최대 모으는 시간, 초 (기본값: 0.05)
+    RESULT_WRITER_MAX_BATCH   한 트랜잭션에 저장할 최대 결과 수 (기본값: 200)
+    RESULT_WRITER_RETRIES     잠금 오류 재시도 횟수 (기본값: 5)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+import crud
+from database import get_db
+
+load_dotenv()
+
+
+def _is_lock_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class ResultWriter:
+    def __init__(self, flush_interval: float = 0.05, max_batch: int = 200,
+                 retries: int = 5, retry_backoff: float = 0.05):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._cond = threading.Condition()
+        # 요청 ID -> (결과, 기다리는 Future 목록)
+        self._pending = {}
+        self._thread = None
+
+        # 메트릭
+        self.flushes = 0
+        self.written = 0
+        self.coalesced = 0
+        self.max_batch_seen = 0
+        self.lock_wait = 0.0
+        self.max_lock_wait = 0.0
+        self.lock_retries = 0
+        self.errors = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, request_id: int, result: dict) -> Future:
+        """결과를 묶음에 추가하고 저장된 행(dict)을 돌려줄 Future 반환"""
+        future = Future()
+        with self._cond:
+            self._ensure_thread()
+            entry = self._pending.get(request_id)
+            if entry is None:
+                self._pending[request_id] = (result, [future])
+            else:
+                self.coalesced += 1
+                self._pending[request_id] = (result, entry[1] + [future])
+            # 첫 결과면 flush 스레드를 깨우고, max_batch개가 모이면 기다리지 않고 바로 저장
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def write(self, results: dict, timeout: float = 30.0) -> list:
+        """결과 {id: {"category", "priority"}}를 저장하고 커밋된 행 목록 반환 (실패하면 예외)"""
+        futures = [self.submit(request_id, result) for request_id, result in results.items()]
+        rows = [future.result(timeout=timeout) for future in futures]
+        return [row for row in rows if row is not None]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # 첫 결과가 들어온 뒤 flush_interval 동안(또는 max_batch개가 될 때까지) 더 모음
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = dict(list(self._pending.items())[:self.max_batch])
+                for request_id in batch:
+                    del self._pending[request_id]
+
+            try:
+                rows = self._flush({request_id: result for request_id, (result, _) in batch.items()})
+            except Exception as e:
+                self.errors += 1
+                print(f"[RESULT WRITER] Flush of {len(batch)} results failed: {type(e).__name__}: {e}")
+                for _, futures in batch.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            by_id = {row["id"]: row for row in rows}
+            for request_id, (_, futures) in batch.items():
+                for future in futures:
+                    future.set_result(by_id.get(request_id))
+
+    def _flush(self, results: dict) -> list:
+        """한 트랜잭션으로 저장 (잠금 오류는 백오프 후 재시도)"""
+        attempt = 0
+        while True:
+            try:
+                with get_db() as conn:
+                    start = time.perf_counter()
+                    # 쓰기 잠금을 먼저 잡음 (잠겨 있으면 busy_timeout만큼 대기)
+                    conn.execute("BEGIN IMMEDIATE")
+                    waited = time.perf_counter() - start
+                    rows = crud.save_categorizations(conn, results)
+            except sqlite3.OperationalError as e:
+                if not _is_lock_error(e) or attempt >= self.retries:
+                    raise
+                self.lock_retries += 1
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+                continue
+
+            self.flushes += 1
+            self.written += len(results)
+            self.max_batch_seen = max(self.max_batch_seen, len(results))
+            self.lock_wait += waited
+            self.max_lock_wait = max(self.max_lock_wait, waited)
+            return rows
+
+    def reset_after_fork(self):
+        # fork된 자식은 부모의 flush 스레드와 대기 결과를 물려받지 않음
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "avg_batch_size": round(self.written / self.flushes, 2) if self.flushes else 0,
+            "max_batch_size": self.max_batch_seen,
+            "lock_wait_seconds": round(self.lock_wait, 6),
+            "max_lock_wait_seconds": round(self.max_lock_wait, 6),
+            "lock_retries": self.lock_retries,
+            "errors": self.errors,
+            "pending": len(self._pending),
+        }
+
+
+result_writer = ResultWriter(
+    flush_interval=float(os.getenv("RESULT_WRITER_INTERVAL", "0.05")),
+    max_batch=int(os.getenv("RESULT_WRITER_MAX_BATCH", "200")),
+    retries=int(os.getenv("RESULT_WRITER_RETRIES", "5")),
+)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=result_writer.reset_after_fork)
@@ -0,0 +1,95 @@
+"""
+요청 전문 검색 (SQLite FTS5)
+
+requests_fts는 description/location의 FTS5 인덱스로, 트리거가 requests 테이블과 같은 트랜잭션에서
+동기화합니다 (migrations.py 11). 토크나이저는 trigram이라 형태소 분석 없이 한국어 부분 문자열이
+검색됩니다 ("누수가"로 "화장실 누수가 심해요" 검색, 조사가 붙어도 됨).
+
+trigram 인덱스는 세 글자 이상의 검색어만 찾을 수 있으므로 "누수", "전등" 같은 두 글자 이하 검색어는
+LIKE로 거릅니다. 세 글자 이상 검색어가 하나라도 있으면 FTS5로 후보를 좁힌 뒤 LIKE를 적용하고
+(bm25 순위), 모두 짧으면 LIKE만으로 최신순 검색합니다.
+
+일치하는 요청이 아주 많은 흔한 단어는 최근 SEARCH_RANK_WINDOW건 안에서만 관련도순으로 정렬합니다
+(bm25는 일치하는 행마다 계산되므로 응답 시간을 일정하게 유지).
+
+검색어는 공백으로 나눈 단어이며 모든 단어가 description 또는 location에 있어야 합니다 (AND).
+FTS5 쿼리 문법(OR, NEAR, *, 따옴표 등)은 그대로 문자열로 취급합니다.
+
+환경변수:
+    SEARCH_RANK_WINDOW  관련도순으로 정렬할 최근 일치 건수 (기본값: 10000)
+
+사용법:
+    terms = parse_query("302호 누수가 심해요")
+    crud.search_requests(conn, terms, limit=20)
+    highlight("화장실 누수가 심해요", terms)   # '화장실 <mark>누수가</mark> 심해요'
+"""
+
+import html
+import os
+import re
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# trigram 토크나이저가 인덱스로 찾을 수 있는 최소 길이
+TRIGRAM_MIN_LENGTH = 3
+
+# 검색어 단어 수 제한 (단어마다 조건이 하나씩 붙음)
+MAX_TERMS = 8
+
+# 관련도순 검색에서 순위를 매길 최근 일치 건수 (crud.search_requests)
+RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "10000"))
+
+# bm25 열 가중치 (description, location) - 위치는 짧고 구체적이라 일치하면 더 관련 있음
+BM25_WEIGHTS = (1.0, 2.0)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+def parse_query(query: str) -> List[str]:
+    """검색어 → 단어 목록 (중복 제거, 소문자, 최대 MAX_TERMS개)"""
+    terms = []
+    for term in query.lower().split():
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def match_expression(terms: List[str]) -> Optional[str]:
+    """세 글자 이상 단어의 FTS5 MATCH 식 (각 단어를 문자열로 인용해 AND, 없으면 None)"""
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+    return " ".join(quoted) or None
+
+
+def like_terms(terms: List[str]) -> List[str]:
+    """FTS5로 찾을 수 없는 짧은 단어의 LIKE 패턴 (%, _는 이스케이프, ESCAPE '\\')"""
+    return [
+        "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        for term in terms if len(term) < TRIGRAM_MIN_LENGTH
+    ]
+
+
+def highlight(text: Optional[str], terms: List[str]) -> Optional[str]:
+    """
+    text에서 검색어와 일치하는 부분을 <mark>로 감싼 HTML (나머지는 이스케이프)
+
+    FTS5 highlight()는 MATCH로 찾은 단어만 표시하므로 LIKE로 거른 짧은 단어도
+    같은 방식으로 표시하기 위해 여기서 직접 찾습니다 (trigram과 같은 대소문자 무시 부분 문자열 일치).
+    """
+    if text is None:
+        return None
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+                         re.IGNORECASE)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(HIGHLIGHT_START + html.escape(match.group()) + HIGHLIGHT_END)
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
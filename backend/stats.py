@@ -0,0 +1,134 @@
+"""
+요청 통계 집계 테이블 관리
+
+/api/stats는 요청 테이블을 매번 스캔하지 않고 request_stats(전체/상태/카테고리/우선순위별 건수)와
+request_stats_daily(일자 x 카테고리 x 우선순위 건수)를 읽습니다.
+두 테이블은 requests의 INSERT/UPDATE/DELETE 트리거(migrations.py 버전 4)로 증분 갱신되므로
+API 수정, Celery 재분류, 정리 작업 모두 자동으로 반영됩니다.
+
+NULL 값은 기본키에 쓸 수 없어 빈 문자열('')로 저장하고, 조회 시 None으로 되돌립니다.
+
+사용법:
+    python stats.py check     # 집계 테이블과 실제 데이터 비교
+    python stats.py rebuild   # 집계 테이블 재생성
+"""
+
+import sys
+
+# 집계 테이블을 requests로부터 다시 계산하는 SQL (마이그레이션 4의 초기 적재는 별도 사본)
+REBUILD_SQL = [
+    "DELETE FROM request_stats",
+    "DELETE FROM request_stats_daily",
+    "INSERT INTO request_stats (dimension, value, count) SELECT 'total', '', COUNT(*) FROM requests",
+    """
+    INSERT INTO request_stats (dimension, value, count)
+    SELECT 'status', IFNULL(status, ''), COUNT(*) FROM requests GROUP BY 2
+    """,
+    """
+    INSERT INTO request_stats (dimension, value, count)
+    SELECT 'category', IFNULL(category, ''), COUNT(*) FROM requests GROUP BY 2
+    """,
+    """
+    INSERT INTO request_stats (dimension, value, count)
+    SELECT 'priority', IFNULL(priority, ''), COUNT(*) FROM requests GROUP BY 2
+    """,
+    """
+    INSERT INTO request_stats_daily (day, category, priority, count)
+    SELECT IFNULL(date(created_at), date('now')), IFNULL(category, ''), IFNULL(priority, ''), COUNT(*)
+    FROM requests GROUP BY 1, 2, 3
+    """,
+]
+
+
+def rebuild_stats(conn):
+    """집계 테이블을 한 트랜잭션 안에서 전체 재계산"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in REBUILD_SQL:
+            conn.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def compute_live_stats(conn) -> dict:
+    """requests 테이블을 직접 스캔한 통계 (집계 테이블 검증용)"""
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COUNT(*) as total FROM requests")
+    total = cursor.fetchone()["total"]
+
+    cursor.execute("SELECT status, COUNT(*) as count FROM requests GROUP BY status")
+    status_counts = {row["status"]: row["count"] for row in cursor.fetchall()}
+
+    cursor.execute("SELECT category, COUNT(*) as count FROM requests GROUP BY category")
+    category_counts = {row["category"]: row["count"] for row in cursor.fetchall()}
+
+    cursor.execute("SELECT priority, COUNT(*) as count FROM requests GROUP BY priority")
+    priority_counts = {row["priority"]: row["count"] for row in cursor.fetchall()}
+
+    return {
+        "total": total,
+        "by_status": status_counts,
+        "by_category": category_counts,
+        "by_priority": priority_counts
+    }
+
+
+def check_stats(conn) -> list:
+    """집계 테이블과 실제 데이터가 다른 항목 목록 (일치하면 빈 목록)"""
+    import crud
+
+    live = compute_live_stats(conn)
+    stored = crud.get_stats(conn)
+
+    mismatches = []
+    if live["total"] != stored["total"]:
+        mismatches.append(("total", None, live["total"], stored["total"]))
+    for key in ("by_status", "by_category", "by_priority"):
+        for value in set(live[key]) | set(stored[key]):
+            expected = live[key].get(value, 0)
+            actual = stored[key].get(value, 0)
+            if expected != actual:
+                mismatches.append((key, value, expected, actual))
+
+    # 양방향 비교 - 실제 데이터에만 있는 행(누락)과 집계 테이블에만 남은 행(삭제 후 남은 값) 모두 차이
+    daily_diff = conn.execute("""
+        WITH live AS (
+            SELECT IFNULL(date(created_at), date('now')) AS day, IFNULL(category, '') AS category,
+                   IFNULL(priority, '') AS priority, COUNT(*) AS count
+            FROM requests GROUP BY 1, 2, 3
+        ), stored AS (
+            SELECT day, category, priority, count FROM request_stats_daily WHERE count != 0
+        )
+        SELECT COUNT(*) FROM (
+            SELECT * FROM (SELECT * FROM live EXCEPT SELECT * FROM stored)
+            UNION ALL
+            SELECT * FROM (SELECT * FROM stored EXCEPT SELECT * FROM live)
+        )
+    """).fetchone()[0]
+    if daily_diff:
+        mismatches.append(("daily", None, daily_diff, "rows differ"))
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    from database import get_db
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    with get_db() as conn:
+        if command == "rebuild":
+            rebuild_stats(conn)
+            print("Stats tables rebuilt")
+        elif command == "check":
+            mismatches = check_stats(conn)
+            if not mismatches:
+                print("Stats tables are consistent")
+            for dimension, value, expected, actual in mismatches:
+                print(f"  {dimension} {value!r}: expected {expected}, stored {actual}")
+            sys.exit(1 if mismatches else 0)
+        else:
+            print("Usage: python stats.py [check|rebuild]")
+            sys.exit(2)
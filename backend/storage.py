@@ -0,0 +1,272 @@
+"""
+첨부 파일 저장소 (로컬 파일 시스템 / S3)
+
+업로드 경로(main.upload_image)와 썸네일 작업(tasks.generate_thumbnail)은 이 모듈의 storage만 사용하므로
+AWS 키가 없는 개발/단일 서버 환경에서도 업로드가 동작합니다 (로컬 디스크에 저장하고 API가 직접 제공).
+
+- 키는 내용의 SHA-256 (images/ab/abcdef....png): 같은 사진을 여러 번 올려도 한 번만 저장
+- 업로드는 임시 키(tmp/...)에 스트리밍하며 해시를 계산한 뒤 commit()으로 최종 키로 옮김
+  (이미 있는 내용이면 임시 파일만 지움)
+- 로컬 저장소 파일은 GET /api/files/{key}가 Range 요청(206)까지 지원해 제공
+
+두 구현은 같은 메서드를 가집니다:
+    open_writer(key, content_type)   async write/complete/abort를 가진 writer
+    commit(temp_key, key, content_type) -> bool   최종 키로 옮김 (새로 저장했으면 True)
+    exists(key), get(key) -> bytes, put(key, data, content_type), delete(key), url(key)
+
+환경변수:
+    STORAGE_BACKEND     local 또는 s3 (기본값: AWS_ACCESS_KEY_ID가 있으면 s3, 없으면 local)
+    STORAGE_DIR         로컬 저장소 디렉터리 (기본값: media)
+    PUBLIC_API_URL      로컬 저장소 파일 URL 앞부분 (기본값: http://localhost:8000)
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from uploads import UPLOAD_PART_SIZE, S3MultipartWriter, create_s3_client
+
+load_dotenv()
+
+# 로컬 파일 writer가 디스크에 쓰기 전에 모으는 크기
+FILE_WRITE_BUFFER = 1024 * 1024
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp",
+}
+
+
+def content_key(sha256: str, extension: str) -> str:
+    """내용 해시 → 저장 키 (앞 두 글자로 디렉터리를 나눠 한 디렉터리에 파일이 몰리지 않게)"""
+    return f"images/{sha256[:2]}/{sha256}.{extension}"
+
+
+def temp_key(extension: str) -> str:
+    return f"tmp/{uuid.uuid4().hex}.{extension}"
+
+
+def guess_content_type(key: str) -> str:
+    return CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+class HashingWriter:
+    """writer에 쓰면서 SHA-256을 계산 (업로드가 끝나면 sha256으로 최종 키 결정)"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._hash = hashlib.sha256()
+
+    @property
+    def key(self) -> str:
+        return self.writer.key
+
+    @property
+    def content_type(self) -> str:
+        return self.writer.content_type
+
+    @property
+    def size(self) -> int:
+        return self.writer.size
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    async def write(self, data: bytes):
+        self._hash.update(data)
+        await self.writer.write(data)
+
+    async def complete(self):
+        await self.writer.complete()
+
+    async def abort(self):
+        await self.writer.abort()
+
+
+class FileWriter:
+    """로컬 파일에 스트리밍 저장 (디스크 쓰기는 스레드 풀에서, FILE_WRITE_BUFFER 단위)"""
+
+    def __init__(self, path: Path, key: str, content_type: str):
+        self.path = path
+        self.key = key
+        self.content_type = content_type
+        self.size = 0
+        self._file = None
+        self._buffer = bytearray()
+
+    async def _flush(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = await run_in_threadpool(open, self.path, "wb")
+        data = bytes(self._buffer)
+        self._buffer = bytearray()
+        await run_in_threadpool(self._file.write, data)
+
+    async def write(self, data: bytes):
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= FILE_WRITE_BUFFER:
+            await self._flush()
+
+    async def complete(self):
+        await self._flush()
+        await run_in_threadpool(self._file.close)
+
+    async def abort(self):
+        self._buffer = bytearray()
+        if self._file is not None:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class FilesystemStorage:
+    def __init__(self, root, base_url: str = "http://localhost:8000"):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        """키 → 파일 경로 (저장소 디렉터리 밖을 가리키는 키는 ValueError)"""
+        root = self.root.resolve()
+        path = (root / key).resolve()
+        if root not in path.parents:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def open_writer(self, key: str, content_type: str) -> FileWriter:
+        return FileWriter(self.path(key), key, content_type)
+
+    def commit(self, temp: str, key: str, content_type: str) -> bool:
+        source, target = self.path(temp), self.path(key)
+        if target.exists():
+            source.unlink(missing_ok=True)
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # 같은 파일 시스템 안의 rename은 원자적 (동시에 같은 내용이 올라와도 한쪽이 덮어쓸 뿐 내용은 같음)
+        os.replace(source, target)
+        return True
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def get(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def put(self, key: str, data: bytes, content_type: str):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/api/files/{key}"
+
+
+class S3Storage:
+    def __init__(self, client, bucket: str, part_size: int = UPLOAD_PART_SIZE):
+        self.client = client
+        self.bucket = bucket
+        self.part_size = part_size
+
+    def open_writer(self, key: str, content_type: str) -> S3MultipartWriter:
+        return S3MultipartWriter(self.client, self.bucket, key, content_type, self.part_size)
+
+    def commit(self, temp: str, key: str, content_type: str) -> bool:
+        created = not self.exists(key)
+        if created:
+            # 서버 쪽 복사 (업로드 크기 제한이 5GB보다 훨씬 작으므로 copy_object 한 번)
+            self.client.copy_object(
+                Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": temp},
+                ContentType=content_type, MetadataDirective="REPLACE",
+                CacheControl="public, max-age=31536000, immutable",
+            )
+        self.delete(temp)
+        return created
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def put(self, key: str, data: bytes, content_type: str):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type,
+                               CacheControl="public, max-age=31536000, immutable")
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        endpoint = os.getenv("S3_ENDPOINT_URL")
+        if endpoint:
+            return f"{endpoint.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{os.getenv('AWS_REGION', 'ap-northeast-2')}.amazonaws.com/{key}"
+
+
+class RangeNotSatisfiable(Exception):
+    """요청한 구간이 파일 밖 (416)"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Range 헤더 → (시작, 끝) 바이트 위치 (끝 포함)
+
+    헤더가 없거나 해석할 수 없거나 여러 구간이면 None (전체 응답),
+    파일 밖 구간이면 RangeNotSatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            # 마지막 N바이트 (bytes=-500)
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def iter_file(path: Path, start: int, end: int, chunk_size: int = 64 * 1024):
+    """파일의 start~end(포함) 구간을 조각으로 (StreamingResponse가 스레드 풀에서 순회)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def create_storage(backend: Optional[str] = None):
+    backend = backend or os.getenv("STORAGE_BACKEND") or ("s3" if os.getenv("AWS_ACCESS_KEY_ID") else "local")
+    if backend == "s3":
+        return S3Storage(create_s3_client(), os.getenv("S3_BUCKET_NAME", "maintenance-files"))
+    return FilesystemStorage(os.getenv("STORAGE_DIR", "media"),
+                             os.getenv("PUBLIC_API_URL", "http://localhost:8000"))
+
+
+storage = create_storage()
@@ -1,143 +1,290 @@
 from celery_app import celery_app
+from database import get_db
+from events import event_bus
+from categorization_cache import categorization_cache
+from llm import sync_llm_client
+from keywords import categorize_with_keywords, is_urgent
+from local_classifier import local_classifier
+from resilience import CircuitOpenError, RateLimitedError
+from result_writer import result_writer
+from storage import storage
+from uploads import THUMBNAIL_SIZE, make_thumbnail, thumbnail_key
+import crud
 import os
-import json
+import sqlite3
+import time
+from collections import Counter
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Groq 클라이언트 초기화 (OpenAI 대신 사용)
-from groq import Groq
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-# 키워드 기반 분류 (폴백용)
-def categorize_with_keywords(description: str) -> dict:
-    """간단한 키워드 기반 분류 (Groq API 실패 시 대체)"""
-    desc_lower = description.lower()
-
-    category = "other"
-    if any(word in desc_lower for word in ["전기", "전등", "조명", "콘센트", "스위치", "누전", "정전", "전선"]):
-        category = "electrical"
-    elif any(word in desc_lower for word in ["수도", "배관", "물", "수도꼭지", "변기", "싱크대", "하수", "누수", "화장실", "세면대"]):
-        category = "plumbing"
-    elif any(word in desc_lower for word in ["냉방", "난방", "에어컨", "보일러", "환기", "온도"]):
-        category = "hvac"
-    elif any(word in desc_lower for word in ["벽", "바닥", "천장", "문", "창문", "계단", "균열", "파손"]):
-        category = "structural"
-
-    priority = "medium"
-    if any(word in desc_lower for word in ["긴급", "위험", "사고", "고장", "멈춤", "안됨", "불가능", "즉시"]):
-        priority = "high"
-    elif any(word in desc_lower for word in ["샘", "새", "누수", "넘침", "뜨거움", "계속"]):
-        priority = "high"
-    elif any(word in desc_lower for word in ["나중", "여유", "천천히"]):
-        priority = "low"
-
-    return {"category": category, "priority": priority}
-
-@celery_app.task(name='tasks.categorize_maintenance_request')
-def categorize_maintenance_request(request_id: int, description: str):
+# 마이크로 배치 분류 설정
+# 대기 요청이 BATCH_SIZE개 모이면 즉시, 아니면 첫 요청 후 BATCH_WINDOW초 뒤에 한 번의 LLM 호출로 분류
+# CATEGORIZE_BATCH_SIZE=1 이면 요청마다 개별 호출
+BATCH_SIZE = int(os.getenv("CATEGORIZE_BATCH_SIZE", "10"))
+BATCH_WINDOW = float(os.getenv("CATEGORIZE_BATCH_WINDOW", "2"))
+BATCH_SCHEDULED_KEY = "categorize:batch:scheduled"
+BATCH_LOCK_KEY = "categorize:batch:lock"
+
+# 분류 작업 공통 옵션: DB 잠금 같은 일시적 오류는 지수 백오프로 재시도
+# (acks_late로 다시 실행될 수 있지만 같은 결과를 다시 저장하므로 안전)
+CLASSIFICATION_TASK_OPTIONS = {
+    "autoretry_for": (sqlite3.OperationalError,),
+    "retry_backoff": True,
+    "retry_backoff_max": 60,
+    "retry_jitter": True,
+    "max_retries": 5,
+    # prefork 풀에서만 적용 (스레드 풀에서는 LLM 클라이언트 제한 시간이 상한)
+    "soft_time_limit": 300,
+    "time_limit": 360,
+}
+
+# 분류할 요청을 가져간 뒤 다른 작업이 다시 가져가지 못하는 시간, 초 (작업 최대 실행 시간)
+CLAIM_LEASE = CLASSIFICATION_TASK_OPTIONS["time_limit"]
+
+# 분류 방법 -> 저장할 라벨 출처 (requests.category_source, 로컬 분류기는 llm/manual로만 학습)
+METHOD_SOURCES = {"cache": "llm", "batch": "llm", "llm": "llm", "local": "local", "keyword": "keyword"}
+
+_redis = None
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    return _redis
+
+def save_categorizations(results: dict):
     """
-    비동기로 AI 카테고리화 수행 (Groq API 사용)
+    분류 결과를 저장하고 모든 API 워커의 WebSocket 클라이언트에게 알림
+
+    같은 프로세스의 다른 작업 결과와 합쳐 한 트랜잭션으로 커밋될 때까지 기다립니다.
     """
+    rows = result_writer.write(results)
+
+    for row in rows:
+        event_bus.publish_sync({"type": "request_updated", "data": row})
+
+def save_categorization(request_id: int, result: dict):
+    save_categorizations({request_id: result})
+
+def categorize_single(description: str, use_llm: bool = True) -> tuple:
+    """요청 하나를 LLM으로 분류 (실패 시 키워드 분류) → (결과, 방법)"""
+    if not use_llm:
+        return categorize_with_keywords(description), "keyword"
     try:
-        print(f"[CELERY] Starting Groq AI categorization for request {request_id}")
-
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # 무료 Groq 모델
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a building maintenance expert. Categorize the maintenance request into one of these categories:
-                    - electrical: 전기 관련 문제
-                    - plumbing: 배관, 수도 관련 문제
-                    - hvac: 난방, 환기, 에어컨 관련 문제
-                    - structural: 건물 구조, 벽, 바닥 관련 문제
-                    - other: 기타
-
-                    Also assess the priority as:
-                    - high: 빠른 대응 필요
-                    - medium: 일반적인 유지보수
-                    - low: 긴급하지 않음
-
-                    Respond in JSON format: {"category": "...", "priority": "..."}"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Maintenance request: {description}"
-                }
-            ],
-            temperature=0.3,
-            max_tokens=100
-        )
-
-        result = json.loads(response.choices[0].message.content)
+        result = sync_llm_client.categorize(description)
         print(f"[CELERY] Groq AI categorization successful: {result}")
+        categorization_cache.set_sync(description, result)
+        return result, "llm"
+    except Exception as e:
+        print(f"[CELERY ERROR] Groq API failed: {type(e).__name__}: {str(e)}")
+        print("[CELERY] Falling back to keyword-based categorization")
+        return categorize_with_keywords(description), "keyword"
+
+def run_categorization_batch(limit: int = BATCH_SIZE) -> dict:
+    """단건 접수 대기 요청을 최대 limit개 가져가(claim) categorize_rows로 분류"""
+    with get_db() as conn:
+        pending = crud.claim_pending_categorizations(conn, limit, time.time(), CLAIM_LEASE)
+    return categorize_claimed(pending)
+
+def categorize_claimed(pending: list) -> dict:
+    """가져간 요청을 분류 (저장에 실패하면 재시도에서 다시 가져갈 수 있도록 claim 해제)"""
+    try:
+        return categorize_rows(pending)
+    except Exception:
+        with get_db() as conn:
+            crud.release_categorization_claims(conn, [row["id"] for row in pending])
+        raise
+
+def categorize_rows(pending: list) -> dict:
+    """
+    요청 [{"id", "description"}]을 한 번의 LLM 호출로 분류하고 한 트랜잭션으로 저장
+
+    캐시 적중과 로컬 분류기가 확신하는 요청은 LLM에 보내지 않고, 배치 응답을 파싱할 수 없거나 빠진 항목은 개별 호출로 처리합니다.
+    """
+    results = {}
+    methods = Counter()
+    misses = []
+    for row in pending:
+        cached = categorization_cache.get_sync(row["description"])
+        local = None if cached else local_classifier.classify(row["description"])
+        if cached:
+            results[row["id"]] = {**cached, "source": METHOD_SOURCES["cache"]}
+            methods["cache"] += 1
+        elif local:
+            results[row["id"]] = {"category": local["category"], "priority": local["priority"],
+                                  "source": METHOD_SOURCES["local"]}
+            methods["local"] += 1
+        else:
+            misses.append(row)
+
+    batch = {}
+    use_llm = True
+    if len(misses) > 1:
+        try:
+            batch = sync_llm_client.categorize_batch([(row["id"], row["description"]) for row in misses])
+        except (CircuitOpenError, RateLimitedError) as e:
+            # 서킷이 열렸거나 할당량이 없으면 개별 호출도 실패하므로 바로 키워드 분류
+            print(f"[CELERY] LLM unavailable ({type(e).__name__}), using keyword categorization")
+            use_llm = False
+        except Exception as e:
+            print(f"[CELERY ERROR] Batch categorization failed: {type(e).__name__}: {str(e)}")
+
+    for row in misses:
+        result = batch.get(row["id"])
+        if result is not None:
+            categorization_cache.set_sync(row["description"], result)
+            method = "batch"
+        else:
+            result, method = categorize_single(row["description"], use_llm)
+        results[row["id"]] = {**result, "source": METHOD_SOURCES[method]}
+        methods[method] += 1
+
+    save_categorizations(results)
+    return {"processed": len(results), "methods": dict(methods)}
+
+def schedule_batch() -> str:
+    """대기 요청이 BATCH_SIZE개 이상이면 바로, 아니면 BATCH_WINDOW 뒤에 배치 작업을 한 번만 예약"""
+    with get_db() as conn:
+        pending = crud.count_pending_categorizations(conn, time.time())
+    if pending >= BATCH_SIZE:
+        categorize_batch.delay()
+        return "dispatched"
+    if _redis_client().set(BATCH_SCHEDULED_KEY, 1, nx=True, px=int(BATCH_WINDOW * 1000)):
+        categorize_batch.apply_async(countdown=BATCH_WINDOW)
+        return "scheduled"
+    return "pending"
+
+@celery_app.task(name='tasks.categorize_batch', **CLASSIFICATION_TASK_OPTIONS)
+def categorize_batch():
+    """
+    단건 접수 대기 요청을 BATCH_SIZE개씩 모두 처리 (동시에 하나의 워커만 실행)
+
+    일괄 접수 요청은 categorize_requests가 처리하므로 가져가지 않습니다.
+    """
+    lock = _redis_client().lock(BATCH_LOCK_KEY, timeout=300)
+    if not lock.acquire(blocking=False):
+        return {"status": "skipped"}  # 다른 워커가 처리 중
 
-        # 데이터베이스 업데이트
-        from contextlib import contextmanager
-        import sqlite3
+    processed = 0
+    methods = Counter()
+    try:
+        while True:
+            summary = run_categorization_batch(BATCH_SIZE)
+            processed += summary["processed"]
+            methods.update(summary["methods"])
+            if summary["processed"] < BATCH_SIZE:
+                break
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+    # 마지막 조회 이후 접수되었지만 잠금 때문에 건너뛴 요청이 있으면 다시 예약
+    with get_db() as conn:
+        if crud.count_pending_categorizations(conn, time.time()):
+            categorize_batch.apply_async(countdown=BATCH_WINDOW)
 
-        @contextmanager
-        def get_db():
-            conn = sqlite3.connect("maintenance.db")
-            conn.row_factory = sqlite3.Row
-            try:
-                yield conn
-            finally:
-                conn.close()
+    print(f"[CELERY] Batch categorization: {processed} requests {dict(methods)} writer={result_writer.stats()}")
+    return {"status": "completed", "processed": processed, "methods": dict(methods), "writer": result_writer.stats()}
 
+@celery_app.task(name='tasks.categorize_requests', **CLASSIFICATION_TASK_OPTIONS)
+def categorize_requests(request_ids: list):
+    """
+    일괄 접수된 요청들을 BATCH_SIZE개씩 묶어 분류
+
+    묶음마다 가져가므로(claim) 이미 분류되었거나 다시 전달된 같은 작업이 처리 중인 요청은 건너뜁니다.
+    """
+    size = max(BATCH_SIZE, 1)
+    processed = 0
+    methods = Counter()
+    while True:
         with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE requests
-                SET category = ?, priority = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (result.get("category", "other"), result.get("priority", "medium"), request_id))
-            conn.commit()
+            pending = crud.claim_pending_categorizations(conn, size, time.time(), CLAIM_LEASE, request_ids)
+        if not pending:
+            break
+        summary = categorize_claimed(pending)
+        processed += summary["processed"]
+        methods.update(summary["methods"])
+
+    print(f"[CELERY] Bulk categorization: {processed}/{len(request_ids)} requests {dict(methods)} writer={result_writer.stats()}")
+    return {"status": "completed", "processed": processed, "methods": dict(methods), "writer": result_writer.stats()}
 
+@celery_app.task(name='tasks.categorize_maintenance_request', **CLASSIFICATION_TASK_OPTIONS)
+def categorize_maintenance_request(request_id: int, description: str):
+    """
+    비동기로 AI 카테고리화 수행 (Groq API 사용)
+
+    배치 모드(CATEGORIZE_BATCH_SIZE > 1)에서는 배치 작업을 예약만 하고,
+    실제 분류는 categorize_batch가 여러 요청을 모아서 수행합니다.
+    긴급 요청은 배치 창(BATCH_WINDOW)과 앞선 대기 요청을 기다리지 않고 바로 개별 분류합니다.
+    """
+    cached = categorization_cache.get_sync(description)
+    if cached:
+        save_categorization(request_id, {**cached, "source": METHOD_SOURCES["cache"]})
         return {
             "request_id": request_id,
-            "category": result.get("category", "other"),
-            "priority": result.get("priority", "medium"),
-            "status": "completed"
+            "category": cached["category"],
+            "priority": cached["priority"],
+            "status": "completed",
+            "method": "cache"
         }
 
-    except Exception as e:
-        print(f"[CELERY ERROR] Groq API failed: {type(e).__name__}: {str(e)}")
-        print("[CELERY] Falling back to keyword-based categorization")
-        result = categorize_with_keywords(description)
+    local = local_classifier.classify(description)
+    if local:
+        save_categorization(request_id, {**local, "source": METHOD_SOURCES["local"]})
+        return {
+            "request_id": request_id,
+            "category": local["category"],
+            "priority": local["priority"],
+            "status": "completed",
+            "method": "local"
+        }
 
-        # 키워드 기반 결과로 DB 업데이트
-        from contextlib import contextmanager
-        import sqlite3
+    if BATCH_SIZE > 1:
+        if not is_urgent(description):
+            return {
+                "request_id": request_id,
+                "status": "batched",
+                "batch": schedule_batch()
+            }
+        # categorize_batch가 같은 요청을 함께 분류하지 않도록 먼저 가져감
+        with get_db() as conn:
+            if not crud.claim_pending_categorizations(conn, 1, time.time(), CLAIM_LEASE, [request_id]):
+                return {"request_id": request_id, "status": "skipped"}  # 이미 분류되었거나 처리 중
 
-        @contextmanager
-        def get_db():
-            conn = sqlite3.connect("maintenance.db")
-            conn.row_factory = sqlite3.Row
-            try:
-                yield conn
-            finally:
-                conn.close()
+    print(f"[CELERY] Starting Groq AI categorization for request {request_id}")
+    result, method = categorize_single(description)
 
+    # 데이터베이스 업데이트 + 실시간 알림
+    try:
+        save_categorization(request_id, {**result, "source": METHOD_SOURCES[method]})
+    except Exception:
         with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE requests
-                SET category = ?, priority = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (result.get("category", "other"), result.get("priority", "medium"), request_id))
-            conn.commit()
+            crud.release_categorization_claims(conn, [request_id])
+        raise
 
+    if method == "keyword":
         return {
             "request_id": request_id,
             "category": result.get("category", "other"),
             "priority": result.get("priority", "medium"),
             "status": "completed_with_fallback",
-            "method": "keyword"
+            "method": "keyword",
+            "matched_terms": result.get("matched_terms", [])
         }
+    return {
+        "request_id": request_id,
+        "category": result.get("category", "other"),
+        "priority": result.get("priority", "medium"),
+        "status": "completed"
+    }
 
-@celery_app.task(name='tasks.send_notification_email')
+# 이메일은 중복 발송을 피하기 위해 실행 전에 확인(acks_late=False), 연결 오류만 재시도
+@celery_app.task(name='tasks.send_notification_email', acks_late=False,
+                 autoretry_for=(ConnectionError, TimeoutError), retry_backoff=True, max_retries=3)
 def send_notification_email(request_id: int, status: str, email: str):
     """
     비동기로 이메일 알림 전송 (추후 구현)
@@ -146,23 +293,43 @@ def send_notification_email(request_id: int, status: str, email: str):
     print(f"Sending email to {email} for request {request_id} with status {status}")
     return {"status": "sent", "email": email}
 
-@celery_app.task(name='tasks.cleanup_old_requests')
+@celery_app.task(name='tasks.generate_thumbnail',
+                 autoretry_for=(sqlite3.OperationalError, ConnectionError), retry_backoff=True, max_retries=3)
+def generate_thumbnail(request_id: int, key: str):
+    """
+    저장된 원본 이미지(key)로 WebP 썸네일을 만들어 저장하고, 같은 내용의 모든 첨부와
+    그 이미지를 대표 이미지로 쓰는 요청의 thumbnail_url 갱신
+
+    썸네일 키도 내용 해시에서 나오므로 이미 있으면 다시 만들지 않습니다.
+    Pillow가 설치되어 있지 않으면 건너뜁니다 (화면은 원본 이미지를 그대로 사용).
+    """
+    thumb_key = thumbnail_key(key)
+    original_bytes = thumbnail_bytes = None
+    if not storage.exists(thumb_key):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            return {"request_id": request_id, "status": "skipped", "reason": "Pillow not installed"}
+        original = storage.get(key)
+        thumbnail = make_thumbnail(original, THUMBNAIL_SIZE)
+        storage.put(thumb_key, thumbnail, "image/webp")
+        original_bytes, thumbnail_bytes = len(original), len(thumbnail)
+
+    with get_db() as conn:
+        rows = crud.set_thumbnail(conn, key, thumb_key, storage.url(key), storage.url(thumb_key))
+    for row in rows:
+        event_bus.publish_sync({"type": "request_updated", "data": row})
+    return {"request_id": request_id, "status": "completed", "thumbnail_url": storage.url(thumb_key),
+            "updated_requests": len(rows), "original_bytes": original_bytes, "thumbnail_bytes": thumbnail_bytes}
+
+@celery_app.task(name='tasks.cleanup_old_requests',
+                 autoretry_for=(sqlite3.OperationalError,), retry_backoff=True, max_retries=3)
 def cleanup_old_requests(days: int = 90):
     """
     오래된 완료 요청 정리 (스케줄러용)
     """
-    from contextlib import contextmanager
-    import sqlite3
     from datetime import datetime, timedelta
 
-    @contextmanager
-    def get_db():
-        conn = sqlite3.connect("maintenance.db")
-        try:
-            yield conn
-        finally:
-            conn.close()
-
     cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
 
     with get_db() as conn:
@@ -0,0 +1,30 @@
+from celery_app import (
+    CLASSIFICATION_QUEUE, MAINTENANCE_QUEUE, NOTIFICATIONS_QUEUE, PRIORITY_BULK, PRIORITY_URGENT, celery_app
+)
+import tasks
+
+
+def route(name, **options):
+    return celery_app.amqp.router.route(options, name)
+
+
+def test_tasks_are_routed_to_separate_queues():
+    assert route("tasks.categorize_maintenance_request")["queue"].name == CLASSIFICATION_QUEUE
+    assert route("tasks.categorize_batch")["queue"].name == CLASSIFICATION_QUEUE
+    assert route("tasks.send_notification_email")["queue"].name == NOTIFICATIONS_QUEUE
+    assert route("tasks.cleanup_old_requests")["queue"].name == MAINTENANCE_QUEUE
+    assert route("tasks.generate_thumbnail")["queue"].name == MAINTENANCE_QUEUE
+
+
+def test_priority_defaults_and_overrides():
+    assert route("tasks.categorize_requests")["priority"] == PRIORITY_BULK
+    # 발행 시 지정한 우선순위(긴급 요청)가 라우팅 기본값보다 우선
+    assert route("tasks.categorize_maintenance_request", priority=PRIORITY_URGENT)["priority"] == PRIORITY_URGENT
+
+
+def test_classification_tasks_ack_late_and_retry():
+    assert celery_app.conf.worker_prefetch_multiplier == 1
+    task = tasks.categorize_maintenance_request
+    assert task.acks_late and task.max_retries == 5
+    # 이메일은 중복 발송을 피하기 위해 실행 전에 확인
+    assert tasks.send_notification_email.acks_late is False
@@ -0,0 +1,63 @@
+import os
+import threading
+import pytest
+from database import ConnectionPool, PoolTimeout, database_path_from_url
+
+DB_PATH = "test_pool.db"
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(DB_PATH, size=2, timeout=0.2)
+    yield pool
+    pool.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+def test_connections_are_reused(pool):
+    """반환된 연결은 다음 checkout에서 재사용"""
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.stats()["open_connections"] == 1
+    assert pool.stats()["checkouts"] == 2
+
+def test_pragmas_applied(pool):
+    """WAL 모드 및 synchronous=NORMAL 적용 확인"""
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+def test_pool_waits_and_times_out(pool):
+    """풀이 가득 차면 대기하고, 제한 시간 초과 시 PoolTimeout"""
+    a = pool.acquire()
+    b = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    threading.Timer(0.05, pool.release, args=(a,)).start()
+    c = pool.acquire()
+    assert c is a
+    pool.release(b)
+    pool.release(c)
+
+    stats = pool.stats()
+    assert stats["waits"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_time_seconds"] > 0
+
+def test_uncommitted_transaction_rolled_back_on_release(pool):
+    """반환 시 커밋되지 않은 트랜잭션은 롤백"""
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+def test_database_path_from_url():
+    assert database_path_from_url("sqlite:///./maintenance.db") == "./maintenance.db"
+    assert database_path_from_url("postgresql://user@host/db") == "maintenance.db"
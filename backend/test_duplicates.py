@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+import crud
+from duplicates import DuplicateDetector, location_key, same_subject, signature, similarity
+from migrations import migrate
+
+# (먼저 접수된 설명, 새 설명, 중복인지)
+PAIRS = [
+    ("화장실 누수가 심해요", "화장실에 누수가 심해요!!", True),
+    ("복도 전등이 나갔어요", "복도 전등이 나갔습니다", True),
+    ("보일러 온수가 안 나와요", "보일러에서 온수가 안나옵니다", True),
+    ("엘리베이터가 멈췄어요 사람이 갇혔어요", "엘리베이터 멈춤! 안에 사람 갇힘", True),
+    ("화장실 누수가 심해요", "화장실 천장에서 물이 새요", False),
+    ("복도 전등이 나갔어요", "주방 싱크대 배수구가 막혔어요", False),
+    ("보일러 온수가 안 나와요", "에어컨에서 물이 떨어져요", False),
+    # 어미만 같고 시설이 다른 요청 (유사도는 기준을 넘지만 키워드가 다름)
+    ("변기가 막혔어요", "세면대가 막혔어요", False),
+    ("문이 안 닫혀요", "창문이 안 닫혀요", False),
+    ("에어컨이 안 돼요", "난방이 안 돼요", False),
+    ("수도꼭지가 고장났어요", "변기가 고장났어요", False),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def submit(conn, detector, description, location="101동 302호", status="pending"):
+    result = detector.check(conn, description, location)
+    row = crud.insert_request(conn, 1, description, "plumbing", "medium", location, None, "llm", result)
+    if status != "pending":
+        conn.execute("UPDATE requests SET status = ? WHERE id = ?", (status, row["id"]))
+        conn.commit()
+    return row
+
+
+def test_detector_separates_duplicates(conn):
+    detector = DuplicateDetector(threshold=0.3)
+    for index, (first, second, duplicate) in enumerate(PAIRS):
+        location = f"{index + 1}동 101호"
+        original = submit(conn, detector, first, location=location)
+        match = detector.check(conn, second, location)["match"]
+        assert (match is not None and match["id"] == original["id"]) == duplicate, (first, second)
+    assert detector.stats()["subject_mismatches"] == 4
+
+    # 키워드가 없거나 한쪽 키워드가 다른 쪽에 모두 포함되면 같은 대상
+    assert same_subject("엘리베이터가 멈췄어요", "엘리베이터 멈춤")
+    assert same_subject("천장에서 물이 떨어져요", "화장실 천장에서 물이 떨어져요")
+    assert not same_subject("문이 안 닫혀요", "창문이 안 닫혀요")
+
+
+def test_signature_is_deterministic():
+    # 같은 설명은 항상 같은 서명 (프로세스와 무관)
+    assert signature("화장실 누수") == signature("화장실  누수!")
+    assert similarity(signature("화장실 누수"), signature("화장실 누수")) == 1.0
+    assert signature("!!!") == b"" and similarity(b"", signature("누수")) == 0.0
+
+
+def test_location_key():
+    assert location_key("101동 302호") == location_key("101동302호.") == "101동302호"
+    assert location_key("  ") is None and location_key(None) is None
+
+
+def test_detector_links_to_original(conn):
+    detector = DuplicateDetector(threshold=0.3)
+    original = submit(conn, detector, "화장실 누수가 심해요")
+    first = submit(conn, detector, "화장실에 누수가 심해요!!")
+    second = submit(conn, detector, "화장실에 누수가 심해요")
+    assert first["duplicate_of"] == second["duplicate_of"] == original["id"]
+
+    # 다른 위치 / 위치 없음(서명도 저장 안 함)은 비교하지 않음
+    assert detector.check(conn, "화장실 누수가 심해요", "102동 302호")["match"] is None
+    assert detector.check(conn, "화장실 누수가 심해요", None)["match"] is None
+    submit(conn, detector, "화장실 누수가 심해요", location=None)
+    assert conn.execute("SELECT COUNT(*) FROM request_signatures").fetchone()[0] == 3
+    assert detector.stats()["matches"] == 2
+
+
+def test_window_and_status_limit_candidates(conn):
+    detector = DuplicateDetector(threshold=0.3, window_hours=24)
+    old = submit(conn, detector, "복도 전등이 나갔어요")
+    conn.execute("UPDATE request_signatures SET created_at = datetime('now', '-2 days') WHERE request_id = ?",
+                 (old["id"],))
+    done = submit(conn, detector, "복도 전등이 나갔어요", status="completed")
+    assert done["duplicate_of"] is None
+    assert detector.check(conn, "복도 전등이 나갔습니다", "101동 302호")["match"] is None
+
+    assert DuplicateDetector(enabled=False).check(conn, "복도 전등이 나갔어요", "101동 302호")["match"] is None
+
+
+class ExplainConnection:
+    """execute하는 SQL의 실행 계획을 대신 반환"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, parameters=()):
+        return self.conn.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+
+
+def test_candidate_query_uses_location_index(conn):
+    # crud.list_duplicate_candidates가 실제로 실행하는 SQL의 계획
+    plan = " ".join(row[3] for row in crud.list_duplicate_candidates(ExplainConnection(conn), "101동302호", 72, 200))
+    assert "idx_request_signatures_location" in plan
+    assert "TEMP B-TREE" not in plan
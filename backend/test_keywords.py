@@ -0,0 +1,51 @@
+from keywords import categorize_with_keywords, is_urgent, matcher
+
+
+def test_category_and_priority_precedence():
+    # 여러 카테고리가 일치하면 표 순서상 먼저인 카테고리, 우선순위는 high > low
+    result = categorize_with_keywords("화장실 전등이 나중에 고장")
+    assert (result["category"], result["priority"]) == ("electrical", "high")
+
+    result = categorize_with_keywords("나중에 벽지 교체")
+    assert (result["category"], result["priority"]) == ("structural", "low")
+
+    result = categorize_with_keywords("택배 보관 문의 드립니다")
+    assert (result["category"], result["priority"]) == ("structural", "medium")  # "문"
+
+    result = categorize_with_keywords("주차 스티커 재발급")
+    assert (result["category"], result["priority"], result["matched_terms"]) == ("other", "medium", [])
+
+
+def test_overlapping_and_prefix_keywords_all_match():
+    # "정전기": 겹치는 "정전"과 "전기" 모두 일치
+    assert matcher.match("정전기")["category_terms"] == {"electrical": ["정전", "전기"]}
+
+    # "수도꼭지"가 가장 길게 일치해도 접두사 "수도"도 일치로 기록
+    result = matcher.match("수도꼭지에서 물이 샘")
+    assert result["category_terms"] == {"plumbing": ["수도", "수도꼭지", "물"]}
+    assert result["priority_terms"] == {"high": ["샘"]}
+
+
+def test_matched_terms_explain_decision():
+    result = categorize_with_keywords("배관 누수 긴급")
+    assert result["category"] == "plumbing"
+    assert result["priority"] == "high"
+    assert result["matched_terms"] == ["배관", "누수", "긴급"]
+
+
+def test_urgent_keywords_match_whole_terms():
+    # 조사/어미가 붙은 긴급 키워드
+    assert is_urgent("천장 누수가 심해요")
+    assert is_urgent("가스 냄새 긴급")
+    assert is_urgent("엘리베이터에 갇혔어요")
+
+    # 우선순위 high 키워드("새", "계속", "고장")가 들어 있어도 일상적인 요청은 긴급 아님
+    assert not is_urgent("화장실에서 냄새가 나요")
+    assert not is_urgent("새벽에 소음이 계속 들려요")
+    assert not is_urgent("새로 이사왔는데 전등 교체 부탁드려요")
+    assert not is_urgent("수도꼭지가 고장났어요")
+
+    # 단어 중간이나 제외 단어로 시작하는 경우
+    assert not is_urgent("정전기가 심해요")
+    assert not is_urgent("가스레인지 불이 안 켜져요")
+    assert not is_urgent("점검 일정이 연기됐나요")
@@ -0,0 +1,95 @@
+import random
+import sqlite3
+
+from local_classifier import (
+    LocalClassifier, LocalClassifierTier, evaluate, load_training_data, train, train_with_holdout
+)
+
+FILLER = ["우리", "집", "어제부터", "소리가", "나요", "확인", "부탁드립니다", "관리실", "층", "입구", "쪽", "주말"]
+CATEGORY_WORDS = {
+    "electrical": ["전등", "콘센트", "누전", "차단기"],
+    "plumbing": ["배관", "변기", "싱크대", "수도꼭지"],
+    "hvac": ["에어컨", "보일러", "환기구", "난방"],
+    "structural": ["균열", "창문", "계단", "천장"],
+    "other": ["택배", "주차", "스티커", "소음"],
+}
+PRIORITY_WORDS = {"high": ["긴급", "위험"], "medium": ["점검", "교체"], "low": ["나중에", "천천히"]}
+
+
+def make_samples(count, seed=0):
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        category = rng.choice(list(CATEGORY_WORDS))
+        priority = rng.choice(list(PRIORITY_WORDS))
+        words = rng.sample(FILLER, 4) + [rng.choice(CATEGORY_WORDS[category]), rng.choice(PRIORITY_WORDS[priority])]
+        rng.shuffle(words)
+        samples.append((" ".join(words), category, priority))
+    return samples
+
+
+def test_train_and_evaluate():
+    model = train(make_samples(600), bits=16, epochs=60)
+    report = evaluate(model, make_samples(200, seed=1), threshold=0.8)
+
+    assert report["category_accuracy"] >= 0.95
+    assert report["priority_accuracy"] >= 0.95
+    assert report["coverage"] > 0.5
+    assert report["confident_accuracy"] >= 0.95
+
+    result = model.predict("관리실 앞 배관 긴급")
+    assert (result["category"], result["priority"]) == ("plumbing", "high")
+    assert 0 < result["confidence"] <= 1
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    model = train(make_samples(200), bits=14, epochs=30)
+    path = str(tmp_path / "models" / "local.npz")
+    model.save(path)
+
+    loaded = LocalClassifier.load(path)
+    assert loaded.meta["samples"] == 200
+    text = "에어컨 점검 부탁드립니다"
+    assert loaded.predict(text)["category"] == model.predict(text)["category"]
+    assert abs(loaded.predict(text)["confidence"] - model.predict(text)["confidence"]) < 1e-4
+
+
+def test_tier_escalates_low_confidence(tmp_path):
+    model = train(make_samples(400), bits=14, epochs=60)
+
+    tier = LocalClassifierTier(path=str(tmp_path / "missing.npz"), threshold=0.8)
+    assert tier.classify("배관 긴급") is None  # 모델 파일 없음 → 항상 LLM
+    assert tier.stats()["loaded"] is False
+
+    tier.set_model(model)
+    assert tier.classify("변기 긴급")["category"] == "plumbing"
+
+    tier.threshold = 1.01
+    assert tier.classify("변기 긴급") is None
+    stats = tier.stats()
+    assert (stats["predictions"], stats["confident"], stats["escalated"]) == (2, 1, 1)
+
+
+def test_training_data_uses_llm_and_manual_labels_only():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE requests (id INTEGER PRIMARY KEY, description TEXT, category TEXT, "
+                 "priority TEXT, category_source TEXT)")
+    conn.executemany("INSERT INTO requests VALUES (?, ?, ?, ?, ?)", [
+        (1, "전등 고장", "electrical", "high", "llm"),
+        (2, "접수 중", "processing", "processing", None),
+        (3, "이상한 라벨", "garden", "low", "llm"),
+        (4, "물이 샘", "plumbing", "medium", "keyword"),  # 키워드 폴백 결과
+        (5, "에어컨 고장", "hvac", "high", "local"),  # 로컬 분류기 자신의 예측
+        (6, "창문 파손", "structural", "medium", "manual"),
+    ])
+    assert load_training_data(conn) == [("전등 고장", "electrical", "high"),
+                                        ("창문 파손", "structural", "medium")]
+    assert load_training_data(conn, after_id=1) == [("창문 파손", "structural", "medium")]
+
+
+def test_holdout_metrics_and_refit_on_all_samples():
+    samples = [("전등이 깜빡여요", "electrical", "medium"), ("배수구 막힘", "plumbing", "low")] * 10
+    model = train_with_holdout(samples, holdout=0.2, threshold=0.5, epochs=20, bits=12)
+    # 평가는 떼어 둔 20%로, 저장할 모델은 전체 샘플로 학습
+    assert model.meta["holdout"]["samples"] == 4
+    assert model.meta["samples"] == 20
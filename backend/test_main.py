@@ -2,7 +2,6 @@ import pytest
 from fastapi.testclient import TestClient
 from main import app, init_db
 import os
-import sqlite3
 
 client = TestClient(app)
 
@@ -13,29 +12,50 @@ def setup_test_db():
     if os.path.exists("test_maintenance.db"):
         os.remove("test_maintenance.db")
 
-    # main.py의 DB 연결을 테스트 DB로 변경
-    import main
-    original_get_db = main.get_db
-
-    from contextlib import contextmanager
-    @contextmanager
-    def test_get_db():
-        conn = sqlite3.connect("test_maintenance.db")
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
+    # 공유 연결 풀을 테스트 DB로 변경
+    import database
+    original_path = database.pool.path
 
-    main.get_db = test_get_db
+    database.configure("test_maintenance.db")
     init_db()
+    # 이전 테스트 DB의 사용자가 캐시에 남지 않도록
+    from auth import user_cache
+    user_cache.invalidate()
+    from categorization_cache import categorization_cache
+    categorization_cache.clear()
+    # 로컬에 학습된 모델이 있어도 테스트는 모델 없이 시작
+    from local_classifier import local_classifier
+    local_classifier.set_model(None)
 
     yield
 
     # 테스트 후 정리
-    main.get_db = original_get_db
-    if os.path.exists("test_maintenance.db"):
-        os.remove("test_maintenance.db")
+    database.configure(original_path)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists("test_maintenance.db" + suffix):
+            os.remove("test_maintenance.db" + suffix)
+
+def auth_headers(email: str, role: str = "user") -> dict:
+    """테스트용 사용자를 DB에 직접 만들고 Bearer 헤더 반환"""
+    from database import get_db
+    from auth import create_access_token
+    with get_db() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO users (email, hashed_password, full_name, role) VALUES (?, ?, ?, ?)",
+            (email, "not-a-real-hash", email.split("@")[0], role)
+        )
+        conn.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+@pytest.fixture
+def no_ai(monkeypatch):
+    """동기 분류를 키워드 기반으로 고정 (외부 API 호출 없음)"""
+    import main
+
+    async def fake_categorize(description):
+        return main.categorize_with_keywords(description)
+
+    monkeypatch.setattr(main, "categorize_with_ai_sync", fake_categorize)
 
 def test_read_root():
     """루트 엔드포인트 테스트"""
@@ -333,5 +353,1075 @@ def test_get_current_user_invalid_token():
     )
     assert response.status_code == 401
 
+def test_authenticated_request_flow(no_ai):
+    """인증된 사용자의 요청 생성 → 본인 목록 → 관리자 목록/수정/통계"""
+    user = auth_headers("owner@example.com")
+    other = auth_headers("other@example.com")
+    admin = auth_headers("boss@example.com", role="admin")
+
+    response = client.post("/api/requests", headers=user, json={
+        "description": "화장실 변기 막힘",
+        "location": "101호",
+        "use_async": False
+    })
+    assert response.status_code == 200
+    created = response.json()
+    assert created["category"] == "plumbing"
+
+    mine = client.get("/api/my-requests", headers=user).json()
+    assert [r["id"] for r in mine] == [created["id"]]
+    assert client.get("/api/my-requests", headers=other).json() == []
+    assert client.get(f"/api/requests/{created['id']}", headers=other).status_code == 403
+
+    assert len(client.get("/api/requests", headers=admin).json()) == 1
+    response = client.patch(f"/api/requests/{created['id']}", headers=admin, json={"status": "completed"})
+    assert response.json()["status"] == "completed"
+    assert client.patch("/api/requests/99999", headers=admin, json={"status": "completed"}).status_code == 404
+
+    stats = client.get("/api/stats", headers=admin).json()
+    assert stats["total"] == 1
+    assert stats["by_status"] == {"completed": 1}
+
+def test_run_db_does_not_block_event_loop():
+    """run_db로 실행한 느린 쿼리 동안에도 이벤트 루프가 다른 작업을 처리"""
+    import asyncio
+    import time
+    from database import run_db
+
+    def slow_query(conn):
+        time.sleep(0.3)
+        return conn.execute("SELECT 1").fetchone()[0]
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await run_db(slow_query)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == 1
+    assert ticks >= 10
+
+def seed_requests(rows):
+    """(user_id, category, priority, created_at) 목록으로 요청 직접 생성"""
+    from database import get_db
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, category, priority, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, f"request {i}", category, priority, created_at)
+             for i, (user_id, category, priority, created_at) in enumerate(rows)]
+        )
+        conn.commit()
+
+def test_keyset_pagination():
+    """limit + X-Next-Cursor로 모든 행을 중복 없이 최신순으로 순회"""
+    admin = auth_headers("pager@example.com", role="admin")
+    # 같은 created_at을 가진 행이 페이지 경계에 걸쳐도 id로 구분
+    seed_requests([(1, "plumbing", "high", f"2026-01-0{1 + i // 3} 00:00:00") for i in range(7)])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/requests", headers=admin, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    assert len({r["id"] for r in seen}) == 7
+    keys = [(r["created_at"], r["id"]) for r in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_list_filters_and_projection():
+    """카테고리/기간 필터와 fields 프로젝션"""
+    admin = auth_headers("filter@example.com", role="admin")
+    seed_requests([
+        (1, "plumbing", "high", "2026-01-01 09:00:00"),
+        (1, "electrical", "low", "2026-02-01 09:00:00"),
+        (1, "plumbing", "low", "2026-03-01 09:00:00"),
+    ])
+
+    response = client.get("/api/requests", headers=admin, params={
+        "category": "plumbing", "created_from": "2026-02-01", "fields": "status,category"
+    })
+    assert response.status_code == 200
+    assert response.json() == [{"id": 3, "created_at": "2026-03-01 09:00:00", "status": "pending", "category": "plumbing"}]
+
+    assert client.get("/api/requests", headers=admin, params={"fields": "password"}).status_code == 400
+    assert client.get("/api/requests", headers=admin, params={"cursor": "!!!"}).status_code == 400
+
+def test_keyset_query_uses_index():
+    """커서 조건이 있어도 인덱스 순서로 읽고 정렬용 임시 B-tree가 없음"""
+    from database import get_db
+    with get_db() as conn:
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM requests WHERE user_id = ? AND (created_at, id) < (?, ?) "
+            "ORDER BY created_at DESC, id DESC LIMIT 51", (1, "2026-01-01 00:00:00", 10)))
+    assert "idx_requests_user_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_export_ndjson_csv_gzip():
+    """NDJSON/CSV 스트리밍 내보내기, 필터 및 gzip"""
+    import csv
+    import gzip
+    import io
+    import json
+
+    admin = auth_headers("export@example.com", role="admin")
+    seed_requests([
+        (1, "plumbing", "high", "2026-01-01 09:00:00"),
+        (2, "electrical", "low", "2026-02-01 09:00:00"),
+        (1, "plumbing", "low", "2026-03-01 09:00:00"),
+    ])
+
+    response = client.get("/api/requests/export", headers=admin, params={"category": "plumbing"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in rows] == [1, 3]
+
+    response = client.get("/api/requests/export", headers=admin, params={"format": "csv"})
+    reader = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert [r["category"] for r in reader] == ["plumbing", "electrical", "plumbing"]
+
+    response = client.get("/api/requests/export", headers=admin, params={"gzip": "true"})
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+    assert len(lines) == 3
+
+    assert client.get("/api/requests/export", headers=admin, params={"format": "xml"}).status_code == 422
+    assert client.get("/api/requests/export", headers=auth_headers("nosy@example.com")).status_code == 403
+
+def test_stats_maintained_incrementally(no_ai):
+    """INSERT/UPDATE/DELETE(직접 SQL 포함) 후에도 집계 테이블이 실제 데이터와 일치"""
+    from database import get_db
+    from stats import check_stats, rebuild_stats
+
+    admin = auth_headers("stats@example.com", role="admin")
+    seed_requests([
+        (1, "plumbing", "high", "2026-01-05 09:00:00"),
+        (1, "electrical", "low", "2026-01-06 09:00:00"),
+        (2, "processing", "processing", "2026-01-13 09:00:00"),
+    ])
+
+    client.patch("/api/requests/1", headers=admin, json={"status": "completed", "priority": "low"})
+    with get_db() as conn:
+        # Celery 재분류와 동일한 직접 UPDATE
+        conn.execute("UPDATE requests SET category = 'hvac', priority = 'medium' WHERE id = 3")
+        conn.commit()
+    client.delete("/api/requests/2", headers=admin)
+
+    stats = client.get("/api/stats", headers=admin).json()
+    assert stats == {
+        "total": 2,
+        "by_status": {"completed": 1, "pending": 1},
+        "by_category": {"plumbing": 1, "hvac": 1},
+        "by_priority": {"low": 1, "medium": 1},
+    }
+
+    series = client.get("/api/stats/series", headers=admin, params={"bucket": "week"}).json()
+    assert series == [
+        {"period": "2026-01-05", "total": 1, "by_category": {"plumbing": 1}, "by_priority": {"low": 1}},
+        {"period": "2026-01-12", "total": 1, "by_category": {"hvac": 1}, "by_priority": {"medium": 1}},
+    ]
+
+    with get_db() as conn:
+        assert check_stats(conn) == []
+        conn.execute("UPDATE request_stats SET count = 99 WHERE dimension = 'total'")
+        conn.commit()
+        assert check_stats(conn) != []
+        rebuild_stats(conn)
+        assert check_stats(conn) == []
+
+        # 집계 테이블에만 남은 일자 행 (실제 데이터 없음)
+        conn.execute(
+            "INSERT INTO request_stats_daily (day, category, priority, count) VALUES ('2025-12-01', 'hvac', 'low', 1)"
+        )
+        conn.commit()
+        assert check_stats(conn) == [("daily", None, 1, "rows differ")]
+        rebuild_stats(conn)
+        assert check_stats(conn) == []
+
+def test_user_cache_hit_and_role_invalidation():
+    """두 번째 인증부터 캐시 적중, 역할 변경 시 즉시 반영"""
+    from auth import user_cache
+    from database import get_db
+
+    super_admin = auth_headers("root@example.com", role="super_admin")
+    user = auth_headers("promote@example.com")
+
+    assert client.get("/api/auth/me", headers=user).json()["role"] == "user"
+    hits = user_cache.hits
+    assert client.get("/api/auth/me", headers=user).json()["role"] == "user"
+    assert user_cache.hits == hits + 1
+
+    with get_db() as conn:
+        user_id = conn.execute("SELECT id FROM users WHERE email = 'promote@example.com'").fetchone()[0]
+    response = client.patch(f"/api/admin/users/{user_id}/role", headers=super_admin, params={"new_role": "admin"})
+    assert response.status_code == 200
+
+    assert client.get("/api/auth/me", headers=user).json()["role"] == "admin"
+
+def test_user_cache_ttl_and_lru():
+    """TTL 만료와 최대 크기 초과 시 LRU 제거"""
+    from auth import User, UserCache
+
+    cache = UserCache(maxsize=2, ttl=60)
+    for email in ("a@x", "b@x", "c@x"):
+        cache.set(email, User(email=email))
+    assert cache.get("a@x") is None
+    assert cache.get("c@x").email == "c@x"
+    assert cache.stats()["evictions"] == 1
+
+    expired = UserCache(ttl=-1)
+    expired.set("a@x", User(email="a@x"))
+    assert expired.get("a@x") is None
+
+def test_hashing_pool_backpressure():
+    """실행 + 대기 한도를 넘는 해싱 요청은 즉시 거부"""
+    import asyncio
+    import time
+    from hashing import HashingPool, HashingPoolSaturated
+
+    pool = HashingPool(workers=1, max_queue=1)
+
+    async def scenario():
+        slow = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        try:
+            await pool.run(time.sleep, 0)
+        except HashingPoolSaturated:
+            rejected = True
+        else:
+            rejected = False
+        await asyncio.gather(*slow)
+        return rejected
+
+    assert asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["max_in_flight"] == 2
+    pool.shutdown()
+
+def test_login_returns_503_when_hashing_saturated(monkeypatch):
+    """해싱 풀 포화 시 로그인은 503 + Retry-After"""
+    import main
+    from hashing import HashingPool
+
+    from database import get_db
+    from auth import get_password_hash
+    with get_db() as conn:
+        conn.execute("INSERT INTO users (email, hashed_password) VALUES (?, ?)",
+                     ("busy@example.com", get_password_hash("pw")))
+        conn.commit()
+
+    full = HashingPool(workers=1, max_queue=0)
+    full._in_flight = 1
+    monkeypatch.setattr(main, "hashing_pool", full)
+
+    response = client.post("/api/auth/login", data={"username": "busy@example.com", "password": "pw"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_events_reach_subscribers_from_other_threads(monkeypatch):
+    """버스에 발행된 이벤트(Celery의 publish_sync 포함)가 구독 핸들러로 전달"""
+    import asyncio
+    import threading
+    import tasks
+    from events import InMemoryEventBus
+
+    bus = InMemoryEventBus()
+    monkeypatch.setattr(tasks, "event_bus", bus)
+    seed_requests([(1, "processing", "processing", "2026-01-01 00:00:00")])
+
+    async def scenario():
+        received = []
+
+        async def handler(event):
+            received.append(event)
+
+        await bus.start(handler)
+        await bus.publish({"type": "new_request", "data": {"id": 1}})
+
+        # Celery 워커 스레드에서 분류 결과 저장
+        worker = threading.Thread(target=tasks.save_categorization, args=(1, {"category": "hvac", "priority": "low"}))
+        worker.start()
+        while worker.is_alive():
+            await asyncio.sleep(0.01)
+        await bus.stop()
+        return received
+
+    received = asyncio.run(scenario())
+    assert [e["type"] for e in received] == ["new_request", "request_updated"]
+    assert received[1]["data"]["category"] == "hvac"
+
+def test_websocket_topic_subscriptions(no_ai):
+    """이벤트는 권한에 맞게 구독한 소켓에만 전달"""
+    owner = auth_headers("ws-owner@example.com")
+    other = auth_headers("ws-other@example.com")
+    admin = auth_headers("ws-admin@example.com", role="admin")
+    token = lambda headers: headers["Authorization"].split()[1]
+
+    with TestClient(app) as live:
+        with live.websocket_connect("/ws") as ws_owner, \
+             live.websocket_connect(f"/ws?token={token(other)}") as ws_other, \
+             live.websocket_connect("/ws") as ws_admin:
+
+            ws_owner.send_json({"type": "subscribe", "topics": ["own"]})
+            assert ws_owner.receive_json() == {"type": "error", "detail": "Authenticate first"}
+            ws_owner.send_json({"type": "auth", "token": token(owner)})
+            assert ws_owner.receive_json()["type"] == "auth_ok"
+            ws_owner.send_json({"type": "subscribe", "topics": ["own"]})
+            assert ws_owner.receive_json()["type"] == "subscribed"
+
+            assert ws_other.receive_json()["type"] == "auth_ok"
+            ws_other.send_json({"type": "subscribe", "topics": ["all"]})
+            assert ws_other.receive_json()["type"] == "error"
+            ws_other.send_json({"type": "subscribe", "topics": ["own"]})
+            assert ws_other.receive_json()["type"] == "subscribed"
+
+            ws_admin.send_json({"type": "auth", "token": token(admin)})
+            ws_admin.receive_json()
+            ws_admin.send_json({"type": "subscribe", "topics": ["category:plumbing"]})
+            assert ws_admin.receive_json() == {"type": "subscribed", "topics": ["category:plumbing"]}
+
+            response = live.post("/api/requests", headers=owner, json={
+                "description": "싱크대 배관 누수", "use_async": False
+            })
+            request_id = response.json()["id"]
+
+            assert ws_owner.receive_json()["data"]["id"] == request_id
+            assert ws_admin.receive_json()["data"]["id"] == request_id
+
+            # 다른 사용자는 이벤트를 받지 않았으므로 다음 메시지는 구독 응답
+            ws_other.send_json({"type": "unsubscribe", "topics": ["own"]})
+            assert ws_other.receive_json() == {"type": "subscribed", "topics": []}
+
+@pytest.fixture
+def fake_llm_client(monkeypatch):
+    """가짜 LLM 서버(fake_llm)에 ASGI로 연결된 클라이언트로 교체"""
+    import httpx
+    import main
+    import fake_llm
+    from llm import AsyncLLMClient
+
+    fake_llm.reset()
+    llm = AsyncLLMClient(base_url="http://fake-llm", timeout=0.5, max_concurrency=2,
+                         transport=httpx.ASGITransport(app=fake_llm.app))
+    monkeypatch.setattr(main, "llm_client", llm)
+    yield llm
+    fake_llm.reset()
+
+def test_llm_client_bounds_concurrency(fake_llm_client):
+    """동시 호출 수는 max_concurrency로 제한되고 결과는 JSON으로 파싱"""
+    import asyncio
+    import fake_llm
+
+    fake_llm.app.state.latency = 0.05
+
+    async def scenario():
+        results = await asyncio.gather(*[fake_llm_client.categorize("욕실 배관 누수") for _ in range(6)])
+        await fake_llm_client.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == [{"category": "plumbing", "priority": "high"}] * 6
+    assert fake_llm.app.state.max_in_flight == 2
+    assert fake_llm_client.stats()["calls"] == 6
+
+def test_sync_categorization_uses_llm_and_falls_back(fake_llm_client):
+    """동기 분류는 LLM 결과를 쓰고, 시간 초과/오류 시 키워드 분류로 대체"""
+    import fake_llm
+
+    headers = auth_headers("llm@example.com")
+    payload = {"description": "복도 전등이 깜빡임", "location": "3층", "use_async": False}
+
+    response = client.post("/api/requests", json=payload, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["category"] == "electrical"
+    assert fake_llm.app.state.calls == 1
+
+    fake_llm.app.state.latency = 1.0
+    response = client.post("/api/requests", json={**payload, "description": "에어컨 고장"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["category"] == "hvac"
+    assert response.json()["priority"] == "high"  # 키워드 분류 결과 ("고장")
+    assert fake_llm_client.stats()["timeouts"] == 1
+
+def test_categorization_cache_skips_repeated_llm_calls(fake_llm_client):
+    """정규화 후 같은 설명은 LLM을 다시 호출하지 않고, Celery 작업도 같은 캐시를 사용"""
+    import fake_llm
+    import tasks
+    from categorization_cache import categorization_cache, normalize_description
+
+    assert normalize_description("  화장실 변기 막힘!! ") == normalize_description("화장실  변기 막힘")
+
+    headers = auth_headers("cache@example.com")
+    for description in ["화장실 변기 막힘", "  화장실  변기 막힘!!"]:
+        response = client.post("/api/requests", json={"description": description, "use_async": False}, headers=headers)
+        assert response.json()["category"] == "plumbing"
+    assert fake_llm.app.state.calls == 1
+    assert categorization_cache.stats()["hits"] == 1
+
+    # 키워드 폴백 결과는 캐시하지 않음
+    fake_llm.app.state.fail = True
+    client.post("/api/requests", json={"description": "보일러 고장", "use_async": False}, headers=headers)
+    assert categorization_cache.get_sync("보일러 고장") is None
+
+    # 허용되지 않은 카테고리/우선순위(잘못된 LLM 응답)도 캐시하지 않음
+    categorization_cache.set_sync("엘리베이터 멈춤", {"category": "elevator", "priority": "high"})
+    categorization_cache.set_sync("엘리베이터 멈춤", {"category": "other", "priority": "urgent"})
+    assert categorization_cache.get_sync("엘리베이터 멈춤") is None
+    assert categorization_cache.stats()["rejected"] == 2
+
+    # Celery 작업: 캐시 적중 시 Groq 호출 없이 저장
+    seed_requests([(1, "processing", "processing", "2026-01-01 00:00:00")])
+    result = tasks.categorize_maintenance_request(1, "화장실 변기 막힘.")
+    assert result["method"] == "cache"
+    assert result["category"] == "plumbing"
+
+@pytest.fixture
+def fake_sync_llm(monkeypatch):
+    """Celery 작업의 동기 LLM 클라이언트를 가짜 LLM 서버로 교체"""
+    import tasks
+    import fake_llm
+    from llm import LLMClient
+
+    fake_llm.reset()
+    llm = LLMClient(base_url="http://fake-llm", transport=fake_llm.mock_transport())
+    monkeypatch.setattr(tasks, "sync_llm_client", llm)
+    yield llm
+    fake_llm.reset()
+
+def insert_pending(descriptions):
+    """비동기 접수 직후처럼 분류 대기 상태('processing')인 요청 생성"""
+    from database import get_db
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, category, priority) VALUES (1, ?, 'processing', 'processing')",
+            [(description,) for description in descriptions]
+        )
+        conn.commit()
+
+def test_batch_categorization_single_call(fake_sync_llm):
+    """대기 요청을 한 번의 LLM 호출로 분류하고 한꺼번에 저장"""
+    import fake_llm
+    import tasks
+    from database import get_db
+
+    insert_pending(["복도 전등 고장", "싱크대 배관 누수", "보일러 소음", "벽 균열"])
+    summary = tasks.run_categorization_batch(limit=10)
+
+    assert summary == {"processed": 4, "methods": {"batch": 4}}
+    assert fake_llm.app.state.calls == 1
+    with get_db() as conn:
+        rows = conn.execute("SELECT category FROM requests ORDER BY id").fetchall()
+    assert [row["category"] for row in rows] == ["electrical", "plumbing", "hvac", "structural"]
+
+    # 같은 설명은 다음 배치에서 캐시 사용
+    insert_pending(["복도 전등 고장"])
+    assert tasks.run_categorization_batch(limit=10)["methods"] == {"cache": 1}
+    assert fake_llm.app.state.calls == 1
+
+def test_batch_categorization_falls_back_per_item(fake_sync_llm):
+    """배치 응답을 파싱할 수 없으면 요청마다 개별 호출"""
+    import fake_llm
+    import tasks
+    from llm import parse_batch_response
+
+    # 일부 항목이 빠지거나 잘못된 값이면 그 항목만 제외
+    assert parse_batch_response(
+        '{"results": [{"id": 1, "category": "hvac", "priority": "low"}, {"id": 2, "category": "x", "priority": "low"}]}',
+        [1, 2, 3]
+    ) == {1: {"category": "hvac", "priority": "low"}}
+
+    fake_llm.app.state.malformed_batch = True
+    insert_pending(["에어컨 안됨", "창문 깨짐"])
+    summary = tasks.run_categorization_batch(limit=10)
+
+    assert summary == {"processed": 2, "methods": {"llm": 2}}
+    assert fake_llm.app.state.calls == 3
+
+def test_local_classifier_tier_skips_llm(fake_llm_client, fake_sync_llm, monkeypatch):
+    """로컬 분류기가 확신하면 LLM을 호출하지 않고, 확신하지 못하면 LLM으로 넘김"""
+    import fake_llm
+    import tasks
+    from local_classifier import local_classifier, train
+    from test_local_classifier import make_samples
+
+    local_classifier.set_model(train(make_samples(400), bits=14, epochs=60))
+    monkeypatch.setattr(local_classifier, "threshold", 0.6)
+    headers = auth_headers("local@example.com")
+
+    response = client.post("/api/requests", json={"description": "관리실 앞 변기 긴급", "use_async": False}, headers=headers)
+    assert (response.json()["category"], response.json()["priority"]) == ("plumbing", "high")
+    assert fake_llm.app.state.calls == 0
+
+    insert_pending(["주말 에어컨 점검"])
+    assert tasks.run_categorization_batch(limit=10)["methods"] == {"local": 1}
+
+    monkeypatch.setattr(local_classifier, "threshold", 1.01)
+    response = client.post("/api/requests", json={"description": "복도 전등 고장", "use_async": False}, headers=headers)
+    assert response.json()["category"] == "electrical"
+    assert fake_llm.app.state.calls == 1
+
+def test_llm_circuit_breaker_and_rate_limit_fall_back_fast(fake_llm_client):
+    """LLM 오류가 이어지면 서킷이 열리고, 열린 동안은 LLM을 호출하지 않고 바로 키워드 폴백"""
+    import fake_llm
+    from resilience import CircuitBreaker, TokenBucket
+
+    fake_llm_client.breaker = CircuitBreaker("groq", failure_threshold=2, recovery_timeout=60)
+    fake_llm.app.state.fail = True
+    headers = auth_headers("breaker@example.com")
+
+    for description in ("보일러 고장", "보일러 소음", "난방 고장", "난방 소음"):
+        response = client.post("/api/requests", json={"description": description, "use_async": False}, headers=headers)
+        assert response.json()["category"] == "hvac"  # 키워드 분류
+    assert fake_llm.app.state.calls == 2
+    assert fake_llm_client.breaker.stats()["state"] == "open"
+    assert fake_llm_client.stats()["rejected"] == 2
+
+    # 429의 retry-after 동안은 (서킷이 닫혀 있어도) 기다리지 않고 폴백
+    fake_llm_client.breaker = None
+    fake_llm_client.rate_limiter = TokenBucket(rate=100, capacity=100)
+    fake_llm.app.state.retry_after = 30
+    for description in ("에어컨 소음", "에어컨 고장"):
+        client.post("/api/requests", json={"description": description, "use_async": False}, headers=headers)
+    assert fake_llm.app.state.calls == 3
+    stats = fake_llm_client.rate_limiter.stats()
+    assert (stats["penalties"], stats["limited"]) == (1, 1)
+    assert stats["blocked_seconds"] > 0
+
+def test_async_submit_writes_outbox_and_relay_dispatches():
+    """비동기 접수는 요청과 작업을 한 번에 커밋하고, 브로커 장애 중에는 릴레이가 백오프 후 재발행"""
+    import time
+    import crud
+    from database import get_db
+    from outbox import OutboxRelay
+
+    headers = auth_headers("outbox@example.com")
+    created = [
+        client.post("/api/requests", json={"description": description}, headers=headers).json()
+        for description in ("복도 전등 고장", "배관 누수", "창문 파손")
+    ]
+    assert all(row["category"] == "processing" and row["task_id"] for row in created)
+
+    sent = []
+    broker_down = True
+
+    def send(jobs):
+        if broker_down:
+            raise ConnectionError("broker unavailable")
+        sent.extend(jobs)
+        return len(jobs)
+
+    relay = OutboxRelay(send=send, batch_size=2, lease=30, max_backoff=60)
+    assert relay.drain() == 0
+    with get_db() as conn:
+        rows = conn.execute("SELECT attempts, available_at, last_error FROM task_outbox ORDER BY id").fetchall()
+    assert [row["attempts"] for row in rows] == [1, 1, 0]  # 첫 묶음만 시도
+    assert all(row["available_at"] > time.time() for row in rows[:2])
+    assert "broker unavailable" in rows[0]["last_error"]
+
+    # 복구 후: 아직 시도하지 않은 작업은 바로, 실패한 작업은 백오프가 지난 뒤 발행
+    broker_down = False
+    assert relay.drain() == 1
+    with get_db() as conn:
+        conn.execute("UPDATE task_outbox SET available_at = 0")
+        conn.commit()
+    assert relay.drain() == 2
+
+    assert sorted(job["task_id"] for job in sent) == sorted(row["task_id"] for row in created)
+    assert {job["task_name"] for job in sent} == {"tasks.categorize_maintenance_request"}
+    assert {tuple(job["args"]) for job in sent} == {(row["id"], row["description"]) for row in created}
+    with get_db() as conn:
+        assert crud.count_outbox(conn) == 0
+    assert relay.stats()["failures"] == 1
+
+def test_bulk_submit_json_and_ndjson(fake_sync_llm, monkeypatch):
+    """일괄 접수: 한 트랜잭션 저장, 묶음 분류 작업, 집계 이벤트 하나, 항목별 결과"""
+    import json
+    import fake_llm
+    import main
+    import tasks
+    from database import get_db
+
+    monkeypatch.setattr(main, "BULK_TASK_SIZE", 2)
+    published = []
+
+    async def capture(event):
+        published.append(event)
+
+    monkeypatch.setattr(main.event_bus, "publish", capture)
+    headers = auth_headers("bulk@example.com")
+
+    response = client.post("/api/requests/bulk", headers=headers, json=[
+        {"description": "복도 전등 고장", "location": "3층"},
+        {"location": "설명 없음"},
+        {"description": "싱크대 배관 누수"},
+        {"description": "보일러 소음"},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (3, 1)
+    assert [item["status"] for item in body["results"]] == ["created", "error", "created", "created"]
+    assert body["results"][1]["detail"][0]["loc"] == ["description"]
+
+    assert [event["type"] for event in published] == ["requests_created"]
+    assert published[0]["data"]["count"] == 3
+
+    # 2개씩 묶은 분류 작업 2개가 outbox에 기록되고 요청에는 자기 묶음의 작업 ID가 저장됨
+    with get_db() as conn:
+        jobs = conn.execute("SELECT task_id, task_name, args FROM task_outbox ORDER BY id").fetchall()
+    ids = [item["id"] for item in body["results"] if item["status"] == "created"]
+    assert [json.loads(job["args"]) for job in jobs] == [[ids[:2]], [ids[2:]]]
+    assert {job["task_name"] for job in jobs} == {"tasks.categorize_requests"}
+    assert [item["task_id"] for item in body["results"] if item["id"]] == \
+        [jobs[0]["task_id"], jobs[0]["task_id"], jobs[1]["task_id"]]
+
+    # 작업 하나가 자기 묶음을 한 번의 LLM 호출로 분류
+    assert tasks.categorize_requests(*json.loads(jobs[0]["args"]))["processed"] == 2
+    assert fake_llm.app.state.calls == 1
+    assert client.get(f"/api/requests/{ids[1]}", headers=headers).json()["category"] == "plumbing"
+
+    ndjson = '{"description": "창문 파손"}\n\nnot json\n{"description": "에어컨 안됨"}'
+    response = client.post("/api/requests/bulk", headers={**headers, "Content-Type": "application/x-ndjson"},
+                           content=ndjson.encode())
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 1)
+    assert [item["index"] for item in body["results"] if item["status"] == "error"] == [1]
+
+    monkeypatch.setattr(main, "BULK_MAX_ITEMS", 2)
+    response = client.post("/api/requests/bulk", headers=headers, json=[{"description": "x"}] * 3)
+    assert response.status_code == 413
+    assert client.post("/api/requests/bulk", headers=headers, json={"description": "x"}).status_code == 400
+
+def test_batch_drainer_skips_bulk_and_claimed_requests(fake_sync_llm):
+    """일괄 접수 요청은 categorize_batch가 가져가지 않고, 가져간 요청은 다른 작업이 다시 분류하지 않음"""
+    import json
+    import time
+    import crud
+    import fake_llm
+    import tasks
+    from database import get_db
+
+    headers = auth_headers("claims@example.com")
+    bulk = client.post("/api/requests/bulk", headers=headers, json=[
+        {"description": "복도 전등 고장"}, {"description": "싱크대 배관 누수"},
+    ]).json()
+    bulk_ids = [item["id"] for item in bulk["results"]]
+    insert_pending(["보일러 소음", "벽 균열"])
+
+    # 단건 접수 요청만 세고 가져감
+    with get_db() as conn:
+        assert crud.count_pending_categorizations(conn, time.time()) == 2
+        claimed = crud.claim_pending_categorizations(conn, 10, time.time(), 60)
+        assert [row["description"] for row in claimed] == ["보일러 소음", "벽 균열"]
+        # lease 동안에는 다시 가져갈 수 없음
+        assert crud.claim_pending_categorizations(conn, 10, time.time(), 60) == []
+        assert crud.count_pending_categorizations(conn, time.time()) == 0
+    assert tasks.run_categorization_batch(limit=10)["processed"] == 0
+
+    # 일괄 작업이 다시 전달되어도 한 번만 분류
+    with get_db() as conn:
+        args = json.loads(conn.execute("SELECT args FROM task_outbox WHERE task_name = ?",
+                                       ("tasks.categorize_requests",)).fetchone()["args"])
+    assert args == [bulk_ids]
+    assert tasks.categorize_requests(bulk_ids)["processed"] == 2
+    assert tasks.categorize_requests(bulk_ids)["processed"] == 0
+    assert fake_llm.app.state.calls == 1
+
+def test_urgent_requests_get_classification_priority():
+    """긴급 키워드가 있는 요청의 분류 작업은 높은 우선순위로 발행"""
+    from celery_app import PRIORITY_URGENT
+    from database import get_db
+
+    headers = auth_headers("priority@example.com")
+    client.post("/api/requests", json={"description": "가스 냄새 긴급"}, headers=headers)
+    client.post("/api/requests", json={"description": "복도 페인트 칠"}, headers=headers)
+    with get_db() as conn:
+        priorities = [row["priority"] for row in conn.execute("SELECT priority FROM task_outbox ORDER BY id")]
+    assert priorities == [PRIORITY_URGENT, None]
+
+def test_urgent_request_is_classified_before_batched_requests(fake_sync_llm, monkeypatch):
+    """배치 모드에서도 긴급 요청은 앞서 대기 중인 요청보다 먼저 분류되어 저장됨"""
+    import tasks
+    from database import get_db
+
+    monkeypatch.setattr(tasks, "BATCH_SIZE", 10)
+    scheduled = []
+    monkeypatch.setattr(tasks, "schedule_batch", lambda: scheduled.append(1) or "scheduled")
+    saved = []
+    monkeypatch.setattr(tasks.event_bus, "publish_sync", lambda event: saved.append(event["data"]["id"]))
+
+    insert_pending(["복도 전등 교체", "싱크대 배관 점검", "가스 냄새 긴급"])
+    with get_db() as conn:
+        normal_id, second_id, urgent_id = [row["id"] for row in conn.execute(
+            "SELECT id FROM requests ORDER BY id")]
+
+    # 일반 요청은 배치를 예약만, 긴급 요청은 바로 분류
+    assert tasks.categorize_maintenance_request(normal_id, "복도 전등 교체")["status"] == "batched"
+    assert tasks.categorize_maintenance_request(urgent_id, "가스 냄새 긴급")["status"] == "completed"
+    assert tasks.categorize_maintenance_request(second_id, "싱크대 배관 점검")["status"] == "batched"
+    assert len(scheduled) == 2
+
+    # 배치는 나머지 요청만 분류 (긴급 요청을 다시 분류하지 않음)
+    assert tasks.run_categorization_batch(limit=10)["processed"] == 2
+    assert saved == [urgent_id, normal_id, second_id]
+
+@pytest.fixture
+def fake_s3(monkeypatch, tmp_path):
+    """첨부 저장소를 파일 시스템 가짜 S3로 교체 (multipart 파트 크기 16바이트)"""
+    import main
+    import tasks
+    from fake_s3 import FakeS3
+    from storage import S3Storage
+
+    s3 = FakeS3(tmp_path, min_part_size=16)
+    monkeypatch.setattr(main, "storage", S3Storage(s3, "bucket", part_size=16))
+    monkeypatch.setattr(tasks, "storage", main.storage)
+    return s3
+
+@pytest.fixture
+def local_storage(monkeypatch, tmp_path):
+    """첨부 저장소를 임시 디렉터리의 로컬 저장소로 교체"""
+    import main
+    import tasks
+    from storage import FilesystemStorage
+
+    storage = FilesystemStorage(tmp_path, "http://testserver")
+    monkeypatch.setattr(main, "storage", storage)
+    monkeypatch.setattr(tasks, "storage", storage)
+    return storage
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 2
+
+def test_image_upload_streams_to_s3_and_queues_thumbnail(fake_s3):
+    """업로드: 매직 바이트로 형식 판별, multipart 파트로 저장, 내용 해시 키, 썸네일 작업을 outbox에 기록"""
+    import hashlib
+    import json
+    import tasks
+    from database import get_db
+
+    headers = auth_headers("upload@example.com")
+    request_id = client.post("/api/requests", json={"description": "창문 파손"}, headers=headers).json()["id"]
+
+    # 파일 이름이 .jpg여도 내용은 PNG로 저장
+    response = client.post(f"/api/requests/{request_id}/upload", headers=headers,
+                           files={"file": ("photo.jpg", PNG_BYTES, "image/jpeg")})
+    assert response.status_code == 200
+    body = response.json()
+    sha = hashlib.sha256(PNG_BYTES).hexdigest()
+    key = f"images/{sha[:2]}/{sha}.png"
+    assert (body["content_type"], body["size"], body["deduplicated"]) == ("image/png", len(PNG_BYTES), False)
+    assert body["attachment"]["filename"] == "photo.jpg"
+    assert body["image_url"].endswith(key)
+    assert fake_s3.read("bucket", key) == PNG_BYTES
+    assert fake_s3.calls["upload_part"] == -(-len(PNG_BYTES) // 16)
+    assert not list((fake_s3.root / "bucket" / "tmp").iterdir())  # 임시 객체는 지움
+
+    row = client.get(f"/api/requests/{request_id}", headers=headers).json()
+    assert row["image_url"] == body["image_url"] and row["thumbnail_url"] is None
+    with get_db() as conn:
+        job = conn.execute("SELECT task_name, args FROM task_outbox ORDER BY id DESC").fetchone()
+    assert job["task_name"] == "tasks.generate_thumbnail"
+    assert json.loads(job["args"]) == [request_id, key]
+
+    # Pillow가 없으면 썸네일 작업은 건너뜀 (원본 그대로 사용)
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        assert tasks.generate_thumbnail(request_id, key)["status"] == "skipped"
+
+def test_duplicate_image_is_stored_once(fake_s3):
+    """같은 사진을 다른 요청에 올려도 저장소에는 한 번만"""
+    from database import get_db
+
+    headers = auth_headers("dedupe@example.com")
+    first = client.post("/api/requests", json={"description": "누수"}, headers=headers).json()["id"]
+    second = client.post("/api/requests", json={"description": "누수 재신고"}, headers=headers).json()["id"]
+
+    one = client.post(f"/api/requests/{first}/upload", headers=headers,
+                      files={"file": ("a.png", PNG_BYTES, "image/png")}).json()
+    two = client.post(f"/api/requests/{second}/upload", headers=headers,
+                      files={"file": ("b.png", PNG_BYTES, "image/png")}).json()
+    assert two["deduplicated"] and two["image_url"] == one["image_url"]
+    assert fake_s3.calls["copy_object"] == 1
+    assert len(list((fake_s3.root / "bucket" / "images").rglob("*.png"))) == 1
+    with get_db() as conn:
+        keys = {row["storage_key"] for row in conn.execute(
+            "SELECT storage_key FROM attachments WHERE request_id IN (?, ?)", (first, second))}
+    assert len(keys) == 1
+
+def test_thumbnail_task_writes_webp(local_storage):
+    import io
+    import json
+    import tasks
+    from database import get_db
+    Image = pytest.importorskip("PIL.Image")
+
+    headers = auth_headers("thumb@example.com")
+    request_id = client.post("/api/requests", json={"description": "천장 균열"}, headers=headers).json()["id"]
+    source = io.BytesIO()
+    Image.new("RGB", (1600, 1200), "blue").save(source, "JPEG")
+    response = client.post(f"/api/requests/{request_id}/upload", headers=headers,
+                           files={"file": ("crack.jpeg", source.getvalue(), "image/jpeg")})
+    key = response.json()["attachment"]["url"].split("/api/files/", 1)[1]
+
+    result = tasks.generate_thumbnail(request_id, key)
+    assert result["status"] == "completed" and result["updated_requests"] == 1
+    assert result["thumbnail_bytes"] < result["original_bytes"]
+    assert client.get(f"/api/requests/{request_id}", headers=headers).json()["thumbnail_url"].endswith(".thumb.webp")
+    attachments = client.get(f"/api/requests/{request_id}/attachments", headers=headers).json()
+    assert attachments[0]["thumbnail_url"].endswith(".thumb.webp")
+    # 이미 만든 썸네일은 다시 만들지 않음
+    assert tasks.generate_thumbnail(request_id, key)["thumbnail_bytes"] is None
+
+    # 같은 사진을 다른 요청에 올리면 썸네일도 바로 재사용 (작업을 다시 넣지 않음)
+    other = client.post("/api/requests", json={"description": "천장 균열 재신고"}, headers=headers).json()["id"]
+    body = client.post(f"/api/requests/{other}/upload", headers=headers,
+                       files={"file": ("same.jpg", source.getvalue(), "image/jpeg")}).json()
+    assert body["deduplicated"] and body["attachment"]["thumbnail_url"].endswith(".thumb.webp")
+    assert client.get(f"/api/requests/{other}", headers=headers).json()["thumbnail_url"].endswith(".thumb.webp")
+    with get_db() as conn:
+        jobs = conn.execute("SELECT args FROM task_outbox WHERE task_name = 'tasks.generate_thumbnail'").fetchall()
+    assert [job["args"] for job in jobs].count(json.dumps([other, key])) == 0
+
+def test_image_upload_rejects_bad_type_and_oversize(fake_s3, monkeypatch):
+    import main
+
+    headers = auth_headers("reject@example.com")
+    request_id = client.post("/api/requests", json={"description": "전등 고장"}, headers=headers).json()["id"]
+    url = f"/api/requests/{request_id}/upload"
+
+    # 확장자만 이미지인 파일은 거부 (저장소에 아무것도 남지 않음)
+    response = client.post(url, headers=headers,
+                           files={"file": ("evil.png", b"<script>alert(1)</script>", "image/png")})
+    assert response.status_code == 400
+    assert fake_s3.calls["put_object"] == fake_s3.calls["create_multipart_upload"] == 0
+
+    # 크기 제한을 넘으면 413 (스트리밍 도중 중단/취소는 test_uploads.py)
+    monkeypatch.setattr(main, "UPLOAD_MAX_BYTES", 100)
+    big = b"\xff\xd8\xff\xe0" + b"\x00" * 200
+    response = client.post(url, headers=headers, files={"file": ("big.jpg", big, "image/jpeg")})
+    assert response.status_code == 413
+    assert fake_s3.calls["complete_multipart_upload"] == fake_s3.calls["put_object"] == 0
+    assert client.get(f"/api/requests/{request_id}", headers=headers).json()["image_url"] is None
+
+    assert client.post(url, headers=headers, files={"other": ("a.jpg", big[:50], "image/jpeg")}).status_code == 400
+    assert client.post("/api/requests/99999/upload", headers=headers,
+                       files={"file": ("a.jpg", big[:50], "image/jpeg")}).status_code == 404
+
+def test_image_upload_requires_owner_and_caps_attachments(local_storage, monkeypatch):
+    """업로드는 본인 요청 또는 관리자만, 요청당 첨부 수 제한"""
+    import main
+
+    headers = auth_headers("owner-upload@example.com")
+    request_id = client.post("/api/requests", json={"description": "창틀 파손"}, headers=headers).json()["id"]
+    url = f"/api/requests/{request_id}/upload"
+    image = {"file": ("a.png", PNG_BYTES, "image/png")}
+
+    assert client.post(url, files=image).status_code == 401
+    assert client.post(url, headers=auth_headers("stranger-upload@example.com"), files=image).status_code == 403
+    assert client.get(f"/api/requests/{request_id}/attachments", headers=headers).json() == []
+    assert client.post(url, headers=auth_headers("upload-admin@example.com", role="admin"),
+                       files=image).status_code == 200
+
+    monkeypatch.setattr(main, "UPLOAD_MAX_ATTACHMENTS", 2)
+    gif = {"file": ("b.gif", b"GIF89a" + bytes(range(50)), "image/gif")}
+    assert client.post(url, headers=headers, files=gif).status_code == 200
+    response = client.post(url, headers=headers, files={"file": ("c.gif", b"GIF89a" + bytes(60), "image/gif")})
+    assert response.status_code == 409
+    assert client.post(url, headers=headers, files=image).status_code == 409
+    assert len(client.get(f"/api/requests/{request_id}/attachments", headers=headers).json()) == 2
+
+    # 동시 업로드가 사전 검사를 함께 통과해도 저장 트랜잭션에서 다시 제한
+    import crud
+    from database import get_db
+    attachment = {"storage_key": "images/x.png", "sha256": "x" * 64, "content_type": "image/png", "size": 1,
+                  "filename": None, "thumbnail_key": None}
+    with get_db() as conn:
+        row, saved = crud.add_attachment(conn, request_id, attachment, "url", None, max_attachments=2)
+        assert saved is None and row["id"] == request_id
+        assert crud.count_attachments(conn, request_id) == 2
+
+def test_local_storage_attachments_and_range_requests(local_storage):
+    """AWS 키 없이 로컬 저장소: 요청당 여러 첨부, Range 요청, 요청 삭제 시 첨부 행 삭제"""
+    from database import get_db
+
+    headers = auth_headers("attach@example.com")
+    request_id = client.post("/api/requests", json={"description": "벽 균열"}, headers=headers).json()["id"]
+    url = f"/api/requests/{request_id}/upload"
+    gif = b"GIF89a" + bytes(range(100))
+
+    first = client.post(url, headers=headers, files={"file": ("a.png", PNG_BYTES, "image/png")}).json()
+    second = client.post(url, headers=headers, files={"file": ("b.gif", gif, "image/gif")}).json()
+    again = client.post(url, headers=headers, files={"file": ("c.png", PNG_BYTES, "image/png")}).json()
+    # 같은 요청에 같은 내용은 기존 첨부를 그대로 반환
+    assert again["attachment"]["id"] == first["attachment"]["id"] and again["deduplicated"]
+
+    attachments = client.get(f"/api/requests/{request_id}/attachments", headers=headers).json()
+    assert [a["content_type"] for a in attachments] == ["image/png", "image/gif"]
+    assert client.get(f"/api/requests/{request_id}", headers=headers).json()["image_url"] == again["image_url"]
+    assert client.get(f"/api/requests/{request_id}/attachments",
+                      headers=auth_headers("other@example.com")).status_code == 403
+
+    path = second["attachment"]["url"].split("http://testserver", 1)[1]
+    full = client.get(path)
+    assert full.status_code == 200 and full.content == gif
+    assert full.headers["accept-ranges"] == "bytes" and full.headers["content-type"] == "image/gif"
+
+    partial = client.get(path, headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206 and partial.content == gif[2:6]
+    assert partial.headers["content-range"] == f"bytes 2-5/{len(gif)}"
+    assert client.get(path, headers={"Range": "bytes=-4"}).content == gif[-4:]
+    assert client.get(path, headers={"Range": "bytes=100-"}).content == gif[100:]
+    assert client.get(path, headers={"Range": f"bytes={len(gif)}-"}).status_code == 416
+    assert client.get(path, headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+    assert client.get("/api/files/tmp/x.png").status_code == 404
+    assert client.get("/api/files/images/../../etc/passwd").status_code == 404
+
+    client.delete(f"/api/requests/{request_id}", headers=headers)
+    with get_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM attachments").fetchone()[0] == 0
+    # 파일은 다른 요청이 공유할 수 있어 남김
+    assert client.get(path).status_code == 200
+
+def test_search_requests_ranked_highlighted_and_scoped():
+    """전문 검색: 한국어 부분 문자열, 관련도순 + 커서, 하이라이트, 사용자는 본인 요청만"""
+    from database import get_db
+
+    admin = auth_headers("search-admin@example.com", role="admin")
+    tenant = auth_headers("tenant@example.com")
+    with get_db() as conn:
+        tenant_id = conn.execute("SELECT id FROM users WHERE email = 'tenant@example.com'").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, location, category, priority) VALUES (?, ?, ?, 'plumbing', 'high')",
+            [(tenant_id, "화장실 누수가 심해요 <급함>", "101동 302호"),
+             (999, "주방 싱크대 누수가 있어요", "102동 302호"),
+             (999, "거실 전등이 깜빡여요", "302호 거실"),
+             (tenant_id, "보일러 온수가 안 나와요", "101동")]
+        )
+        conn.commit()
+
+    response = client.get("/api/requests/search", headers=admin, params={"q": "누수가"})
+    assert response.status_code == 200
+    rows = response.json()
+    assert sorted(r["id"] for r in rows) == [1, 2]
+    assert [r["score"] for r in rows] == sorted(r["score"] for r in rows)
+    tenant_row = next(r for r in rows if r["id"] == 1)
+    assert tenant_row["highlight"]["description"] == "화장실 <mark>누수가</mark> 심해요 &lt;급함&gt;"
+
+    # 여러 단어는 모두 포함 (짧은 단어 "누수"는 LIKE), 위치도 검색
+    rows = client.get("/api/requests/search", headers=admin, params={"q": "302호 누수"}).json()
+    assert sorted(r["id"] for r in rows) == [1, 2]
+    assert rows[0]["highlight"]["location"].endswith("<mark>302호</mark>")
+
+    # 관련도순 커서 페이지네이션
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/requests/search", headers=admin,
+                              params={"q": "302호", "limit": 1, **({"cursor": cursor} if cursor else {})})
+        seen.extend(r["id"] for r in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == [1, 2, 3]
+
+    # 짧은 검색어만 있으면 최신순 LIKE 검색 (score 없음)
+    rows = client.get("/api/requests/search", headers=admin, params={"q": "누수"}).json()
+    assert [r["id"] for r in rows] == [2, 1] and rows[0]["score"] is None
+
+    # 일반 사용자는 본인 요청만, 필터도 적용
+    assert [r["id"] for r in client.get("/api/requests/search", headers=tenant, params={"q": "302호"}).json()] == [1]
+    assert client.get("/api/requests/search", headers=admin, params={"q": "누수", "status": "completed"}).json() == []
+
+    # 수정/삭제가 인덱스에 반영 (트리거)
+    client.delete("/api/requests/2", headers=admin)
+    assert [r["id"] for r in client.get("/api/requests/search", headers=admin, params={"q": "싱크대"}).json()] == []
+
+    assert client.get("/api/requests/search", headers=admin, params={"q": "   "}).status_code == 400
+    assert client.get("/api/requests/search", headers=admin, params={"q": "누수가", "cursor": "!!!"}).status_code == 400
+    assert client.get("/api/requests/search", params={"q": "누수"}).status_code == 401
+
+def test_duplicate_submission_reuses_classification(monkeypatch):
+    """같은 위치의 비슷한 신고는 원본에 연결되고 분류를 그대로 사용 (AI 호출 없음)"""
+    import main
+    from database import get_db
+
+    calls = []
+
+    async def fake_categorize(description):
+        calls.append(description)
+        return {"category": "plumbing", "priority": "medium", "source": "llm"}
+
+    monkeypatch.setattr(main, "categorize_with_ai_sync", fake_categorize)
+    headers = auth_headers("dup@example.com")
+    admin = auth_headers("dup-admin@example.com", role="admin")
+
+    def submit(description, location, use_async=False):
+        return client.post("/api/requests", headers=headers, json={
+            "description": description, "location": location, "use_async": use_async
+        }).json()
+
+    original = submit("302호 화장실 천장에서 물이 떨어집니다", "101동 302호")
+    assert len(calls) == 1 and original["duplicate_of"] is None
+
+    # 어미/문장부호/위치 표기가 달라도 중복, 비동기 요청도 분류 작업 없이 바로 분류
+    with get_db() as conn:
+        outbox_before = conn.execute("SELECT COUNT(*) FROM task_outbox").fetchone()[0]
+    duplicate = submit("화장실 천장에서 물이 떨어져요. 확인 부탁드려요!", "101동302호", use_async=True)
+    assert duplicate["duplicate_of"] == original["id"]
+    assert (duplicate["category"], duplicate["priority"]) == ("plumbing", "medium")
+    assert len(calls) == 1
+    with get_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM task_outbox").fetchone()[0] == outbox_before
+        source = conn.execute("SELECT category_source FROM requests WHERE id = ?", (duplicate["id"],)).fetchone()[0]
+    assert source == "duplicate"
+
+    # 긴급 키워드가 있으면 우선순위만 높임, 중복의 중복도 원본에 연결
+    urgent = submit("화장실 천장에서 물이 떨어져요 긴급", "101동 302호")
+    assert urgent["duplicate_of"] == original["id"] and urgent["priority"] == "high"
+
+    # 다른 위치, 다른 내용, 위치 없음은 중복이 아님
+    assert submit("화장실 천장에서 물이 떨어집니다", "102동 302호")["duplicate_of"] is None
+    assert submit("복도 전등이 나갔어요", "101동 302호")["duplicate_of"] is None
+    assert submit("화장실 천장에서 물이 떨어집니다", None)["duplicate_of"] is None
+    assert len(calls) == 4
+
+    clusters = client.get("/api/admin/duplicates", headers=admin).json()
+    assert len(clusters) == 1
+    assert clusters[0]["id"] == original["id"]
+    assert clusters[0]["duplicate_ids"] == [duplicate["id"], urgent["id"]] and clusters[0]["duplicate_count"] == 2
+    assert client.get("/api/admin/duplicates", headers=headers).status_code == 403
+    assert client.get("/api/admin/metrics", headers=admin).json()["duplicate_detector"]["matches"] >= 2
+
+    # 완료된 요청은 비교 대상이 아님
+    client.patch(f"/api/requests/{original['id']}", headers=admin, json={"status": "completed"})
+    for row_id in (duplicate["id"], urgent["id"]):
+        client.patch(f"/api/requests/{row_id}", headers=admin, json={"status": "completed"})
+    assert submit("302호 화장실 천장에서 물이 떨어집니다", "101동 302호")["duplicate_of"] is None
+    assert client.get("/api/admin/duplicates", headers=admin, params={"open_only": True}).json() == []
+
+    # 원본을 지우면 연결만 끊김
+    client.delete(f"/api/requests/{original['id']}", headers=admin)
+    assert client.get(f"/api/requests/{duplicate['id']}", headers=headers).json()["duplicate_of"] is None
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--cov=main", "--cov-report=html"])
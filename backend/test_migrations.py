@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import pytest
+from migrations import MIGRATIONS, migrate, current_version
+
+DB_PATH = "test_migrations.db"
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(DB_PATH)
+    yield conn
+    conn.close()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+
+def test_migrate_applies_all_versions_once(conn):
+    """첫 실행에서 모든 버전 적용, 두 번째 실행은 아무것도 하지 않음"""
+    applied = migrate(conn)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert current_version(conn) == MIGRATIONS[-1][0]
+
+    assert migrate(conn) == []
+
+def test_existing_database_is_adopted(conn):
+    """마이그레이션 도입 전 생성된 DB에도 인덱스가 추가됨"""
+    conn.execute("CREATE TABLE requests (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, "
+                 "description TEXT NOT NULL, category VARCHAR(50), priority VARCHAR(20), "
+                 "status VARCHAR(20) DEFAULT 'pending', location VARCHAR(100), contact_info VARCHAR(100), "
+                 "image_url VARCHAR(500), task_id VARCHAR(100), created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+                 "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO requests (description) VALUES ('기존 요청')")
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0] == 1
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(requests)")}
+    assert "idx_requests_user_created" in indexes
+
+def test_listing_queries_use_indexes(conn):
+    """본인 요청 목록 / 상태 필터 쿼리가 인덱스를 사용"""
+    migrate(conn)
+
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM requests WHERE user_id = ? ORDER BY created_at DESC", (1,)))
+    assert "idx_requests_user_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT category, COUNT(*) FROM requests GROUP BY category"))
+    assert "COVERING INDEX" in plan
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from auth import User
+from realtime import ConnectionManager, SubscriptionError, SLOW_CONSUMER_CLOSE_CODE
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0, broken: bool = False):
+        self.delay = delay
+        self.broken = broken
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.broken:
+            raise RuntimeError("connection closed")
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+async def connect_as(manager, socket, user_id=1, role="admin", topics=("all",)):
+    """인증과 구독을 마친 상태로 연결"""
+    await manager.connect(socket)
+    manager.clients[socket].user = User(id=user_id, email=f"u{user_id}@example.com", role=role)
+    manager.subscribe(socket, list(topics))
+
+def test_slow_consumer_does_not_delay_others():
+    """느린 클라이언트는 큐가 차면 끊기고, 빠른 클라이언트는 모든 이벤트를 받음"""
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, send_timeout=5)
+        fast, slow = FakeSocket(), FakeSocket(delay=10)
+        await connect_as(manager, fast)
+        await connect_as(manager, slow)
+
+        loop = asyncio.get_running_loop()
+        elapsed = 0.0
+        for i in range(5):
+            start = loop.time()
+            await manager.broadcast({"type": "new_request", "data": {"id": i}})
+            elapsed += loop.time() - start
+            # 이벤트 사이에 writer 태스크가 실행될 기회
+            await asyncio.sleep(0.001)
+
+        await asyncio.sleep(0.05)
+        return manager, fast, slow, elapsed
+
+    manager, fast, slow, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.1
+    assert len(fast.sent) == 5
+    assert fast.sent[0] == '{"type": "new_request", "data": {"id": 0}}'
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.active_connections == [fast]
+    assert manager.stats()["slow_consumers_evicted"] == 1
+
+def test_dead_connection_is_cleaned_up():
+    """전송에 실패한 연결은 목록에서 제거"""
+    async def scenario():
+        manager = ConnectionManager()
+        dead = FakeSocket(broken=True)
+        await connect_as(manager, dead)
+        await manager.broadcast({"type": "request_updated", "data": {}})
+        await asyncio.sleep(0.01)
+        # 이미 정리된 연결을 다시 disconnect해도 오류 없음
+        manager.disconnect(dead)
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert manager.active_connections == []
+    assert manager.stats()["send_failures"] == 1
+
+def test_events_routed_by_topic():
+    """본인/카테고리/전체 구독에 맞는 소켓에만 전달, 권한 없는 토픽은 거부"""
+    async def scenario():
+        manager = ConnectionManager()
+        owner, stranger, plumbing_admin = FakeSocket(), FakeSocket(), FakeSocket()
+        await connect_as(manager, owner, user_id=1, role="user", topics=["own"])
+        await connect_as(manager, stranger, user_id=2, role="user", topics=["own"])
+        await connect_as(manager, plumbing_admin, user_id=3, role="admin", topics=["category:plumbing"])
+
+        with pytest.raises(SubscriptionError):
+            manager.subscribe(stranger, ["all"])
+
+        await manager.broadcast({"type": "new_request", "data": {"id": 10, "user_id": 1, "category": "plumbing"}})
+        await manager.broadcast({"type": "new_request", "data": {"id": 11, "user_id": 1, "category": "hvac"}})
+        await asyncio.sleep(0.01)
+
+        manager.disconnect(plumbing_admin)
+        return manager, owner, stranger, plumbing_admin
+
+    manager, owner, stranger, plumbing_admin = asyncio.run(scenario())
+    assert len(owner.sent) == 2
+    assert stranger.sent == []
+    assert len(plumbing_admin.sent) == 1
+    # 끊긴 소켓은 라우팅 인덱스에서도 제거
+    assert "category:plumbing" not in manager.subscriptions
+
+def test_messages_after_eviction_are_ignored():
+    """느린 소비자로 끊긴 뒤 도착한 구독/인증 메시지는 오류 없이 무시하고 라우팅 인덱스에 다시 넣지 않음"""
+    async def scenario():
+        manager = ConnectionManager(queue_size=1, send_timeout=5)
+        slow = FakeSocket(delay=10)
+        await connect_as(manager, slow)
+        for i in range(3):
+            await manager.broadcast({"type": "new_request", "data": {"id": i}})
+        await asyncio.sleep(0.01)
+        assert not manager.is_connected(slow)
+
+        await manager.handle_message(slow, {"type": "subscribe", "topics": ["all"]})
+        await manager.handle_message(slow, {"type": "unsubscribe", "topics": ["all"]})
+        await manager.handle_message(slow, {"type": "auth", "token": "stale"})
+        return manager, slow
+
+    manager, slow = asyncio.run(scenario())
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.subscriptions == {}
+    assert manager.active_connections == []
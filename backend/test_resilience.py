@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from resilience import (
+    CircuitBreaker, CircuitOpenError, TokenBucket, backoff_from_response, parse_reset_duration
+)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # 성공하면 연속 실패 수 초기화
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    stats = breaker.stats()
+    assert (stats["opened"], stats["short_circuited"]) == (1, 1)
+    assert stats["retry_in_seconds"] > 0
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()  # 시험 호출 하나만 허용
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()  # 시험 호출 실패 → 다시 열림
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_token_bucket_rate_and_penalty():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.try_acquire_sync()
+    assert bucket.try_acquire_sync()
+    assert not bucket.try_acquire_sync()
+    assert bucket.acquire_sync(timeout=0.5)  # 초당 20개 → 약 50ms 후 토큰
+
+    bucket.penalize_sync(0.2)
+    time.sleep(0.1)
+    assert not bucket.try_acquire_sync()  # 토큰이 차도 제공자가 알려준 시간 동안은 거부
+    assert bucket.acquire_sync(timeout=0.5)
+    stats = bucket.stats()
+    assert stats["penalties"] == 1
+    assert stats["allowed"] == 4
+
+
+def test_parse_provider_backoff():
+    assert parse_reset_duration("7") == 7
+    assert parse_reset_duration("2m59.5s") == pytest.approx(179.5)
+    assert parse_reset_duration("450ms") == pytest.approx(0.45)
+    assert parse_reset_duration(None) is None
+
+    assert backoff_from_response(429, {"retry-after": "3"}) == 3
+    assert backoff_from_response(429, {}) == 1.0
+    assert backoff_from_response(200, {"x-ratelimit-remaining-requests": "0",
+                                       "x-ratelimit-reset-requests": "1.5s"}) == 1.5
+    assert backoff_from_response(200, {"x-ratelimit-remaining-requests": "12"}) is None
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import database
+from migrations import migrate
+from result_writer import ResultWriter
+
+DB_PATH = "test_result_writer.db"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    original_path = database.pool.path
+    # 잠금 대기를 짧게 해서 재시도 경로를 시험
+    monkeypatch.setitem(database.PRAGMAS, "busy_timeout", 50)
+    database.configure(DB_PATH)
+    with database.get_db() as conn:
+        migrate(conn)
+        conn.executemany(
+            "INSERT INTO requests (user_id, description, category, priority) VALUES (1, ?, 'processing', 'processing')",
+            [(f"요청 {i}",) for i in range(20)]
+        )
+        conn.commit()
+    yield
+    database.configure(original_path)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+
+def categories():
+    with database.get_db() as conn:
+        return [row[0] for row in conn.execute("SELECT category FROM requests ORDER BY id")]
+
+
+def test_concurrent_results_share_one_transaction(db):
+    """여러 스레드가 동시에 보낸 결과를 몇 번의 트랜잭션으로 합쳐 저장"""
+    writer = ResultWriter(flush_interval=0.1, max_batch=50)
+    rows = {}
+
+    def work(request_id):
+        rows[request_id] = writer.write({request_id: {"category": "hvac", "priority": "low"}})
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(1, 21)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert categories() == ["hvac"] * 20
+    assert rows[7][0]["id"] == 7 and rows[7][0]["priority"] == "low"
+    stats = writer.stats()
+    assert stats["written"] == 20
+    assert stats["flushes"] <= 3
+    assert stats["max_batch_size"] >= 10
+
+
+def test_same_request_is_coalesced(db):
+    writer = ResultWriter(flush_interval=0.1)
+    first = writer.submit(1, {"category": "hvac", "priority": "low"})
+    second = writer.submit(1, {"category": "plumbing", "priority": "high"})
+
+    assert first.result(timeout=2)["category"] == "plumbing"
+    assert second.result(timeout=2)["category"] == "plumbing"
+    assert writer.stats()["coalesced"] == 1
+    assert writer.stats()["written"] == 1
+
+
+def test_locked_database_is_retried(db):
+    """다른 연결이 쓰기 잠금을 쥐고 있으면 백오프 후 재시도"""
+    # 다른 스레드(Timer)에서 커밋해 잠금을 풀 수 있도록
+    blocker = sqlite3.connect(DB_PATH, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, blocker.commit).start()
+
+    writer = ResultWriter(flush_interval=0.01, retries=8, retry_backoff=0.02)
+    start = time.perf_counter()
+    writer.write({1: {"category": "electrical", "priority": "high"}}, timeout=5)
+
+    assert time.perf_counter() - start >= 0.25
+    assert categories()[0] == "electrical"
+    assert writer.stats()["lock_retries"] >= 1
+    blocker.close()
+
+
+def test_gives_up_after_retries(db):
+    blocker = sqlite3.connect(DB_PATH)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        writer = ResultWriter(flush_interval=0.01, retries=1, retry_backoff=0.01)
+        with pytest.raises(sqlite3.OperationalError):
+            writer.write({1: {"category": "electrical", "priority": "high"}}, timeout=5)
+        assert writer.stats()["errors"] == 1
+    finally:
+        blocker.rollback()
+        blocker.close()
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+import crud
+from migrations import migrate
+from search import MAX_TERMS, highlight, like_terms, match_expression, parse_query
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def add(conn, description, location=None):
+    cursor = conn.execute(
+        "INSERT INTO requests (description, location, category, priority) VALUES (?, ?, 'other', 'medium')",
+        (description, location)
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+def search(conn, query, **kwargs):
+    return [row["id"] for row in crud.search_requests(conn, parse_query(query), **kwargs)[0]]
+
+
+def test_query_parsing_and_escaping():
+    assert parse_query("  누수  LEAK 누수 ") == ["누수", "leak"]
+    assert len(parse_query(" ".join(f"w{i}" for i in range(20)))) == MAX_TERMS
+    # FTS5 문법은 문자열로 인용, 짧은 단어는 MATCH에서 빠짐
+    assert match_expression(["누수가", 'a"b OR', "물"]) == '"누수가" "a""b OR"'
+    assert match_expression(["물", "전등"]) is None
+    assert like_terms(["물", "5%", "a_", "누수가"]) == ["%물%", "%5\\%%", "%a\\_%"]
+
+
+def test_highlight_escapes_html():
+    assert highlight("Boiler <b>LEAK</b>", ["leak"]) == "Boiler &lt;b&gt;<mark>LEAK</mark>&lt;/b&gt;"
+    # 겹치는 단어는 긴 쪽 우선
+    assert highlight("누수가 있음", ["누수", "누수가"]) == "<mark>누수가</mark> 있음"
+    assert highlight(None, ["누수"]) is None
+
+
+def test_triggers_keep_index_in_sync(conn):
+    first = add(conn, "화장실 누수가 심해요", "101동")
+    second = add(conn, "복도 전등 고장")
+    assert search(conn, "누수가") == [first]
+
+    conn.execute("UPDATE requests SET description = '복도 전등 누수가 있어요' WHERE id = ?", (second,))
+    conn.execute("UPDATE requests SET status = 'completed' WHERE id = ?", (first,))
+    conn.commit()
+    assert sorted(search(conn, "누수가")) == [first, second]
+
+    conn.execute("DELETE FROM requests WHERE id = ?", (first,))
+    conn.commit()
+    assert search(conn, "누수가") == [second]
+    assert search(conn, "101동") == []
+    # 인덱스와 본문이 일치하는지 FTS5 자체 검사
+    conn.execute("INSERT INTO requests_fts (requests_fts) VALUES ('integrity-check')")
+
+
+def test_short_terms_and_mixed_queries(conn):
+    ids = [add(conn, f"{room} 누수", "302호") for room in ("주방", "욕실", "거실")]
+    other = add(conn, "주방 전등", "302호")
+    # 짧은 단어만: 최신순 LIKE
+    assert search(conn, "누수") == ids[::-1]
+    # 긴 단어로 후보를 찾고 짧은 단어로 거름
+    assert sorted(search(conn, "302호 주방")) == [ids[0], other]
+    assert search(conn, "302호 주방 누수") == [ids[0]]
+    # LIKE 와일드카드는 문자 그대로
+    assert search(conn, "%") == []
+
+
+def test_existing_rows_are_indexed_by_migration():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn, target=10)
+    add(conn, "마이그레이션 전 누수 요청")
+    migrate(conn)
+    assert search(conn, "마이그레이션") == [1]
+    conn.close()
+
+
+def test_ranking_is_bounded_to_recent_matches(conn, monkeypatch):
+    import search
+
+    monkeypatch.setattr(search, "RANK_WINDOW", 3)
+    ids = [add(conn, f"보일러 고장 {i}") for i in range(5)]
+    add(conn, "다른 요청")
+    # 최근 3건만 순위 계산, 커서로 넘겨도 같은 범위
+    first, cursor = crud.search_requests(conn, parse_query("보일러"), limit=2)
+    second, cursor = crud.search_requests(conn, parse_query("보일러"), limit=2, cursor=cursor)
+    assert cursor is None
+    assert sorted(row["id"] for row in first + second) == ids[2:]
+    # 필터를 적용한 뒤의 최근 건수
+    assert len(crud.search_requests(conn, parse_query("보일러 고장"), limit=10, status="pending")[0]) == 3
+    monkeypatch.setattr(search, "RANK_WINDOW", 100)
+    assert len(crud.search_requests(conn, parse_query("보일러"), limit=10)[0]) == 5
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from fake_s3 import FakeS3
+from storage import (
+    FilesystemStorage, HashingWriter, RangeNotSatisfiable, S3Storage, content_key, iter_file, parse_range,
+    temp_key
+)
+
+DATA = b"\x89PNG\r\n\x1a\n" + bytes(range(64))
+
+
+def upload(storage, data: bytes) -> HashingWriter:
+    writer = HashingWriter(storage.open_writer(temp_key("png"), "image/png"))
+
+    async def run():
+        for start in range(0, len(data), 10):
+            await writer.write(data[start:start + 10])
+        await writer.complete()
+
+    asyncio.run(run())
+    return writer
+
+
+@pytest.mark.parametrize("make_storage", [
+    lambda tmp: FilesystemStorage(tmp),
+    lambda tmp: S3Storage(FakeS3(tmp, min_part_size=16), "bucket", part_size=16),
+])
+def test_commit_deduplicates_by_content_hash(tmp_path, make_storage):
+    storage = make_storage(tmp_path)
+    first = upload(storage, DATA)
+    key = content_key(first.sha256, "png")
+    assert first.sha256 == hashlib.sha256(DATA).hexdigest() and first.size == len(DATA)
+    assert storage.commit(first.key, key, "image/png")
+    assert storage.get(key) == DATA and not storage.exists(first.key)
+
+    # 같은 내용은 임시 파일만 지우고 기존 파일 유지
+    second = upload(storage, DATA)
+    assert not storage.commit(second.key, key, "image/png")
+    assert storage.get(key) == DATA and not storage.exists(second.key)
+
+
+def test_filesystem_storage_rejects_keys_outside_root(tmp_path):
+    storage = FilesystemStorage(tmp_path / "media", "http://api.example.com/")
+    assert storage.url("images/ab/x.png") == "http://api.example.com/api/files/images/ab/x.png"
+    for key in ("../secret", "images/../../secret", "/etc/passwd"):
+        with pytest.raises(ValueError):
+            storage.path(key)
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    # 해석할 수 없거나 여러 구간이면 전체 응답
+    assert parse_range("bytes=a-b", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    for header in ("bytes=100-", "bytes=5-1", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 100)
+
+
+def test_iter_file_reads_range(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    assert b"".join(iter_file(path, 3, 40, chunk_size=8)) == DATA[3:41]
@@ -0,0 +1,113 @@
+import asyncio
+import io
+
+import pytest
+
+from fake_s3 import FakeS3
+from uploads import (
+    S3MultipartWriter, UploadError, make_thumbnail, sniff_image, stream_image_upload, thumbnail_key
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 32
+
+
+def test_sniff_image_by_magic_bytes():
+    assert sniff_image(JPEG) == ("jpg", "image/jpeg")
+    assert sniff_image(PNG) == ("png", "image/png")
+    assert sniff_image(b"GIF89a" + b"\x00" * 6) == ("gif", "image/gif")
+    assert sniff_image(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ("webp", "image/webp")
+    # 확장자만 이미지인 HTML/스크립트나 RIFF 오디오는 거부
+    assert sniff_image(b"<html><script>") is None
+    assert sniff_image(b"RIFF\x00\x00\x00\x00WAVEfmt ") is None
+    assert thumbnail_key("images/ab/abc.jpg") == "images/ab/abc.thumb.webp"
+
+
+def test_multipart_writer_uploads_parts(tmp_path):
+    s3 = FakeS3(tmp_path, min_part_size=8)
+    writer = S3MultipartWriter(s3, "bucket", "a.png", "image/png", part_size=8)
+
+    async def run():
+        for start in range(0, len(PNG), 5):
+            await writer.write(PNG[start:start + 5])
+        await writer.complete()
+
+    asyncio.run(run())
+    assert s3.read("bucket", "a.png") == PNG
+    assert s3.calls["upload_part"] == 5  # 8바이트 파트 5개
+    assert s3.calls["put_object"] == 0
+    assert writer.size == len(PNG)
+
+
+def test_small_file_is_single_put_and_abort_cleans_up(tmp_path):
+    s3 = FakeS3(tmp_path, min_part_size=8)
+
+    small = S3MultipartWriter(s3, "bucket", "small.jpg", "image/jpeg", part_size=1024)
+    asyncio.run(small.write(JPEG))
+    asyncio.run(small.complete())
+    assert s3.calls["put_object"] == 1 and s3.calls["create_multipart_upload"] == 0
+
+    aborted = S3MultipartWriter(s3, "bucket", "big.png", "image/png", part_size=8)
+    asyncio.run(aborted.write(PNG))
+    asyncio.run(aborted.abort())
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert not s3.uploads
+    assert not s3.exists("bucket", "big.png")
+
+
+class StreamingRequest:
+    """request.stream()으로 본문을 여러 조각으로 보내는 요청"""
+
+    def __init__(self, fields: list, chunk_size: int = 7):
+        boundary = "testboundary"
+        body = b""
+        for name, filename, data in fields:
+            body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"; "
+                     f"filename=\"{filename}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode()
+            body += data + b"\r\n"
+        body += f"--{boundary}--\r\n".encode()
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}"}
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_stream_upload_in_chunks(tmp_path):
+    s3 = FakeS3(tmp_path, min_part_size=8)
+    request = StreamingRequest([("note", "a.txt", b"ignored"), ("file", "x.bin", PNG)])
+    writer, filename = asyncio.run(stream_image_upload(
+        request, "file", lambda ext, ctype: S3MultipartWriter(s3, "bucket", f"x.{ext}", ctype, part_size=8)
+    ))
+    assert (writer.key, writer.content_type, writer.size) == ("x.png", "image/png", len(PNG))
+    assert filename == "x.bin"
+    assert s3.read("bucket", "x.png") == PNG
+
+
+def test_stream_upload_aborts_when_limit_exceeded(tmp_path):
+    s3 = FakeS3(tmp_path, min_part_size=8)
+    writers = []
+
+    def open_writer(ext, ctype):
+        writers.append(S3MultipartWriter(s3, "bucket", f"x.{ext}", ctype, part_size=8))
+        return writers[0]
+
+    with pytest.raises(UploadError) as error:
+        asyncio.run(stream_image_upload(StreamingRequest([("file", "x.png", PNG * 4)]), "file",
+                                        open_writer, max_bytes=100))
+    assert error.value.status_code == 413
+    # 제한을 넘기 전에 올린 파트는 abort로 정리
+    assert s3.calls["upload_part"] >= 1
+    assert s3.calls["abort_multipart_upload"] == 1 and not s3.uploads
+    assert not s3.exists("bucket", "x.png")
+
+
+def test_make_thumbnail_webp():
+    Image = pytest.importorskip("PIL.Image")
+    source = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "red").save(source, "JPEG")
+
+    with Image.open(io.BytesIO(make_thumbnail(source.getvalue(), 320))) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert max(thumbnail.size) <= 320
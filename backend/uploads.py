@@ -0,0 +1,272 @@
+"""
+이미지 업로드 (S3 multipart 스트리밍)
+
+UploadFile은 본문 전체를 임시 파일에 받은 뒤에야 핸들러가 실행되고, upload_fileobj가 그 파일을
+처음부터 다시 읽어 올립니다. 여기서는 multipart 본문을 도착하는 대로 파싱해 S3 multipart 업로드
+파트(UPLOAD_PART_SIZE)로 바로 올리므로 프로세스에는 파트 하나만 남습니다.
+
+- 크기 제한: 받는 도중 UPLOAD_MAX_BYTES를 넘으면 바로 중단 (413, 올리던 multipart 업로드는 abort)
+- 형식 검증: 확장자 대신 파일 앞부분(매직 바이트)으로 JPEG/PNG/GIF/WebP 판별, 키 확장자도 판별 결과로
+- boto3 호출은 스레드 풀에서 (이벤트 루프를 막지 않음)
+- 파트 하나보다 작은 파일은 put_object 한 번으로 저장
+
+저장 위치(로컬 디스크/S3)와 내용 해시 키는 storage.py가 정하고, 썸네일(WebP)은 업로드 후
+Celery 작업(tasks.generate_thumbnail)이 만듭니다. 테스트에서는 fake_s3.FakeS3(파일 시스템)를
+S3 클라이언트 대신 사용합니다.
+
+환경변수:
+    AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET_NAME
+    S3_ENDPOINT_URL     S3 호환 저장소 주소 (MinIO 등, 선택)
+    UPLOAD_MAX_BYTES    업로드 최대 크기, 바이트 (기본값: 10485760)
+    UPLOAD_MAX_ATTACHMENTS  요청 하나의 최대 첨부 수 (기본값: 10)
+    UPLOAD_PART_SIZE    multipart 파트 크기, 바이트 (기본값: 8388608, S3 최소 5MiB)
+    THUMBNAIL_SIZE      썸네일 긴 변 길이, 픽셀 (기본값: 640)
+"""
+
+import io
+import os
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_ATTACHMENTS = int(os.getenv("UPLOAD_MAX_ATTACHMENTS", "10"))
+UPLOAD_PART_SIZE = max(int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "640"))
+
+# 파일 필드 외 multipart 경계/헤더에 허용하는 여유 (Content-Length로 미리 거부할 때)
+MULTIPART_OVERHEAD = 16 * 1024
+
+# (시그니처, 확장자, Content-Type) - WebP는 RIFF....WEBP라 sniff_image에서 따로 확인
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+)
+SNIFF_BYTES = 12
+
+
+def create_s3_client():
+    """boto3 S3 클라이언트 (키가 없으면 boto3 기본 자격 증명 - IAM 역할 등)"""
+    import boto3
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID") or None,
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY") or None,
+        region_name=os.getenv("AWS_REGION", "ap-northeast-2"),
+        endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+    )
+
+
+def thumbnail_key(key: str) -> str:
+    """원본 키 → 썸네일 키 (images/ab/abc.jpg → images/ab/abc.thumb.webp)"""
+    return f"{key.rsplit('.', 1)[0]}.thumb.webp"
+
+
+def sniff_image(head: bytes) -> Optional[tuple]:
+    """파일 앞부분으로 (확장자, Content-Type) 판별 (지원하는 이미지가 아니면 None)"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    for signature, extension, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension, content_type
+    return None
+
+
+class UploadError(Exception):
+    """업로드 거부 (status_code: 응답 코드)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class S3MultipartWriter:
+    """받은 데이터를 part_size 단위로 S3 multipart 업로드 (파트 하나보다 작으면 put_object)"""
+
+    def __init__(self, client, bucket: str, key: str, content_type: str, part_size: int = UPLOAD_PART_SIZE):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.size = 0
+        self.upload_id = None
+        self.parts = []
+        self._buffer = bytearray()
+
+    async def write(self, data: bytes):
+        self._buffer += data
+        self.size += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._upload_part(part)
+
+    async def _upload_part(self, body: bytes):
+        if self.upload_id is None:
+            created = await run_in_threadpool(
+                self.client.create_multipart_upload,
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self.upload_id = created["UploadId"]
+        number = len(self.parts) + 1
+        response = await run_in_threadpool(
+            self.client.upload_part,
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=body
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    async def complete(self):
+        if self.upload_id is None:
+            await run_in_threadpool(
+                self.client.put_object,
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), ContentType=self.content_type
+            )
+        else:
+            if self._buffer:
+                await self._upload_part(bytes(self._buffer))
+            await run_in_threadpool(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+            )
+        self._buffer = bytearray()
+
+    async def abort(self):
+        """올리던 multipart 업로드 취소 (받아 둔 파트가 저장소에 남지 않도록)"""
+        self._buffer = bytearray()
+        if self.upload_id is None:
+            return
+        try:
+            await run_in_threadpool(
+                self.client.abort_multipart_upload, Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+        except Exception as e:
+            print(f"[UPLOAD] Abort of {self.key} failed: {type(e).__name__}: {e}")
+
+
+async def stream_image_upload(request, field: str, open_writer: Callable, max_bytes: int = UPLOAD_MAX_BYTES):
+    """
+    multipart/form-data 본문의 field 파일을 받는 대로 writer에 씀
+
+    open_writer(확장자, Content-Type)는 매직 바이트로 형식을 판별한 뒤 한 번 호출되어 writer를 만듭니다.
+    완료된 writer(key, size, content_type)와 클라이언트가 보낸 파일 이름을 반환하고,
+    거부하면 UploadError (writer는 abort).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError(400, "multipart/form-data body required")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadError(413, f"File too large (max {max_bytes} bytes)")
+
+    # 파서 콜백은 동기 함수라 받은 조각을 모아 두고 write 사이에 비동기로 저장
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "in_file": False, "found": False,
+             "ended": False, "filename": None}
+    received = []
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = state["header_value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition"))
+        # 같은 이름의 파일이 여러 개면 첫 번째만
+        state["in_file"] = options.get(b"name") == field.encode() and not state["found"]
+        if state["in_file"]:
+            state["found"] = True
+            filename = options.get(b"filename")
+            state["filename"] = filename.decode("utf-8", "replace")[:255] if filename else None
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            received.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"] = False
+            state["ended"] = True
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    writer = None
+    head = bytearray()
+    size = 0
+
+    async def drain():
+        nonlocal writer, size
+        for data in received:
+            size += len(data)
+            if size > max_bytes:
+                raise UploadError(413, f"File too large (max {max_bytes} bytes)")
+            if writer is None:
+                head.extend(data)
+                continue
+            await writer.write(data)
+        received.clear()
+        # 형식을 판별할 만큼 받았거나 파일이 끝났으면 writer를 열고 모아 둔 앞부분부터 저장
+        if writer is None and head and (len(head) >= SNIFF_BYTES or state["ended"]):
+            kind = sniff_image(bytes(head))
+            if kind is None:
+                raise UploadError(400, "Unsupported image type (JPEG, PNG, GIF, WebP only)")
+            writer = open_writer(*kind)
+            await writer.write(bytes(head))
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            await drain()
+        parser.finalize()
+        await drain()
+        if writer is None:
+            raise UploadError(400, f"Missing or empty '{field}' file")
+        await writer.complete()
+    except MultipartParseError as e:
+        if writer is not None:
+            await writer.abort()
+        raise UploadError(400, f"Malformed multipart body: {e}")
+    except BaseException:
+        # 거부/연결 끊김/저장소 오류 모두 올리던 업로드 정리
+        if writer is not None:
+            await writer.abort()
+        raise
+    return writer, state["filename"]
+
+
+def make_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """이미지를 긴 변 size 픽셀 이하 WebP로 변환 (Pillow 필요)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG는 디코딩 단계에서 축소 (큰 사진도 메모리/시간이 적게 듦)
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        output = io.BytesIO()
+        image.save(output, "WEBP", quality=80, method=4)
+    return output.getvalue()
@@ -16,6 +16,7 @@ interface Request {
   location: string | null
   contact_info: string | null
   image_url?: string
+  duplicate_of?: number | null
   created_at: string
   updated_at: string
 }
@@ -35,6 +36,12 @@ export default function AdminDashboard() {
   const [filter, setFilter] = useState<string>('all')
   const [selectedRequest, setSelectedRequest] = useState<Request | null>(null)
   const [error, setError] = useState('')
+  // 다음 페이지 커서 (서버 응답의 X-Next-Cursor 헤더, 마지막 페이지면 null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // 검색어 입력값 / 적용된 검색어 (있으면 /api/requests/search 사용)
+  const [searchInput, setSearchInput] = useState('')
+  const [query, setQuery] = useState('')
 
   useEffect(() => {
     const token = localStorage.getItem('access_token')
@@ -43,7 +50,18 @@ export default function AdminDashboard() {
       return
     }
     fetchData()
-  }, [filter])
+  }, [filter, query])
+
+  const listRequest = (cursor?: string) => {
+    const params: Record<string, string> = {}
+    if (filter !== 'all') params.status = filter
+    if (cursor) params.cursor = cursor
+    if (query) params.q = query
+    return {
+      url: `${API_URL}/api/requests${query ? '/search' : ''}`,
+      params,
+    }
+  }
 
   const fetchData = async () => {
     setLoading(true)
@@ -53,11 +71,13 @@ export default function AdminDashboard() {
         'Authorization': `Bearer ${token}`
       }
 
+      const { url, params } = listRequest()
       const [requestsRes, statsRes] = await Promise.all([
-        axios.get(`${API_URL}/api/requests${filter !== 'all' ? `?status=${filter}` : ''}`, { headers }),
+        axios.get(url, { headers, params }),
         axios.get(`${API_URL}/api/stats`, { headers }),
       ])
       setRequests(requestsRes.data)
+      setNextCursor(requestsRes.headers['x-next-cursor'] || null)
       setStats(statsRes.data)
       setError('')
     } catch (error: any) {
@@ -76,6 +96,26 @@ export default function AdminDashboard() {
     }
   }
 
+  const fetchMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const token = localStorage.getItem('access_token')
+      const { url, params } = listRequest(nextCursor)
+      const response = await axios.get(url, {
+        headers: { 'Authorization': `Bearer ${token}` },
+        params,
+      })
+      setRequests((prev) => [...prev, ...response.data])
+      setNextCursor(response.headers['x-next-cursor'] || null)
+    } catch (error: any) {
+      console.error('추가 로딩 실패:', error)
+      setError('데이터를 불러올 수 없습니다')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const updateStatus = async (id: number, newStatus: string) => {
     try {
       const token = localStorage.getItem('access_token')
@@ -269,6 +309,24 @@ export default function AdminDashboard() {
           >
             완료
           </button>
+          <form
+            className="flex flex-1 justify-end space-x-2"
+            onSubmit={(e) => {
+              e.preventDefault()
+              setQuery(searchInput.trim())
+            }}
+          >
+            <input
+              type="search"
+              value={searchInput}
+              onChange={(e) => setSearchInput(e.target.value)}
+              placeholder="설명, 위치 검색"
+              className="px-3 py-2 border border-gray-300 rounded-md w-64"
+            />
+            <button type="submit" className="px-4 py-2 rounded-md bg-gray-200 text-gray-700 hover:bg-gray-300">
+              검색
+            </button>
+          </form>
         </div>
 
         <div className="overflow-x-auto">
@@ -312,6 +370,11 @@ export default function AdminDashboard() {
                       #{request.id}
                     </td>
                     <td className="px-6 py-4 text-sm text-gray-900 max-w-xs truncate">
+                      {request.duplicate_of && (
+                        <span className="mr-2 px-2 py-0.5 text-xs rounded bg-gray-200 text-gray-700">
+                          중복 #{request.duplicate_of}
+                        </span>
+                      )}
                       {request.description}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap">
@@ -357,6 +420,17 @@ export default function AdminDashboard() {
               )}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="px-6 py-4 text-center border-t border-gray-200">
+              <button
+                onClick={fetchMore}
+                disabled={loadingMore}
+                className="text-primary-600 hover:text-primary-900 text-sm font-medium disabled:opacity-50"
+              >
+                {loadingMore ? '불러오는 중...' : '더 보기'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
 
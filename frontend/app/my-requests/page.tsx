@@ -16,6 +16,7 @@ interface Request {
   location?: string
   contact_info?: string
   image_url?: string
+  thumbnail_url?: string
   created_at: string
   updated_at: string
 }
@@ -27,6 +28,9 @@ export default function MyRequestsPage() {
   const [error, setError] = useState('')
   const [selectedRequest, setSelectedRequest] = useState<Request | null>(null)
   const [statusFilter, setStatusFilter] = useState<string>('all')
+  // 다음 페이지 커서 (서버 응답의 X-Next-Cursor 헤더, 마지막 페이지면 null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     const token = localStorage.getItem('access_token')
@@ -41,16 +45,14 @@ export default function MyRequestsPage() {
     try {
       setLoading(true)
       const token = localStorage.getItem('access_token')
-      const url = statusFilter === 'all'
-        ? `${API_URL}/api/my-requests`
-        : `${API_URL}/api/my-requests?status=${statusFilter}`
-
-      const response = await axios.get(url, {
+      const response = await axios.get(`${API_URL}/api/my-requests`, {
         headers: {
           'Authorization': `Bearer ${token}`
-        }
+        },
+        params: statusFilter === 'all' ? {} : { status: statusFilter }
       })
       setRequests(response.data)
+      setNextCursor(response.headers['x-next-cursor'] || null)
       setError('')
     } catch (err: any) {
       if (err.response?.status === 401) {
@@ -65,6 +67,26 @@ export default function MyRequestsPage() {
     }
   }
 
+  const fetchMore = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const token = localStorage.getItem('access_token')
+      const response = await axios.get(`${API_URL}/api/my-requests`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        },
+        params: { cursor: nextCursor, ...(statusFilter === 'all' ? {} : { status: statusFilter }) }
+      })
+      setRequests((prev) => [...prev, ...response.data])
+      setNextCursor(response.headers['x-next-cursor'] || null)
+    } catch (err: any) {
+      setError('요청 목록을 불러올 수 없습니다')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const deleteRequest = async (id: number) => {
     if (!confirm('정말 이 요청을 삭제하시겠습니까?')) return
 
@@ -297,6 +319,17 @@ export default function MyRequestsPage() {
                 </tbody>
               </table>
             </div>
+            {nextCursor && (
+              <div className="px-6 py-4 text-center border-t border-gray-200">
+                <button
+                  onClick={fetchMore}
+                  disabled={loadingMore}
+                  className="text-blue-600 hover:text-blue-900 text-sm font-medium disabled:opacity-50"
+                >
+                  {loadingMore ? '불러오는 중...' : '더 보기'}
+                </button>
+              </div>
+            )}
           </div>
         )}
 
@@ -364,11 +397,15 @@ export default function MyRequestsPage() {
                   {selectedRequest.image_url && (
                     <div>
                       <label className="block text-sm font-medium text-gray-700 mb-1">첨부 이미지</label>
-                      <img
-                        src={selectedRequest.image_url}
-                        alt="첨부 이미지"
-                        className="max-w-full h-auto rounded-lg border"
-                      />
+                      {/* 썸네일(WebP)이 만들어졌으면 썸네일을 보여 주고 원본은 링크로 */}
+                      <a href={selectedRequest.image_url} target="_blank" rel="noopener noreferrer">
+                        <img
+                          src={selectedRequest.thumbnail_url || selectedRequest.image_url}
+                          alt="첨부 이미지"
+                          loading="lazy"
+                          className="max-w-full h-auto rounded-lg border"
+                        />
+                      </a>
                     </div>
                   )}
 
@@ -25,6 +25,9 @@ export default function UserDashboard() {
   const [loading, setLoading] = useState(true)
   const [selectedRequest, setSelectedRequest] = useState<Request | null>(null)
   const [error, setError] = useState('')
+  // 다음 페이지 커서 (서버 응답의 X-Next-Cursor 헤더, 마지막 페이지면 null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     const token = localStorage.getItem('access_token')
@@ -43,6 +46,7 @@ export default function UserDashboard() {
         headers: { Authorization: `Bearer ${token}` }
       })
       setRequests(response.data)
+      setNextCursor(response.headers['x-next-cursor'] || null)
       setError('')
     } catch (error: any) {
       console.error('요청 로딩 실패:', error)
@@ -58,6 +62,25 @@ export default function UserDashboard() {
     }
   }
 
+  const fetchMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const token = localStorage.getItem('access_token')
+      const response = await axios.get(`${API_URL}/api/my-requests`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { cursor: nextCursor }
+      })
+      setRequests((prev) => [...prev, ...response.data])
+      setNextCursor(response.headers['x-next-cursor'] || null)
+    } catch (error: any) {
+      console.error('추가 로딩 실패:', error)
+      setError('요청을 불러올 수 없습니다')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const deleteRequest = async (id: number) => {
     if (!confirm('정말 이 요청을 삭제하시겠습니까?')) return
 
@@ -248,10 +271,22 @@ export default function UserDashboard() {
               )}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="px-6 py-4 text-center border-t border-gray-200">
+              <button
+                onClick={fetchMore}
+                disabled={loadingMore}
+                className="text-primary-600 hover:text-primary-900 text-sm font-medium disabled:opacity-50"
+              >
+                {loadingMore ? '불러오는 중...' : '더 보기'}
+              </button>
+            </div>
+          )}
         </div>
 
         <div className="mt-6 text-center text-gray-600">
-          총 <span className="font-bold text-primary-600">{requests.length}</span>개의 요청
+          {nextCursor ? '최근 ' : '총 '}
+          <span className="font-bold text-primary-600">{requests.length}</span>개의 요청
         </div>
       </div>
 